@@ -1,9 +1,15 @@
+import hashlib
+from datetime import date
 from typing import Any, Dict, Optional
 
+from app.core import tracing
 from app.core.config import get_settings
-from app.core.roles import DEFAULT_ROLE, resolve_role_scopes, scope_matches
-from app.db.instance import db
-from fastapi import Depends, HTTPException, Request, status
+from app.core.principal_cache import principal_cache
+from app.core.roles import DEFAULT_ROLE, compile_scopes, resolve_compiled_scopes
+from app.core.token_revocation import revocation_list
+from app.db.instance import db, store
+from app.db.tenant import CURRENT_TENANT_ID
+from fastapi import Depends, HTTPException, Request, Response, status
 from jose import JWTError, jwt
 
 settings = get_settings()
@@ -15,11 +21,18 @@ OPEN_ENDPOINTS = {
     "/openapi.json",
     "/api/auth/login",
     "/api/auth/register",
+    "/api/auth/refresh",
+    "/api/auth/logout",
     "/health",
 }
 
 
 async def get_current_user(request: Request) -> Dict[str, Any]:
+    with tracing.span("auth.get_current_user"):
+        return await _authenticate(request)
+
+
+async def _authenticate(request: Request) -> Dict[str, Any]:
 
     # Check if endpoint is open
     # Note: This check is usually done in middleware or before dependency injection
@@ -52,10 +65,21 @@ async def get_current_user(request: Request) -> Dict[str, Any]:
     # API Tokens check (omitted for now as it relies on a global dict in server.py,
     # we should move it to config or DB if needed, but for now let's focus on JWT)
 
+    # A recently authenticated (token, tenant) pair skips decoding and lookups.
+    tenant_header = request.headers.get("X-Tenant-Id")
+    cache_key = principal_cache.key_for(token_value, tenant_header)
+    cached_principal = principal_cache.get(cache_key)
+    if cached_principal is not None:
+        if tenant_header:
+            CURRENT_TENANT_ID.set(tenant_header)
+        request.state.current_user = cached_principal
+        return cached_principal
+
     try:
-        payload = jwt.decode(
-            token_value, settings.AUTH_SECRET, algorithms=[settings.AUTH_ALGORITHM]
-        )
+        with tracing.span("auth.jwt_decode"):
+            payload = jwt.decode(
+                token_value, settings.AUTH_SECRET, algorithms=[settings.AUTH_ALGORITHM]
+            )
     except JWTError as exc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -64,16 +88,61 @@ async def get_current_user(request: Request) -> Dict[str, Any]:
         ) from exc
 
     user_id = payload.get("sub")
-    if not user_id:
+    if user_id:
+        await revocation_list.load(payload.get("jti"), user_id)
+    if not user_id or revocation_list.is_revoked(payload.get("jti")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Neautorizirano",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Access tokens carry role, scopes and memberships; trust them unless the
+    # user changed after the token was issued. Legacy tokens always hit the DB.
+    if payload.get("typ") == "access" and not revocation_list.claims_are_stale(
+        user_id, payload.get("iat")
+    ):
+        principal = _principal_from_claims(payload, tenant_header)
+    else:
+        principal = await _principal_from_database(payload, tenant_header)
+
+    if tenant_header:
+        CURRENT_TENANT_ID.set(tenant_header)
+
+    principal_cache.put(cache_key, principal, token_expires_at=payload.get("exp"))
+    request.state.current_user = principal
+    return principal
+
+
+def _principal_from_claims(
+    payload: Dict[str, Any], tenant_id: Optional[str]
+) -> Dict[str, Any]:
+    role = payload.get("role") or DEFAULT_ROLE
+    compiled_scopes = resolve_compiled_scopes(role, payload.get("scopes", []))
+    if tenant_id and role not in ["admin", "owner"]:
+        if tenant_id not in (payload.get("tenants") or {}):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Nemate pristup ovom tenantu",
+            )
+    return {
+        "id": payload["sub"],
+        "name": payload.get("name") or payload.get("email"),
+        "role": role,
+        "scopes": list(compiled_scopes.scopes),
+        "compiled_scopes": compiled_scopes,
+        "token_based": False,
+        "tenant_id": payload.get("tenant_id"),
+    }
+
+
+async def _principal_from_database(
+    payload: Dict[str, Any], tenant_id: Optional[str]
+) -> Dict[str, Any]:
     # We need to fetch the user from DB
     # Since db.users.find_one returns a dict, we use it.
-    user_doc = await db.users.find_one({"id": user_id})
+    with tracing.span("auth.user_fetch"):
+        user_doc = await db.users.find_one({"id": payload["sub"]})
     if not user_doc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -99,21 +168,19 @@ async def get_current_user(request: Request) -> Dict[str, Any]:
     role = user_doc.get("role", DEFAULT_ROLE)
     token_scopes = payload.get("scopes", [])
     user_scopes = user_doc.get("scopes", [])
-    scopes = resolve_role_scopes(role, token_scopes or user_scopes)
+    compiled_scopes = resolve_compiled_scopes(role, token_scopes or user_scopes)
 
     principal = {
         "id": user_doc.get("id"),
         "name": user_doc.get("full_name") or user_doc.get("email"),
         "role": role,
-        "scopes": scopes,
+        "scopes": list(compiled_scopes.scopes),
+        "compiled_scopes": compiled_scopes,
         "token_based": False,
         "tenant_id": user_doc.get("tenant_id"),  # Add tenant_id if present
     }
 
     # Set context var for tenant
-    # We need to import CURRENT_TENANT_ID from app.db.tenant
-    from app.db.tenant import CURRENT_TENANT_ID
-
     # Check header for tenant override if allowed (e.g. for superadmins)
     # The original code had:
     # tenant_id = os.environ.get("BACKEND_TENANT_ID") or payload.get("user", {}).get("tenant_id")
@@ -122,7 +189,6 @@ async def get_current_user(request: Request) -> Dict[str, Any]:
     # tenant_id_header = request.headers.get("X-Tenant-Id")
     # ... logic to determine tenant ...
     # I will implement basic tenant extraction from header or user
-    tenant_id = request.headers.get("X-Tenant-Id")
     if not tenant_id:
         # Fallback to user's tenant
         # We need to check membership.
@@ -136,9 +202,14 @@ async def get_current_user(request: Request) -> Dict[str, Any]:
         # Skip check for superadmins (admin/owner)
         if role not in ["admin", "owner"]:
             # Check if user is member of this tenant
-            membership = await db.tenant_memberships.find_one(
-                {"user_id": user_doc["id"], "tenant_id": tenant_id, "status": "active"}
-            )
+            with tracing.span("auth.membership_fetch", tenant_id=tenant_id):
+                membership = await db.tenant_memberships.find_one(
+                    {
+                        "user_id": user_doc["id"],
+                        "tenant_id": tenant_id,
+                        "status": "active",
+                    }
+                )
             if not membership:
                 # If not a member, check if it's the user's own "personal" tenant?
                 # Or just forbid.
@@ -148,9 +219,6 @@ async def get_current_user(request: Request) -> Dict[str, Any]:
                     detail="Nemate pristup ovom tenantu",
                 )
 
-        CURRENT_TENANT_ID.set(tenant_id)
-
-    request.state.current_user = principal
     return principal
 
 
@@ -158,15 +226,15 @@ def require_scopes(*scopes: str):
     async def _dependency(
         request: Request, current_user: Dict[str, Any] = Depends(get_current_user)
     ):
-        granted = list(current_user.get("scopes", []))
+        granted = current_user.get("compiled_scopes") or compile_scopes(
+            current_user.get("scopes", [])
+        )
         # Add tenant scopes if any (logic from original code)
         tenant_scopes = getattr(request.state, "tenant_scopes", [])
         if tenant_scopes:
-            for scope in tenant_scopes:
-                if scope not in granted:
-                    granted.append(scope)
+            granted = granted.union(tenant_scopes)
 
-        missing = [scope for scope in scopes if not scope_matches(granted, scope)]
+        missing = [scope for scope in scopes if not granted.allows(scope)]
         if missing:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -175,3 +243,60 @@ def require_scopes(*scopes: str):
         return True
 
     return _dependency
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def conditional_etag(*collections: str):
+    """Strong ETag derived from the stored versions of ``collections``.
+
+    The tag covers the tenant and its collection versions, the caller, the
+    path and query string; the response varies on the tenant header and
+    credentials so shared caches never mix them up. The versions are read
+    from the database in one query, so writes made through any worker change
+    the tag. A matching ``If-None-Match`` short-circuits with 304 before the
+    endpoint runs, so the endpoint's queries are skipped and nothing is
+    serialised.
+    """
+
+    async def _dependency(
+        request: Request,
+        response: Response,
+        current_user: Dict[str, Any] = Depends(get_current_user),
+    ):
+        tenant_id = CURRENT_TENANT_ID.get()
+        version = await store.collections_version(collections, tenant_id)
+        raw = "|".join(
+            [
+                # Equal versions in two tenants must not produce the same tag
+                str(tenant_id),
+                version,
+                # Date-dependent fields (statuses, month buckets) roll daily
+                date.today().isoformat(),
+                str(current_user.get("id")),
+                str(current_user.get("role")),
+                request.url.path,
+                str(sorted(request.query_params.multi_items())),
+            ]
+        )
+        etag = f'"{hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]}"'
+        headers = {
+            "ETag": etag,
+            "Cache-Control": "private, no-cache",
+            "Vary": "X-Tenant-Id, Authorization",
+        }
+        if _etag_matches(request.headers.get("If-None-Match"), etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+        response.headers.update(headers)
+
+    return _dependency
@@ -3,8 +3,11 @@ from app.api.v1.endpoints import (
     auth,
     contracts,
     dashboard,
+    debug,
     documents,
     handover_protocols,
+    indexation,
+    jobs,
     maintenance,
     parking,
     projects,
@@ -30,6 +33,7 @@ api_router.include_router(
     tenant_members.router, prefix="/tenants", tags=["tenant-members"]
 )
 api_router.include_router(contracts.router, prefix="/ugovori", tags=["contracts"])
+api_router.include_router(indexation.router, prefix="/indeksacija", tags=["indexation"])
 api_router.include_router(documents.router, prefix="/dokumenti", tags=["documents"])
 api_router.include_router(reminders.router, prefix="/podsjetnici", tags=["reminders"])
 api_router.include_router(
@@ -44,3 +48,5 @@ api_router.include_router(
     handover_protocols.router, prefix="/handover-protocols", tags=["handover_protocols"]
 )
 api_router.include_router(projects.router, prefix="/projekti", tags=["projects"])
+api_router.include_router(debug.router, prefix="/debug", tags=["debug"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
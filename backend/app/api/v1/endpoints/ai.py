@@ -2,12 +2,17 @@ import base64
 import io
 import json
 import logging
-import re
 from typing import Any, Dict, Optional
 
 from app.api import deps
+from app.core import tracing
 from app.core.config import get_settings
 from app.db.instance import db
+from app.services.entity_matching_service import (
+    confident_match,
+    match_nekretnina,
+    match_zakupnik,
+)
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from openai import OpenAI
 from PIL import Image
@@ -57,13 +62,14 @@ async def generate_contract_annex(request: AnnexRequest):
             f"Dodatne promjene: {request.dodatne_promjene}."
         )
 
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "Ti si pravni asistent."},
-                {"role": "user", "content": prompt},
-            ],
-        )
+        with tracing.span("openai.chat.completions", model="gpt-3.5-turbo"):
+            response = client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "Ti si pravni asistent."},
+                    {"role": "user", "content": prompt},
+                ],
+            )
 
         content = response.choices[0].message.content
 
@@ -91,7 +97,8 @@ async def parse_pdf_contract(
 
     # 1. Read file content
     try:
-        contents = await file.read()
+        with tracing.span("file.read", filename=file.filename or ""):
+            contents = await file.read()
         pdf_file = io.BytesIO(contents)
         reader = PdfReader(pdf_file)
     except Exception as e:
@@ -253,12 +260,13 @@ async def parse_pdf_contract(
                 },
             ]
 
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=0,
-            response_format={"type": "json_object"},
-        )
+        with tracing.span("openai.chat.completions", model=model):
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0,
+                response_format={"type": "json_object"},
+            )
 
         content = response.choices[0].message.content
         data = json.loads(content)
@@ -269,65 +277,38 @@ async def parse_pdf_contract(
         # 1. Match Tenant
         if data.get("zakupnik"):
             zakupnik_data = data["zakupnik"]
-            query = []
-            if zakupnik_data.get("oib"):
-                query.append({"oib": zakupnik_data["oib"]})
-            if zakupnik_data.get("naziv_firme"):
-                query.append(
-                    {
-                        "naziv_firme": {
-                            "$regex": re.escape(zakupnik_data["naziv_firme"]),
-                            "$options": "i",
-                        }
-                    }
-                )
-
-            if query:
-                found_tenant = await db.zakupnici.find_one({"$or": query})
-                if found_tenant:
-                    data["zakupnik"]["id"] = found_tenant["id"]
-                    # Update fields if missing in AI response but present in DB? No, prefer AI for now or keep as is.
+            candidates = await match_zakupnik(
+                naziv=zakupnik_data.get("naziv_firme"), oib=zakupnik_data.get("oib")
+            )
+            zakupnik_data["kandidati"] = candidates
+            matched_id = confident_match(candidates)
+            if matched_id:
+                zakupnik_data["id"] = matched_id
 
         # 2. Match Property
         if data.get("nekretnina"):
             prop_data = data["nekretnina"]
-            query = []
-            if prop_data.get("naziv"):
-                query.append(
-                    {
-                        "naziv": {
-                            "$regex": re.escape(prop_data["naziv"]),
-                            "$options": "i",
+            candidates = await match_nekretnina(
+                naziv=prop_data.get("naziv"), adresa=prop_data.get("adresa")
+            )
+            prop_data["kandidati"] = candidates
+            matched_id = confident_match(candidates)
+            if matched_id:
+                prop_data["id"] = matched_id
+
+                # 3. Match Unit if Property found
+                if data.get("property_unit") and data["property_unit"].get("naziv"):
+                    found_unit = await db.property_units.find_one(
+                        {
+                            "nekretnina_id": matched_id,
+                            "oznaka": {
+                                "$contains": data["property_unit"]["naziv"],
+                                "$options": "i",
+                            },
                         }
-                    }
-                )
-            if prop_data.get("adresa"):
-                # Simple address match (first part)
-                addr_part = prop_data["adresa"].split(",")[0].strip()
-                if len(addr_part) > 3:
-                    query.append(
-                        {"adresa": {"$regex": re.escape(addr_part), "$options": "i"}}
                     )
-
-            if query:
-                found_prop = await db.nekretnine.find_one({"$or": query})
-                if found_prop:
-                    data["nekretnina"]["id"] = found_prop["id"]
-
-                    # 3. Match Unit if Property found
-                    if data.get("property_unit") and data["property_unit"].get("naziv"):
-                        unit_name = data["property_unit"]["naziv"]
-                        found_unit = await db.property_units.find_one(
-                            {
-                                "nekretnina_id": found_prop["id"],
-                                "oznaka": {
-                                    "$regex": re.escape(unit_name),
-                                    "$options": "i",
-                                },
-                            }
-                        )
-                        if found_unit:
-                            data["property_unit"]["id"] = found_unit["id"]
+                    if found_unit:
+                        data["property_unit"]["id"] = found_unit["id"]
 
         return {"success": True, "data": data}
 
@@ -1,12 +1,20 @@
 from datetime import timedelta
-from typing import Optional
+from typing import Any, Dict, Optional
 
 from app.core.config import get_settings
+from app.core.principal_cache import principal_cache
 from app.core.roles import DEFAULT_ROLE, resolve_role_scopes
-from app.core.security import create_access_token, hash_password, verify_password
-from app.db.instance import db
+from app.core.security import (
+    create_access_token,
+    hash_password_async,
+    verify_password_async,
+)
+from app.core.token_revocation import revocation_list
+from app.db.instance import db, refresh_tokens
+from app.db.refresh_tokens import RefreshTokenError
 from app.models.domain import User, UserPublic
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Request, status
+from jose import JWTError, jwt
 from pydantic import BaseModel, EmailStr
 
 settings = get_settings()
@@ -22,6 +30,60 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: UserPublic
+    refresh_token: Optional[str] = None
+    expires_in: Optional[int] = None
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = None
+
+
+def _unauthorized() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Neautorizirano",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def _issue_access_token(user_doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Sign a short-lived access token carrying everything needed to authorise.
+
+    Role, scopes and active tenant memberships travel in the token so
+    ``get_current_user`` does not have to read the database on each request.
+    """
+
+    role = user_doc.get("role", DEFAULT_ROLE)
+    scopes = resolve_role_scopes(role, user_doc.get("scopes", []))
+    memberships = await db.tenant_memberships.find(
+        {"user_id": user_doc.get("id"), "status": "active"}
+    ).to_list(None)
+
+    token_payload = {
+        "sub": user_doc.get("id"),
+        "typ": "access",
+        "scopes": scopes,
+        "role": role,
+        "name": user_doc.get("full_name"),
+        "email": user_doc.get("email"),
+        "tenant_id": user_doc.get("tenant_id"),
+        "tenants": {m["tenant_id"]: m.get("role") for m in memberships},
+    }
+    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data=token_payload, expires_delta=access_token_expires
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "expires_in": int(access_token_expires.total_seconds()),
+        "role": role,
+        "scopes": scopes,
+    }
 
 
 @router.post("/login", response_model=Token)
@@ -39,18 +101,18 @@ async def login(login_data: LoginRequest):
     email = login_data.email.lower()
     user_doc = await db.users.find_one({"email": email})
 
+    # bcrypt runs once, off the event loop; the result is reused for the debug log
+    is_valid = bool(user_doc) and await verify_password_async(
+        login_data.password, user_doc.get("password_hash")
+    )
+
     with open("debug_login.txt", "a") as f:
         f.write(f"User found: {user_doc is not None}\n")
         if user_doc:
             f.write(f"Stored hash: {user_doc.get('password_hash')}\n")
-            is_valid = verify_password(
-                login_data.password, user_doc.get("password_hash")
-            )
             f.write(f"Password valid: {is_valid}\n")
 
-    if not user_doc or not verify_password(
-        login_data.password, user_doc.get("password_hash")
-    ):
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Neispravan email ili lozinka",
@@ -60,24 +122,8 @@ async def login(login_data: LoginRequest):
     if not user_doc.get("active", True):
         raise HTTPException(status_code=400, detail="Korisnički račun nije aktivan")
 
-    # Create access token
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-
-    # Resolve scopes
-    role = user_doc.get("role", DEFAULT_ROLE)
-    scopes = resolve_role_scopes(role, user_doc.get("scopes", []))
-
-    token_payload = {
-        "sub": user_doc.get("id"),
-        "scopes": scopes,
-        "role": role,
-        "name": user_doc.get("full_name"),
-        "email": user_doc.get("email"),
-    }
-
-    access_token = create_access_token(
-        data=token_payload, expires_delta=access_token_expires
-    )
+    issued = await _issue_access_token(user_doc)
+    refresh = await refresh_tokens.issue(user_doc["id"])
 
     # Construct UserPublic
     # We need to handle datetime parsing if they are strings
@@ -89,14 +135,75 @@ async def login(login_data: LoginRequest):
         id=user_doc["id"],
         email=user_doc["email"],
         full_name=user_doc.get("full_name"),
-        role=role,
-        scopes=scopes,
+        role=issued["role"],
+        scopes=issued["scopes"],
         active=user_doc.get("active", True),
         created_at=user_doc.get("created_at"),  # Pydantic should handle ISO string
         updated_at=user_doc.get("updated_at"),
     )
 
-    return {"access_token": access_token, "token_type": "bearer", "user": user_public}
+    return {
+        "access_token": issued["access_token"],
+        "token_type": issued["token_type"],
+        "expires_in": issued["expires_in"],
+        "refresh_token": refresh.token,
+        "user": user_public,
+    }
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh_access_token(refresh_in: RefreshRequest):
+    try:
+        refresh = await refresh_tokens.rotate(refresh_in.refresh_token)
+    except RefreshTokenError as exc:
+        raise _unauthorized() from exc
+
+    user_doc = await db.users.find_one({"id": refresh.user_id})
+    if not user_doc or not user_doc.get("active", True):
+        await refresh_tokens.revoke(refresh.token)
+        raise _unauthorized()
+
+    issued = await _issue_access_token(user_doc)
+    return {
+        "access_token": issued["access_token"],
+        "token_type": issued["token_type"],
+        "expires_in": issued["expires_in"],
+        "refresh_token": refresh.token,
+        "user": UserPublic(
+            id=user_doc["id"],
+            email=user_doc["email"],
+            full_name=user_doc.get("full_name"),
+            role=issued["role"],
+            scopes=issued["scopes"],
+            active=user_doc.get("active", True),
+            created_at=user_doc.get("created_at"),
+            updated_at=user_doc.get("updated_at"),
+        ),
+    }
+
+
+@router.post("/logout")
+async def logout(request: Request, logout_in: Optional[LogoutRequest] = None):
+    if logout_in and logout_in.refresh_token:
+        await refresh_tokens.revoke(logout_in.refresh_token)
+
+    # Revoke the presented access token until it expires on its own. Expired or
+    # malformed tokens need no revocation, so logout never fails on them.
+    auth_header = request.headers.get("Authorization", "")
+    token_value = auth_header.split(" ", 1)[-1].strip() if auth_header else ""
+    if token_value:
+        try:
+            payload = jwt.decode(
+                token_value, settings.AUTH_SECRET, algorithms=[settings.AUTH_ALGORITHM]
+            )
+        except JWTError:
+            payload = {}
+        if payload.get("jti"):
+            await revocation_list.revoke(payload["jti"], payload.get("exp"))
+            if payload.get("sub"):
+                principal_cache.invalidate_user(payload["sub"])
+
+    return {"message": "Odjava uspješna"}
 
 
 class RegisterRequest(BaseModel):
@@ -118,7 +225,7 @@ async def register(user_in: RegisterRequest):
 
     user = User(
         email=email,
-        password_hash=hash_password(user_in.password),
+        password_hash=await hash_password_async(user_in.password),
         full_name=user_in.full_name,
         role=DEFAULT_ROLE,
         scopes=[],
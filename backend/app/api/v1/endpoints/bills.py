@@ -25,7 +25,13 @@ class BillCreate(BaseModel):
     stavke: List[Dict[str, Any]] = []
 
 
-@router.get("/", dependencies=[Depends(deps.require_scopes("financials:read"))])
+@router.get(
+    "/",
+    dependencies=[
+        Depends(deps.require_scopes("financials:read")),
+        Depends(deps.conditional_etag("racuni")),
+    ],
+)
 async def get_bills(
     skip: int = 0,
     limit: int = 100,
@@ -1,11 +1,22 @@
+from dataclasses import asdict
 from datetime import date, datetime
 from typing import Any, Dict, Optional
 
 from app.api import deps
-from app.db.instance import db
+from app.db.contract_intervals import stored_unit_intervals
+from app.db.instance import contract_intervals, db, store
+from app.db.tenant import CURRENT_TENANT_ID
 from app.db.utils import parse_from_mongo, prepare_for_mongo
-from app.models.domain import PropertyUnitStatus, StatusUgovora
-from fastapi import APIRouter, Depends, HTTPException, status
+from app.models.domain import StatusUgovora
+from app.services.contract_import_service import ImportFileError, import_contracts
+from app.services.domain_events import publish_contract_change
+from app.services.forecast_service import (
+    FORECAST_COLLECTIONS,
+    MAX_MONTHS,
+    MIN_MONTHS,
+    get_forecast,
+)
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
 from pydantic import BaseModel
 
 router = APIRouter()
@@ -74,38 +85,25 @@ async def check_contract_overlap(
     """
     Check if there is any active contract for the given unit in the given time range.
     Overlap logic: (StartA <= EndB) and (EndA >= StartB)
+
+    Call inside ``db.transaction()``: the unit's contracts are read from the
+    database with the unit locked, so the answer holds until the write commits
+    no matter which worker wrote the other contracts.
     """
     if not unit_id:
         return
 
-    # Convert dates to datetime for MongoDB comparison if they are stored as datetime
-    # But schema says date. Prepare_for_mongo might convert them to datetime or str.
-    # Looking at other files, it seems Prepare_for_mongo handles conversions.
-    # For query, we should use the same format as stored.
-    # Assuming stored as ISO strings or datetime objects.
-    # Let's try string comparison which works for ISO dates, or native objects.
-    # To be safe, we query where status is ACTIVE or NA_ISTEKU.
-
-    query = {
-        "property_unit_id": unit_id,
-        "status": {"$in": [StatusUgovora.AKTIVNO, StatusUgovora.NA_ISTEKU]},
-        "$or": [
-            # New start is between existing start and end
-            {
-                "datum_pocetka": {"$lte": end_date.isoformat()},
-                "datum_zavrsetka": {"$gte": start_date.isoformat()},
-            }
-        ],
-    }
-
-    if exclude_contract_id:
-        query["id"] = {"$ne": exclude_contract_id}
-
-    overlap = await db.ugovori.find_one(query)
+    async with store.bulk() as bulk:
+        stored = await stored_unit_intervals(bulk, [unit_id], CURRENT_TENANT_ID.get())
+    overlap = stored[unit_id].find_overlap(
+        start_date.isoformat(),
+        end_date.isoformat(),
+        exclude_contract_id=exclude_contract_id,
+    )
     if overlap:
         raise HTTPException(
             status_code=400,
-            detail=f"Postoji preklapanje s ugovorom {overlap.get('interna_oznaka')} za ovaj period.",
+            detail=f"Postoji preklapanje s ugovorom {overlap.label} za ovaj period.",
         )
 
 
@@ -127,7 +125,13 @@ async def calculate_rent_if_needed(item_data: dict):
     return item_data
 
 
-@router.get("/", dependencies=[Depends(deps.require_scopes("leases:read"))])
+@router.get(
+    "/",
+    dependencies=[
+        Depends(deps.require_scopes("leases:read")),
+        Depends(deps.conditional_etag("ugovori")),
+    ],
+)
 async def get_contracts(
     skip: int = 0,
     limit: int = 100,
@@ -161,36 +165,89 @@ async def create_contract(
 ):
     item_data = item_in.model_dump()
 
-    # 1. Check Overlap
-    if item_data.get("property_unit_id"):
-        await check_contract_overlap(
-            item_data["property_unit_id"],
-            item_data["datum_pocetka"],
-            item_data["datum_zavrsetka"],
-        )
+    unit_id = item_data.get("property_unit_id")
+    start, end = item_data["datum_pocetka"], item_data["datum_zavrsetka"]
 
-    # 2. Financial Logic
+    # 1. Financial Logic
     item_data = await calculate_rent_if_needed(item_data)
 
     item_data["created_by"] = current_user["id"]
     item_data = prepare_for_mongo(item_data)
 
-    result = await db.ugovori.insert_one(item_data)
-
-    # 3. Status Sync (Update Unit)
-    # If contract is active, set unit to RENTED
-    if item_data.get("status") == StatusUgovora.AKTIVNO and item_data.get(
-        "property_unit_id"
-    ):
-        await db.property_units.update_one(
-            {"id": item_data["property_unit_id"]},
-            {"$set": {"status": PropertyUnitStatus.IZNAJMLJENO}},
-        )
+    # 2. Overlap check and Status Sync: one transaction with the insert
+    async with db.transaction():
+        if unit_id:
+            await check_contract_overlap(unit_id, start, end)
+        result = await db.ugovori.insert_one(item_data)
+        await publish_contract_change(result.inserted_id, None, item_data)
 
     new_item = await db.ugovori.find_one({"id": result.inserted_id})
     return parse_from_mongo(new_item)
 
 
+@router.post("/import", dependencies=[Depends(deps.require_scopes("leases:create"))])
+async def import_contracts_file(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    """Create contracts from a CSV/XLSX sheet; invalid rows are reported, not saved.
+
+    Columns are the contract fields; ``nekretnina``, ``zakupnik`` and
+    ``jedinica`` may hold a name, OIB or unit label instead of an id.
+    """
+
+    try:
+        report = await import_contracts(
+            file.file,
+            file.filename or "",
+            ContractCreate,
+            created_by=current_user["id"],
+            dry_run=dry_run,
+        )
+    except ImportFileError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return asdict(report)
+
+
+@router.get("/overlaps", dependencies=[Depends(deps.require_scopes("leases:read"))])
+async def get_contract_overlaps(
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    """Pairs of active contracts that overlap on the same unit, portfolio-wide."""
+
+    await contract_intervals.ensure_current()
+    return contract_intervals.overlaps(CURRENT_TENANT_ID.get())
+
+
+@router.get(
+    "/forecast",
+    dependencies=[
+        Depends(deps.require_scopes("leases:read")),
+        Depends(deps.conditional_etag(*FORECAST_COLLECTIONS)),
+    ],
+)
+async def get_contracts_forecast(
+    mjeseci: int = Query(MIN_MONTHS, ge=MIN_MONTHS, le=MAX_MONTHS),
+    produljenja: bool = False,
+    stopa_indeksacije: Optional[float] = Query(None, ge=-50, le=100),
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    """Forward monthly rent and CAM of active contracts, in total and per
+    property, tenant and unit.
+
+    ``produljenja`` assumes contracts with a renewal option are renewed for
+    one more term; ``stopa_indeksacije`` (% per year) escalates indexed
+    contracts on their anniversaries.
+    """
+
+    return await get_forecast(
+        months=mjeseci,
+        include_renewals=produljenja,
+        indexation_rate=stopa_indeksacije,
+    )
+
+
 @router.get("/{id}", dependencies=[Depends(deps.require_scopes("leases:read"))])
 async def get_contract(
     id: str,
@@ -233,7 +290,8 @@ async def update_contract(
                 return datetime.fromisoformat(d).date()
         return d
 
-    # 1. Check Overlap
+    # 1. Overlap check arguments (checked inside the write transaction)
+    overlap_check = None
     if (
         "datum_pocetka" in update_data
         or "datum_zavrsetka" in update_data
@@ -244,7 +302,7 @@ async def update_contract(
         end = parse_date(merged_data.get("datum_zavrsetka"))
 
         if unit_id and start and end:
-            await check_contract_overlap(unit_id, start, end, exclude_contract_id=id)
+            overlap_check = (unit_id, start, end)
 
     # 2. Financial Logic
     # We only recalculate if unit or price changed significantly, or if specifically requested?
@@ -260,29 +318,12 @@ async def update_contract(
 
     mongo_update_data = prepare_for_mongo(update_data)
 
-    await db.ugovori.update_one({"id": id}, {"$set": mongo_update_data})
-
-    # 3. Status Sync
-    # If status changed to ACTIVE -> Set Unit to RENTED
-    # If status changed to ENDED/ARCHIVED -> Set Unit to AVAILABLE
-    new_status = update_data.get("status")
-    unit_id = merged_data.get("property_unit_id")
-
-    if new_status and unit_id:
-        if new_status == StatusUgovora.AKTIVNO:
-            await db.property_units.update_one(
-                {"id": unit_id},
-                {"$set": {"status": PropertyUnitStatus.IZNAJMLJENO}},
-            )
-        elif new_status in [
-            StatusUgovora.RASKINUTO,
-            StatusUgovora.ARHIVIRANO,
-            StatusUgovora.ISTEKAO,
-        ]:
-            await db.property_units.update_one(
-                {"id": unit_id},
-                {"$set": {"status": PropertyUnitStatus.DOSTUPNO}},
-            )
+    # 3. Status Sync: activating, ending or moving the contract updates the unit
+    async with db.transaction():
+        if overlap_check:
+            await check_contract_overlap(*overlap_check, exclude_contract_id=id)
+        await db.ugovori.update_one({"id": id}, {"$set": mongo_update_data})
+        await publish_contract_change(id, existing, {**existing, **mongo_update_data})
 
     updated = await db.ugovori.find_one({"id": id})
     return parse_from_mongo(updated)
@@ -297,7 +338,9 @@ async def delete_contract(
     if not existing:
         raise HTTPException(status_code=404, detail="Ugovor nije pronađen")
 
-    await db.ugovori.delete_one({"id": id})
+    async with db.transaction():
+        await db.ugovori.delete_one({"id": id})
+        await publish_contract_change(id, existing, None)
     return {"poruka": "Ugovor uspješno obrisan"}
 
 
@@ -317,27 +360,14 @@ async def update_contract_status(
     if not existing:
         raise HTTPException(status_code=404, detail="Ugovor nije pronađen")
 
-    await db.ugovori.update_one(
-        {"id": id}, {"$set": {"status": status_update.novi_status}}
-    )
-
-    # Sync Unit Status if exists
-    if existing.get("property_unit_id"):
-        unit_id = existing["property_unit_id"]
-        if status_update.novi_status == StatusUgovora.AKTIVNO:
-            await db.property_units.update_one(
-                {"id": unit_id},
-                {"$set": {"status": PropertyUnitStatus.IZNAJMLJENO}},
-            )
-        elif status_update.novi_status in [
-            StatusUgovora.RASKINUTO,
-            StatusUgovora.ARHIVIRANO,
-            StatusUgovora.ISTEKAO,
-        ]:
-            await db.property_units.update_one(
-                {"id": unit_id},
-                {"$set": {"status": PropertyUnitStatus.DOSTUPNO}},
-            )
+    # Sync Unit Status through the contract's events, in the same transaction
+    async with db.transaction():
+        await db.ugovori.update_one(
+            {"id": id}, {"$set": {"status": status_update.novi_status}}
+        )
+        await publish_contract_change(
+            id, existing, {**existing, "status": status_update.novi_status}
+        )
 
     updated = await db.ugovori.find_one({"id": id})
     return parse_from_mongo(updated)
@@ -1,44 +1,38 @@
 from typing import Any, Dict
 
 from app.api import deps
-from app.db.instance import db
+from app.db.instance import tenant_kpis
+from app.db.tenant import CURRENT_TENANT_ID
+from app.db.tenant_kpis import KPI_SOURCE_COLLECTIONS
+from app.services.analytics_service import TIMESERIES_COLLECTIONS, get_timeseries
 from fastapi import APIRouter, Depends
 
 router = APIRouter()
 
 
-@router.get("/", dependencies=[Depends(deps.require_scopes("reports:read"))])
+@router.get(
+    "/",
+    dependencies=[
+        Depends(deps.require_scopes("reports:read")),
+        Depends(deps.conditional_etag(*KPI_SOURCE_COLLECTIONS)),
+    ],
+)
 async def get_dashboard_stats(
     current_user: Dict[str, Any] = Depends(deps.get_current_user),
 ):
-    # Count properties
-    total_properties = await db.nekretnine.count_documents()
+    # Counters are maintained incrementally on every write (see app.db.tenant_kpis)
+    kpis = await tenant_kpis.read(CURRENT_TENANT_ID.get())
+    contracts = kpis["contracts"]
+    maintenance = kpis["maintenance"]
 
-    # Count active contracts
-    active_contracts = await db.ugovori.count_documents({"status": "aktivno"})
+    total_properties = kpis["properties"]
+    portfolio_value = kpis["portfolio_value"]
 
-    # Count expiring contracts (e.g. status="na_isteku")
-    expiring_contracts = await db.ugovori.count_documents({"status": "na_isteku"})
-
-    # Count active reminders
-    active_reminders = await db.podsjetnici.count_documents({"zavrseno": False})
-
-    # Calculate monthly income (sum of osnovna_zakupnina from active contracts)
-    pipeline = [
-        {"$match": {"status": "aktivno"}},
-        {"$group": {"_id": None, "total": {"$sum": "$osnovna_zakupnina"}}},
-    ]
-    cursor = db.ugovori.aggregate(pipeline)
-    result = await cursor.to_list(1)
-    monthly_income = result[0]["total"] if result else 0.0
-
-    # Calculate portfolio value (sum of trzisna_vrijednost from properties)
-    pipeline_value = [
-        {"$group": {"_id": None, "total": {"$sum": "$trzisna_vrijednost"}}}
-    ]
-    cursor_value = db.nekretnine.aggregate(pipeline_value)
-    result_value = await cursor_value.to_list(1)
-    portfolio_value = result_value[0]["total"] if result_value else 0.0
+    active = contracts.get("aktivno", {})
+    active_contracts = active.get("count", 0)
+    # Monthly income is the sum of osnovna_zakupnina over active contracts
+    monthly_income = active.get("rent", 0.0)
+    expiring_contracts = contracts.get("na_isteku", {}).get("count", 0)
 
     # Calculate actual annual yield (Strictly Monthly Income * 12 as requested)
     annual_yield = monthly_income * 12
@@ -48,25 +42,29 @@ async def get_dashboard_stats(
     if portfolio_value > 0:
         roi_percentage = (annual_yield / portfolio_value) * 100
 
-    # Count maintenance tasks by status
-    maintenance_new = await db.maintenance_tasks.count_documents({"status": "novi"})
-    maintenance_waiting = await db.maintenance_tasks.count_documents(
-        {"status": "ceka_dobavljaca"}
-    )
-    maintenance_in_progress = await db.maintenance_tasks.count_documents(
-        {"status": "u_tijeku"}
-    )
-
     return {
         "ukupno_nekretnina": total_properties,
         "aktivni_ugovori": active_contracts,
         "ugovori_na_isteku": expiring_contracts,
-        "aktivni_podsjetnici": active_reminders,
+        "aktivni_podsjetnici": kpis["open_reminders"],
         "mjesecni_prihod": monthly_income,
         "ukupna_vrijednost_portfelja": portfolio_value,
         "godisnji_prinos": annual_yield,
         "prinos_postotak": round(roi_percentage, 2),
-        "odrzavanje_novo": maintenance_new,
-        "odrzavanje_ceka_dobavljaca": maintenance_waiting,
-        "odrzavanje_u_tijeku": maintenance_in_progress,
+        "odrzavanje_novo": maintenance.get("novi", 0),
+        "odrzavanje_ceka_dobavljaca": maintenance.get("ceka_dobavljaca", 0),
+        "odrzavanje_u_tijeku": maintenance.get("u_tijeku", 0),
     }
+
+
+@router.get(
+    "/timeseries",
+    dependencies=[
+        Depends(deps.require_scopes("reports:read")),
+        Depends(deps.conditional_etag(*TIMESERIES_COLLECTIONS)),
+    ],
+)
+async def get_dashboard_timeseries(
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    return await get_timeseries()
@@ -0,0 +1,143 @@
+from typing import Any, Dict, Optional
+
+from app.api import deps
+from app.core.security import password_hash_pool
+from app.core.tracing import tracer
+from app.db.profiler import profiler
+from app.services.contract_status_service import fix_orphaned_rented_units
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+
+router = APIRouter()
+
+QUERY_STATS_ORDERING = {
+    "total_ms",
+    "avg_ms",
+    "max_ms",
+    "calls",
+    "rows_fetched",
+    "deep_copies",
+}
+
+
+class QueryStatsSettings(BaseModel):
+    enabled: Optional[bool] = None
+    slow_query_ms: Optional[float] = None
+    reset: bool = False
+
+
+class TracingSettings(BaseModel):
+    enabled: Optional[bool] = None
+    clear: bool = False
+
+
+def _require_admin(current_user: Dict[str, Any]) -> None:
+    if current_user["role"] not in ["admin", "owner"]:
+        raise HTTPException(
+            status_code=403, detail="Nemate ovlasti za dijagnostiku sustava"
+        )
+
+
+@router.get("/query-stats")
+async def get_query_stats(
+    limit: int = 20,
+    order_by: str = "total_ms",
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    _require_admin(current_user)
+    if order_by not in QUERY_STATS_ORDERING:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Nepodržano sortiranje: {order_by}",
+        )
+    return {
+        **profiler.summary(),
+        "top": profiler.top(limit=limit, order_by=order_by),
+    }
+
+
+@router.put("/query-stats")
+async def update_query_stats(
+    settings_in: QueryStatsSettings,
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    _require_admin(current_user)
+    if settings_in.enabled is not None:
+        profiler.enabled = settings_in.enabled
+    if settings_in.slow_query_ms is not None:
+        profiler.slow_query_ms = settings_in.slow_query_ms
+    if settings_in.reset:
+        profiler.reset()
+    return profiler.summary()
+
+
+@router.delete("/query-stats")
+async def reset_query_stats(
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    _require_admin(current_user)
+    profiler.reset()
+    return profiler.summary()
+
+
+@router.get("/traces")
+async def get_traces(
+    limit: int = 50,
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    _require_admin(current_user)
+    traces = tracer.buffer.recent(limit)
+    return {
+        "enabled": tracer.enabled,
+        "traces": [
+            {key: value for key, value in trace.to_dict().items() if key != "spans"}
+            for trace in traces
+        ],
+    }
+
+
+@router.get("/traces/{trace_id}")
+async def get_trace(
+    trace_id: str,
+    format: str = "tree",
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    _require_admin(current_user)
+    trace = tracer.buffer.get(trace_id.replace("-", ""))
+    if not trace:
+        raise HTTPException(status_code=404, detail="Trag nije pronađen")
+    if format == "otlp":
+        return trace.to_otlp()
+    return trace.to_dict()
+
+
+@router.put("/traces")
+async def update_tracing(
+    settings_in: TracingSettings,
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    _require_admin(current_user)
+    if settings_in.enabled is not None:
+        tracer.enabled = settings_in.enabled
+    if settings_in.clear:
+        tracer.buffer.clear()
+    return {"enabled": tracer.enabled}
+
+
+@router.get("/password-hashing")
+async def get_password_hashing_stats(
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    _require_admin(current_user)
+    return password_hash_pool.stats()
+
+
+@router.post("/orphaned-units")
+async def repair_orphaned_units(
+    dry_run: bool = True,
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    """Units marked rented without an active contract; fixed unless ``dry_run``."""
+
+    _require_admin(current_user)
+    return await fix_orphaned_rented_units(dry_run=dry_run)
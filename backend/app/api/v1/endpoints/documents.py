@@ -5,6 +5,7 @@ from pathlib import Path
 from typing import Any, Dict, Optional
 
 from app.api import deps
+from app.core import tracing
 from app.core.config import get_settings
 from app.db.instance import db
 from app.db.utils import parse_from_mongo, prepare_for_mongo
@@ -27,7 +28,13 @@ class DocumentCreate(BaseModel):
     maintenance_task_id: Optional[str] = None
 
 
-@router.get("/", dependencies=[Depends(deps.require_scopes("documents:read"))])
+@router.get(
+    "/",
+    dependencies=[
+        Depends(deps.require_scopes("documents:read")),
+        Depends(deps.conditional_etag("dokumenti")),
+    ],
+)
 async def get_documents(
     skip: int = 0,
     limit: int = 100,
@@ -90,8 +97,9 @@ async def create_document(
         settings.UPLOAD_DIR.mkdir(exist_ok=True)
         dest_path = settings.UPLOAD_DIR / filename
 
-        with dest_path.open("wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        with tracing.span("file.write", path=filename):
+            with dest_path.open("wb") as buffer:
+                shutil.copyfileobj(file.file, buffer)
 
         file_path = str(dest_path)
 
@@ -242,7 +250,9 @@ async def download_document(
         file_path = item.get("file_path")
         print(f"DEBUG: Document {id} file_path: {file_path}")
 
-        if not file_path or not Path(file_path).exists():
+        with tracing.span("file.stat", path=file_path or ""):
+            file_exists = bool(file_path) and Path(file_path).exists()
+        if not file_exists:
             print(f"DEBUG: File path does not exist: {file_path}")
             raise HTTPException(status_code=404, detail="Datoteka nije pronađena")
 
@@ -300,11 +310,12 @@ async def delete_document(
     file_path = item.get("file_path")
     if file_path:
         path = Path(file_path)
-        if path.exists():
-            try:
-                path.unlink()
-            except Exception:
-                pass  # Log error
+        with tracing.span("file.delete", path=file_path):
+            if path.exists():
+                try:
+                    path.unlink()
+                except Exception:
+                    pass  # Log error
 
     await db.dokumenti.delete_one({"id": id})
     return {"poruka": "Dokument uspješno obrisan"}
@@ -0,0 +1,104 @@
+from typing import Any, Dict, List, Optional
+
+from app.api import deps
+from app.services.indexation_service import (
+    DEFAULT_MIN_MONTHS,
+    load_series,
+    month_index,
+    month_label,
+    run_indexation,
+    save_series,
+)
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field, field_validator
+
+router = APIRouter()
+
+
+class IndexPoint(BaseModel):
+    razdoblje: str
+    vrijednost: float = Field(gt=0)
+
+    @field_validator("razdoblje")
+    @classmethod
+    def _month(cls, value: str) -> str:
+        index = month_index(value)
+        if index < 0:
+            raise ValueError("Razdoblje mora biti u obliku GGGG-MM")
+        return month_label(index)
+
+
+class IndexSeriesIn(BaseModel):
+    vrijednosti: List[IndexPoint] = Field(min_length=1)
+
+
+class IndexationRequest(BaseModel):
+    razdoblje: Optional[str] = None
+    ugovor_ids: Optional[List[str]] = None
+    min_mjeseci: int = Field(DEFAULT_MIN_MONTHS, ge=0)
+
+
+@router.get("/indeksi", dependencies=[Depends(deps.require_scopes("leases:read"))])
+async def get_index_series(
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    return [
+        {
+            "naziv": name,
+            "broj_vrijednosti": len(series.months),
+            "od": month_label(int(series.months[0])) if len(series.months) else None,
+            "do": month_label(series.latest) if series.latest is not None else None,
+        }
+        for name, series in sorted((await load_series()).items())
+    ]
+
+
+@router.put("/indeksi/{naziv}")
+async def put_index_series(
+    naziv: str,
+    series_in: IndexSeriesIn,
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    """Replace the values of a price index (e.g. CPI by month)."""
+
+    if current_user["role"] not in ["admin", "owner"]:
+        raise HTTPException(
+            status_code=403, detail="Nemate ovlasti za uređivanje indeksa cijena"
+        )
+    points = {point.razdoblje: point.vrijednost for point in series_in.vrijednosti}
+    return await save_series(
+        naziv,
+        [{"razdoblje": month, "vrijednost": value} for month, value in points.items()],
+    )
+
+
+async def _run(request: IndexationRequest, apply: bool) -> Dict[str, Any]:
+    try:
+        return await run_indexation(
+            razdoblje=request.razdoblje,
+            ugovor_ids=request.ugovor_ids,
+            min_months=request.min_mjeseci,
+            apply=apply,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+
+@router.post("/preview", dependencies=[Depends(deps.require_scopes("leases:read"))])
+async def preview_indexation(
+    request: IndexationRequest,
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    """New rents of indexable active contracts, without saving them."""
+
+    return await _run(request, apply=False)
+
+
+@router.post("/apply", dependencies=[Depends(deps.require_scopes("leases:update"))])
+async def apply_indexation(
+    request: IndexationRequest,
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    """Store the previewed rents with one bulk update."""
+
+    return await _run(request, apply=True)
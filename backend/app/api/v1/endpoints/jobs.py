@@ -0,0 +1,84 @@
+from typing import Any, Dict, Optional
+
+from app.api import deps
+from app.db.instance import job_store
+from app.services.scheduler import scheduler
+from fastapi import APIRouter, Depends, HTTPException, status
+
+router = APIRouter()
+
+
+def _require_admin(current_user: Dict[str, Any]) -> None:
+    if current_user["role"] not in ["admin", "owner"]:
+        raise HTTPException(
+            status_code=403,
+            detail="Nemate ovlasti za upravljanje pozadinskim poslovima",
+        )
+
+
+def _require_job(name: str) -> None:
+    if name not in scheduler.jobs:
+        raise HTTPException(status_code=404, detail="Posao nije pronađen")
+
+
+@router.get("/")
+async def get_jobs(
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    """Registered jobs with their schedule and last outcome."""
+
+    _require_admin(current_user)
+    stored = {row["name"]: row for row in await job_store.list()}
+    return [
+        stored.get(name)
+        or {
+            "name": name,
+            "schedule": job.schedule.expression,
+            "next_run_at": None,
+            "last_run_at": None,
+            "last_status": None,
+            "last_duration_ms": None,
+            "last_error": None,
+            "running": False,
+        }
+        for name, job in sorted(scheduler.jobs.items())
+    ]
+
+
+@router.get("/runs")
+async def get_job_runs(
+    job: Optional[str] = None,
+    limit: int = 50,
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    _require_admin(current_user)
+    if job:
+        _require_job(job)
+    return await job_store.runs(job, limit=max(1, min(limit, 500)))
+
+
+@router.get("/runs/{run_id}")
+async def get_job_run(
+    run_id: str,
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    _require_admin(current_user)
+    run = await job_store.get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Izvršavanje nije pronađeno")
+    return run
+
+
+@router.post("/{name}/run", status_code=status.HTTP_202_ACCEPTED)
+async def trigger_job(
+    name: str,
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    """Start a job now; it runs in the background and is tracked as a run."""
+
+    _require_admin(current_user)
+    _require_job(name)
+    run_id = await scheduler.trigger(name)
+    if run_id is None:
+        raise HTTPException(status_code=409, detail="Posao je već u tijeku")
+    return {"run_id": run_id, "job_name": name, "status": "running"}
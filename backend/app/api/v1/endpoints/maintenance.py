@@ -51,7 +51,13 @@ class CommentCreate(BaseModel):
     autor: Optional[str] = None
 
 
-@router.get("/", dependencies=[Depends(deps.require_scopes("maintenance:read"))])
+@router.get(
+    "/",
+    dependencies=[
+        Depends(deps.require_scopes("maintenance:read")),
+        Depends(deps.conditional_etag("maintenance_tasks")),
+    ],
+)
 async def get_maintenance_tasks(
     skip: int = 0,
     limit: int = 100,
@@ -64,7 +70,7 @@ async def get_maintenance_tasks(
 ):
     query = {}
     if q:
-        query["naziv"] = {"$regex": q, "$options": "i"}
+        query["naziv"] = {"$contains": q, "$options": "i"}
     if prioritet:
         query["prioritet"] = prioritet
     if nekretnina_id:
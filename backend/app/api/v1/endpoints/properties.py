@@ -83,7 +83,10 @@ class PropertyOut(PropertyCreate):
 
 @router.get(
     "/",
-    dependencies=[Depends(deps.require_scopes("properties:read"))],
+    dependencies=[
+        Depends(deps.require_scopes("properties:read")),
+        Depends(deps.conditional_etag("nekretnine")),
+    ],
     response_model=list[PropertyOut],
 )
 async def get_properties(
@@ -21,7 +21,11 @@ class ReminderCreate(BaseModel):
 
 
 @router.get(
-    "/", dependencies=[Depends(deps.require_scopes("documents:read"))]
+    "/",
+    dependencies=[
+        Depends(deps.require_scopes("documents:read")),
+        Depends(deps.conditional_etag("podsjetnici")),
+    ],
 )  # Using documents scope as proxy or need new scope
 async def get_reminders(
     skip: int = 0,
@@ -33,7 +37,13 @@ async def get_reminders(
     return [parse_from_mongo(item) for item in items]
 
 
-@router.get("/aktivni", dependencies=[Depends(deps.require_scopes("documents:read"))])
+@router.get(
+    "/aktivni",
+    dependencies=[
+        Depends(deps.require_scopes("documents:read")),
+        Depends(deps.conditional_etag("podsjetnici")),
+    ],
+)
 async def get_active_reminders(
     current_user: Dict[str, Any] = Depends(deps.get_current_user),
 ):
@@ -1,45 +1,105 @@
-from typing import Any, Dict
+import heapq
+from copy import deepcopy
+from typing import Any, Dict, Optional
 
 from app.api import deps
-from app.db.instance import db
+from app.db.instance import search_index, suggestions
+from app.db.search_index import SEARCH_FIELDS
+from app.db.suggest_trie import MAX_COMPLETIONS
+from app.db.tenant import CURRENT_TENANT_ID
 from app.db.utils import parse_from_mongo
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
 
 router = APIRouter()
 
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+MAX_SUGGESTIONS = MAX_COMPLETIONS
+
+# Field shown as the headline of a ranked hit, per collection
+TITLE_FIELDS = {
+    "nekretnine": ("naziv", "adresa"),
+    "zakupnici": ("naziv_firme", "ime_prezime"),
+    "ugovori": ("interna_oznaka",),
+}
+
+
+def _title(collection: str, document: Dict[str, Any]) -> str:
+    for field in TITLE_FIELDS[collection]:
+        if document.get(field):
+            return str(document[field])
+    return str(document.get("id"))
+
 
 @router.get("/", dependencies=[Depends(deps.require_scopes("properties:read"))])
 async def search(
     q: str,
+    types: Optional[str] = None,
+    limit: int = DEFAULT_LIMIT,
     current_user: Dict[str, Any] = Depends(deps.get_current_user),
 ):
+    """Ranked search across properties, tenants and contracts.
+
+    Query words match the start of words in the indexed fields; only when a
+    type has no such hit are words matched anywhere inside words.
+    ``types`` is a comma separated subset of ``nekretnine,zakupnici,ugovori``;
+    ``limit`` caps the results per type and of the merged ranking.
+    """
+
     if not q:
         return {}
 
-    # Simple regex search across multiple collections
-    regex = {"$regex": q, "$options": "i"}
+    collections = list(SEARCH_FIELDS)
+    if types:
+        collections = [t.strip() for t in types.split(",") if t.strip()]
+        unknown = [t for t in collections if t not in SEARCH_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Nepoznat tip pretrage: {', '.join(unknown)}",
+            )
+    limit = max(1, min(limit, MAX_LIMIT))
 
-    results = {}
-
-    # Search properties
-    prop_cursor = db.nekretnine.find(
-        {"$or": [{"naziv": regex}, {"adresa": regex}, {"katastarska_opcina": regex}]}
+    # Prefix search over the inverted index; case and Croatian diacritics
+    # are folded on both sides, so "sibenik" finds "Šibenik".
+    await search_index.ensure_current()
+    hits = search_index.search(
+        q, tenant_id=CURRENT_TENANT_ID.get(), collections=collections, limit=limit
     )
-    props = await prop_cursor.to_list(10)
-    results["nekretnine"] = [parse_from_mongo(p) for p in props]
 
-    # Search tenants
-    tenant_cursor = db.zakupnici.find(
-        {"$or": [{"naziv_firme": regex}, {"ime_prezime": regex}, {"oib": regex}]}
+    results: Dict[str, Any] = {
+        collection: [parse_from_mongo(deepcopy(hit.document)) for hit in found]
+        for collection, found in hits.items()
+    }
+    # The overall top ``limit`` is always within the per-type top ``limit``s
+    ranked = heapq.nlargest(
+        limit,
+        (hit for found in hits.values() for hit in found),
+        key=lambda hit: hit.score,
     )
-    tenants = await tenant_cursor.to_list(10)
-    results["zakupnici"] = [parse_from_mongo(t) for t in tenants]
+    results["rezultati"] = [
+        {
+            "tip": hit.collection,
+            "id": hit.document_id,
+            "naslov": _title(hit.collection, hit.document),
+            "score": round(hit.score, 3),
+        }
+        for hit in ranked
+    ]
+    return results
 
-    # Search contracts
-    contract_cursor = db.ugovori.find(
-        {"$or": [{"interna_oznaka": regex}, {"napomena": regex}]}
-    )
-    contracts = await contract_cursor.to_list(10)
-    results["ugovori"] = [parse_from_mongo(c) for c in contracts]
 
-    return results
+@router.get("/suggest", dependencies=[Depends(deps.require_scopes("properties:read"))])
+async def suggest(
+    q: str,
+    limit: int = 8,
+    current_user: Dict[str, Any] = Depends(deps.get_current_user),
+):
+    """Typeahead suggestions for tenant names / OIBs, property names and
+    contract numbers, served from a per-tenant prefix trie."""
+
+    tenant_id = CURRENT_TENANT_ID.get()
+    await suggestions.ensure_current(tenant_id)
+    return suggestions.suggest(
+        q, tenant_id=tenant_id, limit=max(1, min(limit, MAX_SUGGESTIONS))
+    )
@@ -40,7 +40,13 @@ class TenantUpdate(BaseModel):
     napomena: Optional[str] = None
 
 
-@router.get("/", dependencies=[Depends(deps.require_scopes("tenants:read"))])
+@router.get(
+    "/",
+    dependencies=[
+        Depends(deps.require_scopes("tenants:read")),
+        Depends(deps.conditional_etag("zakupnici")),
+    ],
+)
 async def get_tenants(
     skip: int = 0,
     limit: int = 100,
@@ -49,11 +55,12 @@ async def get_tenants(
 ):
     query = {}
     if search:
-        regex = {"$regex": search, "$options": "i"}
+        # Literal substring match; user input is never compiled as a regex
+        contains = {"$contains": search, "$options": "i"}
         query["$or"] = [
-            {"naziv_firme": regex},
-            {"kontakt_email": regex},
-            {"oib": regex},
+            {"naziv_firme": contains},
+            {"kontakt_email": contains},
+            {"oib": contains},
         ]
 
     cursor = db.zakupnici.find(query).sort("created_at", -1)
@@ -20,7 +20,13 @@ class PropertyUnitUpdate(BaseModel):
     napomena: Optional[str] = None
 
 
-@router.get("/", dependencies=[Depends(deps.require_scopes("properties:read"))])
+@router.get(
+    "/",
+    dependencies=[
+        Depends(deps.require_scopes("properties:read")),
+        Depends(deps.conditional_etag("property_units")),
+    ],
+)
 async def get_units(
     skip: int = 0,
     limit: int = 100,
@@ -2,8 +2,8 @@ from typing import Any, Dict, List
 
 from app.api import deps
 from app.core.roles import resolve_membership_role, resolve_role_scopes, scope_matches
-from app.core.security import hash_password
-from app.db.instance import db
+from app.core.security import hash_password_async
+from app.db.instance import db, refresh_tokens
 from app.db.utils import parse_from_mongo, prepare_for_mongo
 from app.models.domain import User, UserMembershipDisplay, UserPublic
 from fastapi import APIRouter, Depends, HTTPException, status
@@ -50,7 +50,7 @@ async def create_user(
         full_name=user_in.full_name,
         role=user_in.role,
         scopes=resolve_role_scopes(user_in.role, user_in.scopes),
-        password_hash=hash_password(default_password),
+        password_hash=await hash_password_async(default_password),
     )
 
     user_data = user.model_dump()
@@ -183,5 +183,6 @@ async def delete_user(
 
     # Delete user
     await db.users.delete_one({"id": id})
+    await refresh_tokens.revoke_user(id)
 
     return {"message": "Korisnik uspješno obrisan"}
@@ -49,7 +49,21 @@ class Settings:
     # Auth
     AUTH_SECRET: str = os.environ.get("AUTH_SECRET", "dev-secret-key-change-in-prod")
     AUTH_ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8  # 8 days
+    # Access tokens are authorised from their claims, so keep them short-lived
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = int(
+        os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", "15")
+    )
+    REFRESH_TOKEN_EXPIRE_DAYS: int = int(
+        os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS", "30")
+    )
+    # 0 sizes the bcrypt pool from the CPU count (capped at 4)
+    PASSWORD_HASH_WORKERS: int = int(os.environ.get("PASSWORD_HASH_WORKERS", "0"))
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(
+        os.environ.get("PRINCIPAL_CACHE_TTL_SECONDS", "30")
+    )
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = int(
+        os.environ.get("PRINCIPAL_CACHE_MAX_ENTRIES", "10000")
+    )
 
     # Database
     DB_SETTINGS: DatabaseSettings = DatabaseSettings(
@@ -75,6 +89,39 @@ class Settings:
         os.environ.get("SEED_ADMIN_ON_STARTUP", "false").lower() == "true"
     )
 
+    # Diagnostics
+    QUERY_PROFILER_ENABLED: bool = (
+        os.environ.get("QUERY_PROFILER_ENABLED", "false").lower() == "true"
+    )
+    SLOW_QUERY_MS: float = float(os.environ.get("SLOW_QUERY_MS", "200"))
+    # CPU budget for evaluating one $regex query over a collection (0 = none)
+    REGEX_QUERY_BUDGET_MS: float = float(os.environ.get("REGEX_QUERY_BUDGET_MS", "250"))
+    TRACING_ENABLED: bool = os.environ.get("TRACING_ENABLED", "false").lower() == "true"
+    TRACING_EXPORTER: str = os.environ.get("TRACING_EXPORTER", "memory").lower()
+    TRACING_FILE_PATH: str = os.environ.get(
+        "TRACING_FILE_PATH", str(ROOT_DIR / "traces.jsonl")
+    )
+    TRACING_BUFFER_SIZE: int = int(os.environ.get("TRACING_BUFFER_SIZE", "200"))
+
+    # Background jobs (cron expressions are evaluated in UTC)
+    SCHEDULER_ENABLED: bool = (
+        os.environ.get("SCHEDULER_ENABLED", "true").lower() == "true"
+    )
+    SCHEDULER_POLL_SECONDS: float = float(
+        os.environ.get("SCHEDULER_POLL_SECONDS", "30")
+    )
+    # A worker that dies mid-job frees the job again after this long
+    SCHEDULER_LEASE_SECONDS: int = int(os.environ.get("SCHEDULER_LEASE_SECONDS", "900"))
+    CONTRACT_REMINDERS_CRON: str = os.environ.get(
+        "CONTRACT_REMINDERS_CRON", "0 2 * * *"
+    )
+    CONTRACT_STATUS_SYNC_CRON: str = os.environ.get(
+        "CONTRACT_STATUS_SYNC_CRON", "15 2 * * *"
+    )
+    TENANT_KPIS_REBUILD_CRON: str = os.environ.get(
+        "TENANT_KPIS_REBUILD_CRON", "30 3 * * 0"
+    )
+
     # Initial Admin
     INITIAL_ADMIN_EMAIL: Optional[str] = os.environ.get("INITIAL_ADMIN_EMAIL")
     INITIAL_ADMIN_PASSWORD: Optional[str] = os.environ.get("INITIAL_ADMIN_PASSWORD")
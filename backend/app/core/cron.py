@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import FrozenSet, Tuple
+
+
+class CronError(ValueError):
+    """Raised for a malformed cron expression."""
+
+
+# (name, lowest, highest) of the five cron fields
+_FIELDS: Tuple[Tuple[str, int, int], ...] = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    # 7 is accepted as an alias for Sunday
+    ("weekday", 0, 7),
+)
+
+# Occurrences are searched at most this far ahead ("0 0 30 2 *" never fires)
+_HORIZON = timedelta(days=5 * 366)
+
+
+def _parse_field(text: str, name: str, low: int, high: int) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            if not step_text.isdigit() or int(step_text) < 1:
+                raise CronError(f"Invalid step in {name}: {text!r}")
+            step = int(step_text)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            first, last = part.split("-", 1)
+            if not (first.isdigit() and last.isdigit()):
+                raise CronError(f"Invalid range in {name}: {text!r}")
+            start, end = int(first), int(last)
+        elif part.isdigit():
+            start = int(part)
+            end = high if step > 1 else start
+        else:
+            raise CronError(f"Invalid {name}: {text!r}")
+        if not (low <= start <= high and low <= end <= high and start <= end):
+            raise CronError(f"{name} out of range: {text!r}")
+        values.update(range(start, end + 1, step))
+    if name == "weekday" and 7 in values:
+        values = (values - {7}) | {0}
+    return frozenset(values)
+
+
+@dataclass(frozen=True)
+class CronSchedule:
+    """Standard five-field cron schedule ("minute hour day month weekday").
+
+    Fields accept ``*``, numbers, ``a-b`` ranges, ``,`` lists and ``/n``
+    steps. As in cron, when both day of month and weekday are restricted a
+    time matches if either does. Weekdays count from Sunday = 0.
+    """
+
+    expression: str
+    minutes: FrozenSet[int]
+    hours: FrozenSet[int]
+    days: FrozenSet[int]
+    months: FrozenSet[int]
+    weekdays: FrozenSet[int]
+    any_day: bool
+    any_weekday: bool
+
+    @classmethod
+    def parse(cls, expression: str) -> CronSchedule:
+        parts = expression.split()
+        if len(parts) != len(_FIELDS):
+            raise CronError(f"Expected 5 cron fields, got {expression!r}")
+        values = [
+            _parse_field(part, name, low, high)
+            for part, (name, low, high) in zip(parts, _FIELDS)
+        ]
+        return cls(
+            expression,
+            *values,
+            any_day=parts[2] == "*",
+            any_weekday=parts[4] == "*",
+        )
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        # Python counts Monday = 0, cron Sunday = 0
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """First matching minute strictly after ``moment``."""
+
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + _HORIZON
+        while candidate <= limit:
+            if candidate.month not in self.months:
+                year = candidate.year + candidate.month // 12
+                candidate = candidate.replace(
+                    year=year, month=candidate.month % 12 + 1, day=1, hour=0, minute=0
+                )
+            elif not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+            elif candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise CronError(f"Schedule {self.expression!r} never fires")
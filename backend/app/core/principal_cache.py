@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+PrincipalKey = Tuple[str, Optional[str]]
+
+# Collections whose writes can change what a cached principal is allowed to do.
+PRINCIPAL_SOURCE_COLLECTIONS = {"users": "id", "tenant_memberships": "user_id"}
+
+
+@dataclass
+class _Entry:
+    principal: Dict[str, Any]
+    user_id: str
+    expires_at: float
+
+
+class PrincipalCache:
+    """Short-lived cache of authenticated principals.
+
+    Entries are keyed by ``(sha256(token), X-Tenant-Id)`` and expire after
+    ``ttl_seconds`` or when the token itself expires, whichever comes first.
+    Writes to ``users`` or ``tenant_memberships`` evict every entry of the
+    affected user (see :meth:`on_write`).
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 10_000) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[PrincipalKey, _Entry]" = OrderedDict()
+        self._by_user: Dict[str, Set[PrincipalKey]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_for(token: str, tenant_id: Optional[str]) -> PrincipalKey:
+        digest = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        return digest, tenant_id
+
+    def get(self, key: PrincipalKey) -> Optional[Dict[str, Any]]:
+        if self.ttl_seconds <= 0:
+            return None
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.time():
+            self._discard(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        principal = dict(entry.principal)
+        principal["scopes"] = list(entry.principal.get("scopes", []))
+        return principal
+
+    def put(
+        self,
+        key: PrincipalKey,
+        principal: Dict[str, Any],
+        token_expires_at: Optional[float] = None,
+    ) -> None:
+        if self.ttl_seconds <= 0 or not principal.get("id"):
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, float(token_expires_at))
+        user_id = principal["id"]
+        self._discard(key)
+        stored = {**principal, "scopes": list(principal.get("scopes", []))}
+        self._entries[key] = _Entry(stored, user_id, expires_at)
+        self._by_user.setdefault(user_id, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._discard(oldest)
+
+    def invalidate_user(self, user_id: str) -> None:
+        for key in list(self._by_user.get(user_id, ())):
+            self._discard(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._by_user.clear()
+
+    async def on_write(self, events: List[Any]) -> None:
+        """Document store write listener evicting principals of changed users."""
+
+        for event in events:
+            field = PRINCIPAL_SOURCE_COLLECTIONS.get(event.collection)
+            if field is None:
+                continue
+            for document in (event.before, event.after):
+                if document and document.get(field):
+                    self.invalidate_user(document[field])
+
+    def _discard(self, key: PrincipalKey) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._by_user.get(entry.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                self._by_user.pop(entry.user_id, None)
+
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+)
@@ -1,4 +1,6 @@
-from typing import Dict, List, Optional
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Tuple
 
 from app.models.domain import TenantMembershipRole
 
@@ -85,33 +87,83 @@ def resolve_membership_role(user_role: Optional[str]) -> TenantMembershipRole:
     return ROLE_TENANT_MEMBERSHIP_MAP.get(normalised, TenantMembershipRole.MEMBER)
 
 
-def resolve_role_scopes(
-    role: str, explicit_scopes: Optional[List[str]] = None
-) -> List[str]:
+@dataclass(frozen=True)
+class CompiledScopes:
+    """Granted scopes pre-indexed as ``resource -> actions`` for O(1) checks.
+
+    ``*`` grants everything, ``resource:*`` grants every action on the
+    resource, and any action on a resource implies ``resource:read``.
+    """
+
+    scopes: Tuple[str, ...]
+    allow_all: bool
+    exact: FrozenSet[str]
+    actions: Mapping[str, FrozenSet[str]]
+
+    def allows(self, required: str) -> bool:
+        if self.allow_all or required in self.exact:
+            return True
+        if ":" not in required:
+            return False
+        resource, action = required.split(":", 1)
+        granted = self.actions.get(resource)
+        if not granted:
+            return False
+        if "*" in granted:
+            return True
+        # allow hierarchical permission where write implies read
+        return action == "read" and any(perm != action for perm in granted)
+
+    def union(self, extra: Iterable[str]) -> "CompiledScopes":
+        extra = [scope for scope in extra if scope not in self.exact]
+        if not extra:
+            return self
+        return compile_scopes(self.scopes + tuple(extra))
+
+
+@lru_cache(maxsize=1024)
+def _compile(scopes: Tuple[str, ...]) -> CompiledScopes:
+    actions: Dict[str, set] = {}
+    for scope in scopes:
+        if ":" in scope:
+            resource, action = scope.split(":", 1)
+            actions.setdefault(resource, set()).add(action)
+    return CompiledScopes(
+        scopes=scopes,
+        allow_all="*" in scopes,
+        exact=frozenset(scopes),
+        actions={resource: frozenset(acts) for resource, acts in actions.items()},
+    )
+
+
+def compile_scopes(scopes: Iterable[str]) -> CompiledScopes:
+    if isinstance(scopes, CompiledScopes):
+        return scopes
+    return _compile(tuple(scopes))
+
+
+@lru_cache(maxsize=1024)
+def _resolve_scopes(role: str, explicit_scopes: Tuple[str, ...]) -> Tuple[str, ...]:
     base_scopes = ROLE_SCOPE_MAP.get(role, [])
-    if explicit_scopes:
-        combined = list(dict.fromkeys(base_scopes + explicit_scopes))
-    else:
-        combined = list(dict.fromkeys(base_scopes))
+    combined = tuple(dict.fromkeys(list(base_scopes) + list(explicit_scopes)))
     if not combined:
-        return ["*"] if role == DEFAULT_ROLE else []
+        return ("*",) if role == DEFAULT_ROLE else ()
     return combined
 
 
-def scope_matches(granted: List[str], required: str) -> bool:
-    if "*" in granted:
-        return True
-    if required in granted:
-        return True
-    if ":" not in required:
-        return False
-    resource, action = required.split(":", 1)
-    wildcard = f"{resource}:*"
-    if wildcard in granted:
-        return True
-    # allow hierarchical permission where write implies read
-    if action == "read":
-        for perm in granted:
-            if perm.startswith(f"{resource}:") and perm != required:
-                return True
-    return False
+def resolve_role_scopes(
+    role: str, explicit_scopes: Optional[List[str]] = None
+) -> List[str]:
+    return list(_resolve_scopes(role, tuple(explicit_scopes or ())))
+
+
+def resolve_compiled_scopes(
+    role: str, explicit_scopes: Optional[List[str]] = None
+) -> CompiledScopes:
+    """Memoised per ``(role, scopes)``; principals share the same instance."""
+
+    return _compile(_resolve_scopes(role, tuple(explicit_scopes or ())))
+
+
+def scope_matches(granted: Iterable[str], required: str) -> bool:
+    return compile_scopes(granted).allows(required)
@@ -1,5 +1,11 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, TypeVar
 
 from app.core.config import get_settings
 from jose import jwt
@@ -9,6 +15,8 @@ settings = get_settings()
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+T = TypeVar("T")
+
 
 def hash_password(password: str) -> str:
     if not password:
@@ -25,6 +33,112 @@ def verify_password(plain_password: str, password_hash: str) -> bool:
         return False
 
 
+class PasswordHashPool:
+    """Bounded thread pool for bcrypt work.
+
+    bcrypt is CPU bound and takes 100-300 ms per call, so running it on the
+    event loop stalls every other request on the worker. Calls submitted here
+    wait in the executor queue once all ``max_workers`` threads are busy; the
+    queue depth and wait/run times are tracked for diagnostics.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.reset_metrics()
+
+    def reset_metrics(self) -> None:
+        with self._lock:
+            self.queued = 0
+            self.running = 0
+            self.max_queued = 0
+            self.completed = 0
+            self.failed = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self.total_run_ms = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="password-hash"
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        submitted = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+
+        def _job() -> T:
+            started = time.perf_counter()
+            wait_ms = (started - submitted) * 1000
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+                self.total_wait_ms += wait_ms
+                self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            ok = False
+            try:
+                result = func(*args)
+                ok = True
+                return result
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.total_run_ms += (time.perf_counter() - started) * 1000
+                    if ok:
+                        self.completed += 1
+                    else:
+                        self.failed += 1
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_executor(), _job)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            finished = self.completed + self.failed
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "max_queued": self.max_queued,
+                "completed": self.completed,
+                "failed": self.failed,
+                "avg_wait_ms": (
+                    round(self.total_wait_ms / finished, 3) if finished else 0.0
+                ),
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "avg_run_ms": (
+                    round(self.total_run_ms / finished, 3) if finished else 0.0
+                ),
+            }
+
+    def shutdown(self) -> None:
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hash_pool = PasswordHashPool(
+    settings.PASSWORD_HASH_WORKERS or min(4, os.cpu_count() or 1)
+)
+
+
+async def hash_password_async(password: str) -> str:
+    if not password:
+        raise ValueError("Password must not be empty")
+    return await password_hash_pool.run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, password_hash: str) -> bool:
+    if not password_hash:
+        return False
+    return await password_hash_pool.run(verify_password, plain_password, password_hash)
+
+
 def create_access_token(
     data: Dict[str, Any], expires_delta: Optional[timedelta] = None
 ) -> str:
@@ -34,6 +148,7 @@ def create_access_token(
         expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
     to_encode.update({"exp": expire, "iat": now})
+    to_encode.setdefault("jti", uuid.uuid4().hex)
     return jwt.encode(
         to_encode, settings.AUTH_SECRET, algorithm=settings.AUTH_ALGORITHM
     )
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Writes to these collections make the claims of already issued tokens stale.
+CLAIM_SOURCE_COLLECTIONS = {"users": "id", "tenant_memberships": "user_id"}
+
+
+def _to_utc(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def _to_timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class TokenRevocationList:
+    """Revocation state for short-lived access tokens.
+
+    Access tokens are authorised from their claims alone, so two things are
+    tracked besides the users themselves:
+
+    * revoked token ids (``jti``) from logouts, kept until the token expires;
+    * per-user "claims changed" timestamps. Tokens issued before the change
+      are re-validated against the database instead of trusting their claims.
+
+    Both are kept in memory and, once a store is attached (see
+    :class:`app.db.token_revocations.RevocationStore`), in the database so
+    that every worker sees them. :meth:`load` pulls the stored state of a
+    token before it is checked; callers only do that when the principal
+    cache misses, so other workers notice a logout or a role change within
+    the principal cache TTL.
+    """
+
+    def __init__(self, token_lifetime_seconds: float) -> None:
+        self.token_lifetime_seconds = token_lifetime_seconds
+        self._revoked: Dict[str, float] = {}
+        self._changed: Dict[str, float] = {}
+        self._store: Optional[Any] = None
+
+    def attach(self, store: Any) -> None:
+        self._store = store
+
+    async def revoke(
+        self, jti: Optional[str], expires_at: Optional[float] = None
+    ) -> None:
+        if not jti:
+            return
+        now = time.time()
+        self._revoked[jti] = (
+            float(expires_at)
+            if expires_at is not None
+            else now + self.token_lifetime_seconds
+        )
+        self._prune(now)
+        if self._store is not None:
+            await self._store.revoke(jti, _to_utc(self._revoked[jti]))
+
+    async def load(self, jti: Optional[str], user_id: str) -> None:
+        """Merge the stored revocation state of one token into memory."""
+
+        if self._store is None:
+            return
+        expires_at, changed_at = await self._store.lookup(jti, user_id)
+        if jti and expires_at is not None:
+            self._revoked[jti] = _to_timestamp(expires_at)
+        if changed_at is not None:
+            self._changed[user_id] = max(
+                self._changed.get(user_id, 0.0), _to_timestamp(changed_at)
+            )
+
+    def is_revoked(self, jti: Optional[str]) -> bool:
+        if not jti:
+            return False
+        expires_at = self._revoked.get(jti)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            self._revoked.pop(jti, None)
+            return False
+        return True
+
+    def mark_user_changed(self, user_id: str) -> None:
+        now = time.time()
+        self._changed[user_id] = now
+        self._prune(now)
+
+    def claims_are_stale(self, user_id: str, issued_at: Optional[float]) -> bool:
+        changed_at = self._changed.get(user_id)
+        if changed_at is None:
+            return False
+        if issued_at is None:
+            return True
+        # ``iat`` has second resolution and claims are read just before the
+        # token is signed, so allow one second of slack in the safe direction.
+        return float(issued_at) <= changed_at + 1
+
+    async def clear(self) -> None:
+        self._revoked.clear()
+        self._changed.clear()
+        if self._store is not None:
+            await self._store.clear()
+
+    async def on_write(self, events: List[Any]) -> None:
+        """Document store write listener marking claims of changed users stale."""
+
+        changed = set()
+        for event in events:
+            field = CLAIM_SOURCE_COLLECTIONS.get(event.collection)
+            if field is None:
+                continue
+            for document in (event.before, event.after):
+                if document and document.get(field):
+                    changed.add(document[field])
+        for user_id in changed:
+            self.mark_user_changed(user_id)
+        if changed and self._store is not None:
+            await self._store.mark_changed(changed, _to_utc(time.time()))
+
+    def _prune(self, now: float) -> None:
+        self._revoked = {
+            jti: expires_at
+            for jti, expires_at in self._revoked.items()
+            if expires_at > now
+        }
+        horizon = now - self.token_lifetime_seconds
+        self._changed = {
+            user_id: changed_at
+            for user_id, changed_at in self._changed.items()
+            if changed_at > horizon
+        }
+
+
+revocation_list = TokenRevocationList(
+    token_lifetime_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
@@ -0,0 +1,324 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, List, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str]
+    name: str
+    start_ns: int
+    end_ns: Optional[int] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        if self.end_ns is None:
+            return 0.0
+        return (self.end_ns - self.start_ns) / 1_000_000
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        otlp: Dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [
+                {"key": key, "value": _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            "status": {"code": 2, "message": self.error} if self.error else {},
+        }
+        if self.parent_id:
+            otlp["parentSpanId"] = self.parent_id
+        return otlp
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    spans: List[Span] = field(default_factory=list)
+
+    @property
+    def root(self) -> Optional[Span]:
+        return self.spans[0] if self.spans else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        root = self.root
+        return {
+            "trace_id": self.trace_id,
+            "name": root.name if root else None,
+            "duration_ms": round(root.duration_ms, 3) if root else 0.0,
+            "span_count": len(self.spans),
+            "spans": [span.to_dict() for span in self.spans],
+        }
+
+    def to_otlp(self) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {
+                        "attributes": [
+                            {
+                                "key": "service.name",
+                                "value": {"stringValue": settings.PROJECT_NAME},
+                            }
+                        ]
+                    },
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "app.core.tracing"},
+                            "spans": [span.to_otlp() for span in self.spans],
+                        }
+                    ],
+                }
+            ]
+        }
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class RingBufferExporter:
+    """Keeps the most recent traces in memory for local inspection."""
+
+    def __init__(self, size: int = 200) -> None:
+        self._traces: Deque[Trace] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def export(self, trace: Trace) -> None:
+        with self._lock:
+            self._traces.append(trace)
+
+    def recent(self, limit: int = 50) -> List[Trace]:
+        with self._lock:
+            traces = list(self._traces)
+        return list(reversed(traces))[:limit]
+
+    def get(self, trace_id: str) -> Optional[Trace]:
+        with self._lock:
+            for trace in self._traces:
+                if trace.trace_id == trace_id:
+                    return trace
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._traces.clear()
+
+
+class JsonFileExporter:
+    """Appends one OTLP/JSON ``ExportTraceServiceRequest`` per line.
+
+    Traces are exported from the event loop, so :meth:`export` only queues
+    them; a daemon thread serialises and writes whatever is queued in one
+    go. When the queue is full (the disk cannot keep up) traces are dropped
+    rather than blocking requests.
+    """
+
+    def __init__(self, path: Path, queue_size: int = 10_000) -> None:
+        self._path = path
+        self._queue: "queue.Queue[Optional[Trace]]" = queue.Queue(queue_size)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+
+    def export(self, trace: Trace) -> None:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self) -> None:
+        """Block until every queued trace has been written."""
+
+        self._queue.join()
+
+    def close(self) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="trace-file-exporter", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            traces = [trace for trace in batch if trace is not None]
+            try:
+                self._write(traces)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(traces) < len(batch):
+                return
+
+    def _write(self, traces: List[Trace]) -> None:
+        if not traces:
+            return
+        lines = [json.dumps(trace.to_otlp(), default=str) + "\n" for trace in traces]
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            with self._path.open("a", encoding="utf-8") as handle:
+                handle.writelines(lines)
+        except OSError as exc:
+            logger.error(f"Failed to export {len(traces)} traces: {exc}")
+
+
+class Tracer:
+    def __init__(
+        self,
+        enabled: bool = False,
+        buffer: Optional[RingBufferExporter] = None,
+        file_exporter: Optional[JsonFileExporter] = None,
+    ) -> None:
+        self.enabled = enabled
+        self.buffer = buffer or RingBufferExporter()
+        self.file_exporter = file_exporter
+
+    def export(self, trace: Trace) -> None:
+        self.buffer.export(trace)
+        if self.file_exporter is not None:
+            self.file_exporter.export(trace)
+
+    def close(self) -> None:
+        if self.file_exporter is not None:
+            self.file_exporter.close()
+
+
+_CURRENT_TRACE: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+_CURRENT_SPAN: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def _build_tracer() -> Tracer:
+    file_exporter = None
+    if settings.TRACING_EXPORTER == "file":
+        file_exporter = JsonFileExporter(Path(settings.TRACING_FILE_PATH))
+    return Tracer(
+        enabled=settings.TRACING_ENABLED,
+        buffer=RingBufferExporter(settings.TRACING_BUFFER_SIZE),
+        file_exporter=file_exporter,
+    )
+
+
+tracer = _build_tracer()
+
+
+def _new_span_id() -> str:
+    return os.urandom(8).hex()
+
+
+def current_trace_id() -> Optional[str]:
+    trace = _CURRENT_TRACE.get()
+    return trace.trace_id if trace else None
+
+
+@contextmanager
+def start_trace(trace_id: Optional[str], name: str, **attributes: Any) -> Iterator:
+    """Open the root span of a trace; the trace is exported when it closes.
+
+    ``trace_id`` accepts the activity logger's ``request_id`` (a UUID) and is
+    normalised to the 32 hex characters OTLP expects.
+    """
+
+    if not tracer.enabled:
+        yield None
+        return
+    normalised = uuid.UUID(trace_id).hex if trace_id else uuid.uuid4().hex
+    trace = Trace(trace_id=normalised)
+    trace_token = _CURRENT_TRACE.set(trace)
+    try:
+        with span(name, **attributes) as root:
+            yield root
+    finally:
+        _CURRENT_TRACE.reset(trace_token)
+        tracer.export(trace)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Record a nested span inside the current trace (no-op outside a trace)."""
+
+    trace = _CURRENT_TRACE.get()
+    if trace is None or not tracer.enabled:
+        yield None
+        return
+    parent = _CURRENT_SPAN.get()
+    current = Span(
+        trace_id=trace.trace_id,
+        span_id=_new_span_id(),
+        parent_id=parent.span_id if parent else None,
+        name=name,
+        start_ns=time.time_ns(),
+        attributes=attributes,
+    )
+    trace.spans.append(current)
+    token = _CURRENT_SPAN.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        current.end_ns = time.time_ns()
+        _CURRENT_SPAN.reset(token)
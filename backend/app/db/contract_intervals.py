@@ -0,0 +1,292 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.db.document_store import BulkWriter, field
+
+logger = logging.getLogger(__name__)
+
+# Documents without a tenant_id are visible to every tenant (see app.db.tenant)
+GLOBAL_TENANT_KEY = "__global__"
+
+# Only these statuses block a unit for their period
+BLOCKING_STATUSES = ("aktivno", "na_isteku")
+
+
+@dataclass(frozen=True)
+class ContractInterval:
+    """A blocking contract's period; dates are ISO strings (sort as dates)."""
+
+    start: str
+    end: str
+    contract_id: str
+    label: Optional[str] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.contract_id,
+            "interna_oznaka": self.label,
+            "datum_pocetka": self.start,
+            "datum_zavrsetka": self.end,
+        }
+
+
+def _iso(value: Any) -> Optional[str]:
+    if not value:
+        return None
+    if hasattr(value, "isoformat"):
+        value = value.isoformat()
+    return str(value)[:10]
+
+
+def _interval(document: Dict[str, Any]) -> Optional[ContractInterval]:
+    status = document.get("status")
+    if str(getattr(status, "value", status)) not in BLOCKING_STATUSES:
+        return None
+    start, end = _iso(document.get("datum_pocetka")), _iso(
+        document.get("datum_zavrsetka")
+    )
+    if not start or not end or not document.get("property_unit_id"):
+        return None
+    return ContractInterval(
+        start, end, str(document["id"]), document.get("interna_oznaka")
+    )
+
+
+class UnitIntervals:
+    """Blocking intervals of one unit, sorted by start.
+
+    ``_top[i]`` holds the two intervals with the latest end among the first
+    ``i + 1``; an overlap query is then a bisect on the starts plus a constant
+    check, even when one contract (the one being edited) must be ignored.
+    """
+
+    def __init__(self) -> None:
+        self.by_id: Dict[str, ContractInterval] = {}
+        self._sorted: List[ContractInterval] = []
+        self._starts: List[str] = []
+        self._top: List[Tuple[ContractInterval, ...]] = []
+        self._dirty = False
+
+    def put(self, interval: ContractInterval) -> None:
+        self.by_id[interval.contract_id] = interval
+        self._dirty = True
+
+    def discard(self, contract_id: str) -> None:
+        if self.by_id.pop(contract_id, None) is not None:
+            self._dirty = True
+
+    def _refresh(self) -> None:
+        self._sorted = sorted(self.by_id.values(), key=lambda i: (i.start, i.end))
+        self._starts = [interval.start for interval in self._sorted]
+        self._top = []
+        best: Tuple[ContractInterval, ...] = ()
+        for interval in self._sorted:
+            best = tuple(
+                sorted(best + (interval,), key=lambda i: i.end, reverse=True)[:2]
+            )
+            self._top.append(best)
+        self._dirty = False
+
+    def find_overlap(
+        self, start: str, end: str, exclude_contract_id: Optional[str] = None
+    ) -> Optional[ContractInterval]:
+        """A stored interval intersecting ``[start, end]`` (inclusive), if any."""
+
+        if self._dirty:
+            self._refresh()
+        # Intervals starting after ``end`` cannot overlap
+        last = bisect_right(self._starts, end) - 1
+        if last < 0:
+            return None
+        for candidate in self._top[last]:
+            if candidate.contract_id == exclude_contract_id:
+                continue
+            return candidate if candidate.end >= start else None
+        return None
+
+    def overlapping_pairs(self) -> List[Tuple[ContractInterval, ContractInterval]]:
+        """Every pair of stored intervals that intersect, in one sweep."""
+
+        if self._dirty:
+            self._refresh()
+        pairs = []
+        open_intervals: List[ContractInterval] = []
+        for interval in self._sorted:
+            open_intervals = [i for i in open_intervals if i.end >= interval.start]
+            pairs.extend((earlier, interval) for earlier in open_intervals)
+            open_intervals.append(interval)
+        return pairs
+
+
+class ContractIntervalIndex:
+    """Per-unit interval index of blocking contracts.
+
+    Built lazily from ``ugovori`` and kept current by a document store write
+    listener; :meth:`ensure_current` also rebuilds it after writes made by
+    other workers. It serves reports and previews, while writes check the
+    database itself (see :func:`stored_unit_intervals`). Intervals are
+    partitioned by tenant so scoped lookups only see the caller's (and
+    global) contracts.
+    """
+
+    def __init__(self, database: Any) -> None:
+        self._database = database
+        # collection_version("ugovori") the index was built from
+        self._version: Optional[str] = None
+        # unit id -> tenant key -> intervals
+        self._units: Dict[str, Dict[str, UnitIntervals]] = {}
+        # contract id -> (unit id, tenant key) it is indexed under
+        self._owners: Dict[str, Tuple[str, str]] = {}
+        self._ready = False
+        self._build: Optional[asyncio.Future] = None
+        self._pending: Optional[List[Any]] = None
+
+    def _remove(self, contract_id: str) -> None:
+        owner = self._owners.pop(contract_id, None)
+        if owner is None:
+            return
+        unit_id, tenant_key = owner
+        self._units[unit_id][tenant_key].discard(contract_id)
+
+    def _add(self, document: Dict[str, Any]) -> None:
+        if not document.get("id"):
+            return
+        self._remove(str(document["id"]))
+        interval = _interval(document)
+        if interval is None:
+            return
+        unit_id = str(document["property_unit_id"])
+        tenant_key = document.get("tenant_id") or GLOBAL_TENANT_KEY
+        partitions = self._units.setdefault(unit_id, {})
+        partitions.setdefault(tenant_key, UnitIntervals()).put(interval)
+        self._owners[interval.contract_id] = (unit_id, tenant_key)
+
+    def _apply(self, events: List[Any]) -> None:
+        for event in events:
+            if event.collection != "ugovori":
+                continue
+            if event.after is not None:
+                self._add(event.after)
+            elif event.before is not None and event.before.get("id"):
+                self._remove(str(event.before["id"]))
+
+    async def on_write(self, events: List[Any]) -> None:
+        """Document store write listener."""
+
+        if self._pending is not None:
+            self._pending.extend(events)
+        elif self._ready:
+            self._apply(events)
+
+    async def ensure_built(self) -> None:
+        if self._ready:
+            return
+        # Concurrent first callers share a single build
+        if self._build is None or self._build.done():
+            self._build = asyncio.ensure_future(self.rebuild())
+        await asyncio.shield(self._build)
+
+    async def ensure_current(self) -> None:
+        """Build the index, or rebuild it when ``ugovori`` changed in the
+        database since it was built (e.g. through another worker)."""
+
+        version = await self._database.collection_version("ugovori")
+        if self._ready and version == self._version:
+            return
+        if self._build is None or self._build.done():
+            self._build = asyncio.ensure_future(self.rebuild(version))
+        await asyncio.shield(self._build)
+
+    async def rebuild(self, version: Optional[str] = None) -> None:
+        self._pending = []
+        try:
+            self._units = {}
+            self._owners = {}
+            for document in await self._database["ugovori"].find({}).to_list(None):
+                self._add(document)
+            self._apply(self._pending)
+            self._version = version
+            self._ready = True
+        finally:
+            self._pending = None
+        logger.info("Contract interval index built for %s units", len(self._units))
+
+    def _visible(self, unit_id: str, tenant_id: Optional[str]) -> List[UnitIntervals]:
+        partitions = self._units.get(unit_id, {})
+        if not tenant_id:
+            return list(partitions.values())
+        return [
+            partitions[key]
+            for key in (tenant_id, GLOBAL_TENANT_KEY)
+            if key in partitions
+        ]
+
+    def find_overlap(
+        self,
+        unit_id: str,
+        start: str,
+        end: str,
+        exclude_contract_id: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+    ) -> Optional[ContractInterval]:
+        for intervals in self._visible(unit_id, tenant_id):
+            found = intervals.find_overlap(start, end, exclude_contract_id)
+            if found is not None:
+                return found
+        return None
+
+    def overlaps(self, tenant_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """All overlapping blocking contract pairs visible to ``tenant_id``."""
+
+        results = []
+        for unit_id in sorted(self._units):
+            merged = UnitIntervals()
+            for intervals in self._visible(unit_id, tenant_id):
+                for interval in intervals.by_id.values():
+                    merged.put(interval)
+            for first, second in merged.overlapping_pairs():
+                results.append(
+                    {
+                        "property_unit_id": unit_id,
+                        "od": max(first.start, second.start),
+                        "do": min(first.end, second.end),
+                        "ugovori": [first.as_dict(), second.as_dict()],
+                    }
+                )
+        return results
+
+
+async def stored_unit_intervals(
+    bulk: BulkWriter, unit_ids: Iterable[str], tenant_id: Optional[str] = None
+) -> Dict[str, UnitIntervals]:
+    """Blocking intervals of ``unit_ids`` read from the database.
+
+    The authoritative overlap check for writes: the unit documents are locked
+    first, so concurrent writers on the same unit (on any worker) decide one
+    after another inside their transactions.
+    """
+
+    unit_ids = sorted(set(unit_ids))
+    intervals: Dict[str, UnitIntervals] = {
+        unit_id: UnitIntervals() for unit_id in unit_ids
+    }
+    if not unit_ids:
+        return intervals
+    await bulk.lock("property_units", unit_ids)
+    documents = await bulk.documents(
+        "ugovori",
+        field("property_unit_id").in_(unit_ids),
+        field("status").in_(BLOCKING_STATUSES),
+    )
+    for document in documents:
+        if tenant_id and document.get("tenant_id") not in (tenant_id, None):
+            continue
+        interval = _interval(document)
+        if interval is not None:
+            intervals[str(document["property_unit_id"])].put(interval)
+    return intervals
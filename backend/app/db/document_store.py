@@ -1,21 +1,139 @@
 from __future__ import annotations
 
+import asyncio
+import logging
 import uuid
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
 from datetime import datetime
 from types import SimpleNamespace
-from typing import Any, Dict, List, Optional, Tuple
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 
 import sqlalchemy as sa
+from app.core import tracing
+from app.core.config import get_settings
 from app.db.base import Base
+from app.db.profiler import QueryCall, profiler
 from app.db.query_utils import (
     aggregate_pipeline,
     apply_set,
     deepcopy_document,
-    document_matches,
+    query_matcher,
 )
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession, async_sessionmaker
 from sqlalchemy.ext.mutable import MutableDict
-from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.orm import Mapped, aliased, mapped_column
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WriteEvent:
+    """A committed change to a single document, delivered to write listeners."""
+
+    collection: str
+    operation: str
+    document_id: str
+    before: Optional[Dict[str, Any]] = None
+    after: Optional[Dict[str, Any]] = None
+
+    @property
+    def document(self) -> Dict[str, Any]:
+        return self.after if self.after is not None else (self.before or {})
+
+
+WriteListener = Callable[[List[WriteEvent]], Awaitable[None]]
+
+
+@dataclass
+class _Transaction:
+    session: AsyncSession
+    events: List[WriteEvent]
+    task: Optional[asyncio.Task]
+
+
+# Set inside MariaDBDatabase.transaction(); store operations in the same task
+# then share its session and their events wait for its commit.
+_TRANSACTION: ContextVar[Optional[_Transaction]] = ContextVar(
+    "document_store_transaction", default=None
+)
+
+
+def _active_transaction() -> Optional[_Transaction]:
+    transaction = _TRANSACTION.get()
+    # Tasks spawned inside the block inherit the context variable but must
+    # not share the session (e.g. an index build started by a handler)
+    if transaction is not None and transaction.task is asyncio.current_task():
+        return transaction
+    return None
+
+
+@asynccontextmanager
+async def _open_session(
+    session_factory: async_sessionmaker[AsyncSession],
+) -> AsyncIterator[AsyncSession]:
+    """A session for one store operation; joins the active transaction, if any."""
+
+    transaction = _active_transaction()
+    if transaction is not None:
+        yield transaction.session
+        return
+    async with session_factory() as session:
+        yield session
+
+
+async def _commit(session: AsyncSession) -> None:
+    if _active_transaction() is not None:
+        # The enclosing transaction commits when its block ends
+        await session.flush()
+    else:
+        await session.commit()
+
+
+async def _deliver(
+    listeners: List[WriteListener], events: List[WriteEvent], source: str
+) -> None:
+    if not events or not listeners:
+        return
+    for listener in list(listeners):
+        try:
+            await listener(events)
+        except Exception as exc:
+            logger.error(f"Write listener failed for {source}: {exc}")
+
+
+def _matcher(query: Optional[Dict[str, Any]]) -> Callable[[Dict[str, Any]], bool]:
+    budget_ms = get_settings().REGEX_QUERY_BUDGET_MS
+    return query_matcher(query, budget_ms / 1000 if budget_ms > 0 else None)
+
+
+@contextmanager
+def _observe(collection: str, operation: str, query: Any = None) -> Iterator[QueryCall]:
+    """Wrap a store call in a tracing span and the query profiler."""
+
+    with tracing.span(f"db.{operation}", collection=collection):
+        with profiler.track(collection, operation, query) as call:
+            yield call
+
+
+# Microseconds, so that the stored collection versions (count and latest
+# ``updated_at``) change with every write; MariaDB defaults to whole seconds
+_TIMESTAMP = sa.DateTime(timezone=False).with_variant(
+    mysql.DATETIME(fsp=6), "mysql", "mariadb"
+)
 
 
 class DocumentRecord(Base):
@@ -29,18 +147,45 @@ class DocumentRecord(Base):
         MutableDict.as_mutable(sa.JSON()), nullable=False
     )
     created_at: Mapped[datetime] = mapped_column(
-        sa.DateTime(timezone=False),
+        _TIMESTAMP,
         default=datetime.utcnow,
         nullable=False,
     )
     updated_at: Mapped[datetime] = mapped_column(
-        sa.DateTime(timezone=False),
+        _TIMESTAMP,
         default=datetime.utcnow,
         onupdate=datetime.utcnow,
         nullable=False,
     )
 
 
+async def ensure_timestamp_precision(connection: AsyncConnection) -> None:
+    """Widen ``document_store`` timestamps created with second precision.
+
+    ``create_all`` never alters existing tables, so databases created before
+    the timestamps carried microseconds are upgraded here (idempotent).
+    """
+
+    if connection.dialect.name not in ("mysql", "mariadb"):
+        return
+    for column in ("created_at", "updated_at"):
+        precision = await connection.scalar(
+            sa.text(
+                "SELECT DATETIME_PRECISION FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table "
+                "AND COLUMN_NAME = :column"
+            ),
+            {"table": DocumentRecord.__tablename__, "column": column},
+        )
+        if precision is not None and precision < 6:
+            await connection.execute(
+                sa.text(
+                    f"ALTER TABLE {DocumentRecord.__tablename__} "
+                    f"MODIFY {column} DATETIME(6) NOT NULL"
+                )
+            )
+
+
 class MariaDBCursor:
     """Lazy cursor that loads documents when consumed."""
 
@@ -60,128 +205,570 @@ class MariaDBCursor:
         return self
 
     async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
-        if self._pipeline is not None:
-            documents = await self._collection._load_documents(None)
-            documents = aggregate_pipeline(documents, self._pipeline)
-        else:
-            documents = await self._collection._load_documents(self._query)
-        for key, direction in self._sort_fields:
-            reverse = direction < 0
-            documents.sort(
-                key=lambda doc: (doc.get(key) is None, doc.get(key)), reverse=reverse
-            )
-        if length is None or length == 0:
+        operation = "aggregate" if self._pipeline is not None else "find"
+        query = self._pipeline if self._pipeline is not None else self._query
+        with _observe(self._collection._name, operation, query) as call:
+            if self._pipeline is not None:
+                # The pipeline never mutates its input and results are copied
+                # below, so aggregate over the loaded rows directly.
+                documents = await self._collection._load_documents(
+                    None, call, copy=False
+                )
+                documents = aggregate_pipeline(documents, self._pipeline)
+            else:
+                documents = await self._collection._load_documents(self._query, call)
+            for key, direction in self._sort_fields:
+                reverse = direction < 0
+                documents.sort(
+                    key=lambda doc: (doc.get(key) is None, doc.get(key)),
+                    reverse=reverse,
+                )
+            if length is not None and length != 0:
+                documents = documents[:length]
+            call.deep_copies += len(documents)
             return [deepcopy_document(doc) for doc in documents]
-        return [deepcopy_document(doc) for doc in documents[:length]]
 
 
 class MariaDBCollection:
     """Collection-like interface backed by the document_store table."""
 
     def __init__(
-        self, name: str, session_factory: async_sessionmaker[AsyncSession]
+        self,
+        name: str,
+        session_factory: async_sessionmaker[AsyncSession],
+        listeners: Optional[List[WriteListener]] = None,
     ) -> None:
         self._name = name
         self._session_factory = session_factory
+        self._listeners: List[WriteListener] = (
+            listeners if listeners is not None else []
+        )
 
     def find(self, query: Optional[Dict[str, Any]] = None) -> MariaDBCursor:
         return MariaDBCursor(self, query, None)
 
     async def find_one(self, query: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        documents = await self._load_documents(query)
-        if not documents:
-            return None
-        return deepcopy_document(documents[0])
+        with _observe(self._name, "find_one", query) as call:
+            documents = await self._load_documents(query, call)
+            if not documents:
+                return None
+            call.deep_copies += 1
+            return deepcopy_document(documents[0])
 
     async def insert_one(self, document: Dict[str, Any]) -> SimpleNamespace:
-        document_id = str(document.get("id") or uuid.uuid4())
-        payload = deepcopy_document(document)
-        payload.setdefault("id", document_id)
-        record = DocumentRecord(
-            collection=self._name,
-            document_id=document_id,
-            data=payload,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
+        with _observe(self._name, "insert_one") as call:
+            document_id = str(document.get("id") or uuid.uuid4())
+            payload = deepcopy_document(document)
+            call.deep_copies += 1
+            payload.setdefault("id", document_id)
+            record = DocumentRecord(
+                collection=self._name,
+                document_id=document_id,
+                data=payload,
+                created_at=datetime.utcnow(),
+                updated_at=datetime.utcnow(),
+            )
+            async with _open_session(self._session_factory) as session:
+                session.add(record)
+                await _commit(session)
+        await self._notify(
+            [
+                WriteEvent(
+                    self._name,
+                    "insert",
+                    document_id,
+                    after=self._snapshot(payload),
+                )
+            ]
         )
-        async with self._session_factory() as session:
-            session.add(record)
-            await session.commit()
         return SimpleNamespace(inserted_id=record.document_id)
 
     async def update_one(self, query: Dict[str, Any], update: Dict[str, Any]):
         matched = 0
         modified = 0
-        async with self._session_factory() as session:
-            records = await self._select_records(session)
-            for record in records:
-                if document_matches(record.data, query):
-                    matched += 1
-                    original = deepcopy_document(record.data)
-                    if "$set" in update:
-                        apply_set(record.data, update["$set"])
-                    if record.data != original:
-                        record.updated_at = datetime.utcnow()
-                        modified += 1
-                    await session.commit()
-                    break
+        events: List[WriteEvent] = []
+        with _observe(self._name, "update_one", query) as call:
+            async with _open_session(self._session_factory) as session:
+                records = await self._select_records(session)
+                call.rows_fetched += len(records)
+                matches = _matcher(query)
+                for record in records:
+                    if matches(record.data):
+                        matched += 1
+                        original = deepcopy_document(record.data)
+                        call.deep_copies += 1
+                        if "$set" in update:
+                            apply_set(record.data, update["$set"])
+                        if record.data != original:
+                            record.updated_at = datetime.utcnow()
+                            modified += 1
+                            events.append(
+                                WriteEvent(
+                                    self._name,
+                                    "update",
+                                    record.document_id,
+                                    before=original,
+                                    after=self._snapshot(record.data),
+                                )
+                            )
+                        await _commit(session)
+                        break
+            call.rows_matched += matched
+        await self._notify(events)
         return SimpleNamespace(matched_count=matched, modified_count=modified)
 
     async def delete_one(self, query: Dict[str, Any]):
         deleted = 0
-        async with self._session_factory() as session:
-            records = await self._select_records(session)
-            for record in records:
-                if document_matches(record.data, query):
-                    await session.delete(record)
-                    await session.commit()
-                    deleted = 1
-                    break
+        events: List[WriteEvent] = []
+        with _observe(self._name, "delete_one", query) as call:
+            async with _open_session(self._session_factory) as session:
+                records = await self._select_records(session)
+                call.rows_fetched += len(records)
+                matches = _matcher(query)
+                for record in records:
+                    if matches(record.data):
+                        events.append(self._delete_event(record))
+                        await session.delete(record)
+                        await _commit(session)
+                        deleted = 1
+                        break
+            call.rows_matched += deleted
+        await self._notify(events)
         return SimpleNamespace(deleted_count=deleted)
 
     async def delete_many(self, query: Dict[str, Any]):
         deleted = 0
-        async with self._session_factory() as session:
-            records = await self._select_records(session)
-            for record in records:
-                if document_matches(record.data, query):
-                    await session.delete(record)
-                    deleted += 1
-            if deleted:
-                await session.commit()
+        events: List[WriteEvent] = []
+        with _observe(self._name, "delete_many", query) as call:
+            async with _open_session(self._session_factory) as session:
+                records = await self._select_records(session)
+                call.rows_fetched += len(records)
+                matches = _matcher(query)
+                for record in records:
+                    if matches(record.data):
+                        events.append(self._delete_event(record))
+                        await session.delete(record)
+                        deleted += 1
+                if deleted:
+                    await _commit(session)
+            call.rows_matched += deleted
+        await self._notify(events)
         return SimpleNamespace(deleted_count=deleted)
 
     async def count_documents(self, query: Optional[Dict[str, Any]] = None) -> int:
-        documents = await self._load_documents(query)
-        return len(documents)
+        with _observe(self._name, "count_documents", query) as call:
+            documents = await self._load_documents(query, call)
+            return len(documents)
 
     def aggregate(self, pipeline: List[Dict[str, Any]]) -> MariaDBCursor:
         return MariaDBCursor(self, None, pipeline)
 
     async def _load_documents(
-        self, query: Optional[Dict[str, Any]] = None
+        self,
+        query: Optional[Dict[str, Any]] = None,
+        call: Optional[QueryCall] = None,
+        copy: bool = True,
     ) -> List[Dict[str, Any]]:
-        async with self._session_factory() as session:
+        async with _open_session(self._session_factory) as session:
             records = await self._select_records(session)
+        matches = _matcher(query)
+        # Callers that only read (e.g. aggregation) skip the per-document copy
         documents = [
-            deepcopy_document(record.data)
+            deepcopy_document(record.data) if copy else record.data
             for record in records
-            if document_matches(record.data, query)
+            if matches(record.data)
         ]
+        if call is not None:
+            call.rows_fetched += len(records)
+            call.rows_matched += len(documents)
+            if copy:
+                call.deep_copies += len(documents)
         return documents
 
+    def _snapshot(self, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # Listeners get their own copy; skip the copy entirely when nobody listens.
+        return deepcopy_document(data) if self._listeners else None
+
+    def _delete_event(self, record: DocumentRecord) -> WriteEvent:
+        return WriteEvent(
+            self._name, "delete", record.document_id, before=self._snapshot(record.data)
+        )
+
+    async def _notify(self, events: List[WriteEvent]) -> None:
+        transaction = _active_transaction()
+        if transaction is not None:
+            transaction.events.extend(events)
+            return
+        await _deliver(self._listeners, events, self._name)
+
     async def _select_records(self, session: AsyncSession) -> List[DocumentRecord]:
-        stmt = sa.select(DocumentRecord).where(DocumentRecord.collection == self._name)
+        # Refresh rows already in a shared transaction session, which bulk
+        # statements may have changed behind the ORM's back
+        stmt = (
+            sa.select(DocumentRecord)
+            .where(DocumentRecord.collection == self._name)
+            .execution_options(populate_existing=True)
+        )
         result = await session.execute(stmt)
         return list(result.scalars())
 
 
+def field(name: str, record: Any = DocumentRecord) -> Any:
+    """A top-level document field as text, for SQL conditions on the store.
+
+    Compiles to ``JSON_UNQUOTE(JSON_EXTRACT(data, ...))`` on MariaDB and
+    ``JSON_EXTRACT(data, ...)`` on SQLite. ``record`` may be an alias of
+    :class:`DocumentRecord` when joining the store to itself.
+    """
+
+    return record.data[name].as_string()
+
+
+class BulkWriter:
+    """Set-based statements over ``document_store`` inside one transaction.
+
+    Conditions are SQL expressions (see :func:`field`) evaluated by the
+    database, so a bulk change is a handful of statements instead of a full
+    collection scan per document. Write events are collected and published
+    as one batch once the transaction commits.
+    """
+
+    CHUNK_SIZE = 500
+
+    def __init__(self, session: AsyncSession, track_events: bool) -> None:
+        self._session = session
+        self._track_events = track_events
+        self.events: List[WriteEvent] = []
+
+    @staticmethod
+    def _where(collection: str, conditions: Tuple[Any, ...]) -> List[Any]:
+        return [DocumentRecord.collection == collection, *conditions]
+
+    @classmethod
+    def _chunks(cls, ids: Optional[List[str]]) -> Iterator[Tuple[Any, ...]]:
+        if ids is None:
+            yield ()
+            return
+        ids = list(ids)
+        for start in range(0, len(ids), cls.CHUNK_SIZE):
+            yield (DocumentRecord.document_id.in_(ids[start : start + cls.CHUNK_SIZE]),)
+
+    async def values(self, collection: str, name: str, *conditions: Any) -> List[Any]:
+        """Values of one field across the matching documents."""
+
+        with _observe(collection, "bulk_select") as call:
+            result = await self._session.execute(
+                sa.select(field(name)).where(*self._where(collection, conditions))
+            )
+            values = list(result.scalars())
+            call.rows_matched += len(values)
+            return values
+
+    async def lock(self, collection: str, ids: List[str]) -> None:
+        """Lock documents ``ids`` until the transaction ends (``FOR UPDATE``),
+        so writers deciding on the same documents run one after another."""
+
+        with _observe(collection, "bulk_lock"):
+            for restriction in self._chunks(ids):
+                await self._session.execute(
+                    sa.select(DocumentRecord.document_id)
+                    .where(*self._where(collection, restriction))
+                    .with_for_update()
+                )
+
+    async def documents(
+        self, collection: str, *conditions: Any, ids: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """Matching documents (optionally restricted to document ``ids``)."""
+
+        documents: List[Dict[str, Any]] = []
+        with _observe(collection, "bulk_select") as call:
+            for restriction in self._chunks(ids):
+                result = await self._session.execute(
+                    sa.select(DocumentRecord.data).where(
+                        *self._where(collection, conditions + restriction)
+                    )
+                )
+                documents.extend(result.scalars())
+            call.rows_matched += len(documents)
+        return documents
+
+    async def insert_many(
+        self, collection: str, documents: List[Dict[str, Any]]
+    ) -> List[str]:
+        """Insert ``documents`` with one multi-row statement per chunk."""
+
+        now = datetime.utcnow()
+        rows = []
+        for document in documents:
+            payload = deepcopy_document(document)
+            payload.setdefault("id", str(uuid.uuid4()))
+            rows.append(
+                {
+                    "collection": collection,
+                    "document_id": str(payload["id"]),
+                    "data": payload,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+            )
+        with _observe(collection, "bulk_insert") as call:
+            for start in range(0, len(rows), self.CHUNK_SIZE):
+                await self._session.execute(
+                    sa.insert(DocumentRecord), rows[start : start + self.CHUNK_SIZE]
+                )
+            call.rows_matched += len(rows)
+        if self._track_events:
+            self.events.extend(
+                WriteEvent(
+                    collection,
+                    "insert",
+                    row["document_id"],
+                    after=deepcopy_document(row["data"]),
+                )
+                for row in rows
+            )
+        return [row["document_id"] for row in rows]
+
+    async def ids_without(
+        self,
+        collection: str,
+        related: str,
+        foreign_key: str,
+        *conditions: Any,
+        related_values: Optional[Dict[str, List[Any]]] = None,
+    ) -> List[str]:
+        """Ids of matching documents no ``related`` document references.
+
+        A single anti-join: ``collection`` documents are outer-joined to the
+        ``related`` documents whose ``foreign_key`` holds their id (and whose
+        fields take one of ``related_values``), keeping those without a match.
+        """
+
+        other = aliased(DocumentRecord)
+        join_on = [
+            other.collection == related,
+            field(foreign_key, other) == DocumentRecord.document_id,
+        ]
+        for name, allowed in (related_values or {}).items():
+            join_on.append(
+                field(name, other).in_([getattr(v, "value", v) for v in allowed])
+            )
+        with _observe(collection, "bulk_anti_join") as call:
+            result = await self._session.execute(
+                sa.select(DocumentRecord.document_id)
+                .outerjoin(other, sa.and_(*join_on))
+                .where(
+                    *self._where(collection, conditions), other.document_id.is_(None)
+                )
+                .order_by(DocumentRecord.document_id)
+            )
+            ids = list(result.scalars())
+            call.rows_matched += len(ids)
+            return ids
+
+    async def set_where(
+        self,
+        collection: str,
+        updates: Dict[str, Any],
+        *conditions: Any,
+        ids: Optional[List[str]] = None,
+    ) -> int:
+        """``$set`` scalar ``updates`` on every matching document (optionally
+        restricted to document ``ids``); returns the number of rows changed."""
+
+        paths: List[Any] = []
+        for key, value in updates.items():
+            paths.extend([f"$.{key}", getattr(value, "value", value)])
+        now = datetime.utcnow()
+        changed = 0
+        with _observe(collection, "bulk_update") as call:
+            for restriction in self._chunks(ids):
+                where = self._where(collection, conditions + restriction)
+                if self._track_events:
+                    rows = await self._session.execute(
+                        sa.select(DocumentRecord.document_id, DocumentRecord.data)
+                        .where(*where)
+                        .with_for_update()
+                    )
+                    for document_id, data in rows:
+                        after = {
+                            **data,
+                            **{k: getattr(v, "value", v) for k, v in updates.items()},
+                        }
+                        self.events.append(
+                            WriteEvent(collection, "update", document_id, data, after)
+                        )
+                result = await self._session.execute(
+                    sa.update(DocumentRecord)
+                    .where(*where)
+                    .values(
+                        data=sa.func.json_set(DocumentRecord.data, *paths),
+                        updated_at=now,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                changed += result.rowcount or 0
+            call.rows_matched += changed
+        return changed
+
+    async def set_each(
+        self, collection: str, updates_by_id: Dict[str, Dict[str, Any]]
+    ) -> int:
+        """``$set`` per-document values, given as ``{document_id: {field: value}}``.
+
+        Every document must receive the same fields; each field becomes one
+        ``CASE document_id`` expression, so a chunk is a single UPDATE.
+        """
+
+        if not updates_by_id:
+            return 0
+        names = list(next(iter(updates_by_id.values())))
+        now = datetime.utcnow()
+        changed = 0
+        with _observe(collection, "bulk_update") as call:
+            ids = list(updates_by_id)
+            for start in range(0, len(ids), self.CHUNK_SIZE):
+                chunk = ids[start : start + self.CHUNK_SIZE]
+                where = self._where(
+                    collection, (DocumentRecord.document_id.in_(chunk),)
+                )
+                paths: List[Any] = []
+                for name in names:
+                    paths.append(f"$.{name}")
+                    paths.append(
+                        sa.case(
+                            {
+                                document_id: updates_by_id[document_id][name]
+                                for document_id in chunk
+                            },
+                            value=DocumentRecord.document_id,
+                        )
+                    )
+                if self._track_events:
+                    rows = await self._session.execute(
+                        sa.select(DocumentRecord.document_id, DocumentRecord.data)
+                        .where(*where)
+                        .with_for_update()
+                    )
+                    for document_id, data in rows:
+                        after = {**data, **updates_by_id[document_id]}
+                        self.events.append(
+                            WriteEvent(collection, "update", document_id, data, after)
+                        )
+                result = await self._session.execute(
+                    sa.update(DocumentRecord)
+                    .where(*where)
+                    .values(
+                        data=sa.func.json_set(DocumentRecord.data, *paths),
+                        updated_at=now,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                changed += result.rowcount or 0
+            call.rows_matched += changed
+        return changed
+
+
 class MariaDBDatabase:
     """Expose Mongo-style collections backed by MariaDB."""
 
     def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
         self._session_factory = session_factory
         self._collections: Dict[str, MariaDBCollection] = {}
+        self._listeners: List[WriteListener] = []
+
+    def add_write_listener(self, listener: WriteListener) -> None:
+        """Register a coroutine called with the WriteEvents of every committed write."""
+
+        self._listeners.append(listener)
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncIterator[None]:
+        """Make the store operations inside the block one transaction.
+
+        Operations awaited in the block (in this task) share one session and
+        commit together; listeners see their events only after the commit,
+        and nothing if the block raises. Nested blocks join the outer one.
+        """
+
+        if _active_transaction() is not None:
+            yield
+            return
+        async with self._session_factory() as session:
+            transaction = _Transaction(session, [], asyncio.current_task())
+            token = _TRANSACTION.set(transaction)
+            try:
+                yield
+                await session.commit()
+            finally:
+                _TRANSACTION.reset(token)
+        await _deliver(self._listeners, transaction.events, "transaction")
+
+    async def collection_version(
+        self, collection: str, tenant_id: Optional[str] = None
+    ) -> str:
+        """Version of ``collection`` as stored: document count and latest
+        ``updated_at``, optionally of the documents ``tenant_id`` can see.
+
+        It changes on writes made by any worker, at the cost of one query.
+        Timestamps are stored with microseconds (see
+        :func:`ensure_timestamp_precision`); workers on different hosts need
+        synchronised clocks for an update to move the latest ``updated_at``.
+        """
+
+        return await self.collections_version([collection], tenant_id)
+
+    async def collections_version(
+        self, collections: Iterable[str], tenant_id: Optional[str] = None
+    ) -> str:
+        """:meth:`collection_version` of several collections, in one query."""
+
+        names = list(collections)
+        conditions = [DocumentRecord.collection.in_(names)]
+        if tenant_id:
+            conditions.append(
+                sa.or_(
+                    field("tenant_id") == tenant_id,
+                    field("tenant_id").is_(None),
+                    field("tenant_id") == "null",
+                )
+            )
+        async with _open_session(self._session_factory) as session:
+            rows = await session.execute(
+                sa.select(
+                    DocumentRecord.collection,
+                    sa.func.count(),
+                    sa.func.max(DocumentRecord.updated_at),
+                )
+                .where(*conditions)
+                .group_by(DocumentRecord.collection)
+            )
+            stored = {
+                collection: f"{count}:{latest.isoformat() if latest else '-'}"
+                for collection, count, latest in rows
+            }
+        return "|".join(stored.get(name, "0:-") for name in names)
+
+    @asynccontextmanager
+    async def bulk(self) -> AsyncIterator[BulkWriter]:
+        """Run set-based statements in one transaction, then notify listeners.
+
+        Inside :meth:`transaction` the statements join it instead.
+        """
+
+        transaction = _active_transaction()
+        if transaction is not None:
+            writer = BulkWriter(transaction.session, track_events=bool(self._listeners))
+            yield writer
+            await transaction.session.flush()
+            transaction.events.extend(writer.events)
+            return
+        async with self._session_factory() as session:
+            writer = BulkWriter(session, track_events=bool(self._listeners))
+            yield writer
+            await session.commit()
+        await _deliver(self._listeners, writer.events, "bulk")
 
     def __getattr__(self, item: str) -> MariaDBCollection:
         return self._get_collection(item)
@@ -191,5 +778,7 @@ class MariaDBDatabase:
 
     def _get_collection(self, name: str) -> MariaDBCollection:
         if name not in self._collections:
-            self._collections[name] = MariaDBCollection(name, self._session_factory)
+            self._collections[name] = MariaDBCollection(
+                name, self._session_factory, self._listeners
+            )
         return self._collections[name]
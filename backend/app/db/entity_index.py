@@ -0,0 +1,313 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from app.db.search_index import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Documents without a tenant_id are visible to every tenant (see app.db.tenant)
+GLOBAL_TENANT_KEY = "__global__"
+
+# Legal-form suffixes, compared after dots are removed ("d.o.o." -> "doo")
+LEGAL_FORMS = frozenset(
+    {"doo", "jdoo", "dd", "obrt", "ltd", "llc", "gmbh", "ag", "sa", "srl", "inc"}
+)
+# Street-type words carry no identifying information in an address
+STREET_WORDS = frozenset({"ul", "ulica", "cesta", "c", "trg", "br", "bb"})
+
+MIN_SIMILARITY = 0.45
+MAX_CANDIDATES = 5
+
+MATCH_COLLECTIONS = ("zakupnici", "nekretnine")
+
+
+def _words(value: Any) -> List[str]:
+    text = normalize_text(value).replace(".", "")
+    return "".join(ch if ch.isalnum() else " " for ch in text).split()
+
+
+def name_key(value: Any) -> str:
+    """Folded name without legal form: "Čistoća d.o.o." -> "cistoca"."""
+
+    return " ".join(word for word in _words(value) if word not in LEGAL_FORMS)
+
+
+def address_key(value: Any) -> str:
+    """Street and number: "Ul. Ivana Gundulića 5, Split" -> "ivana gundulica 5"."""
+
+    street = str(value or "").split(",")[0]
+    return " ".join(word for word in _words(street) if word not in STREET_WORDS)
+
+
+def trigrams(key: str) -> FrozenSet[str]:
+    """Word trigrams padded like pg_trgm ("  word ")."""
+
+    grams: Set[str] = set()
+    for word in key.split():
+        padded = f"  {word} "
+        grams.update(padded[i : i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def oib_key(value: Any) -> str:
+    return "".join(ch for ch in str(value or "") if ch.isdigit())
+
+
+@dataclass
+class MatchCandidate:
+    id: str
+    score: float
+    reason: str
+    label: str
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "score": round(self.score, 3),
+            "razlog": self.reason,
+            "naziv": self.label,
+        }
+
+
+@dataclass
+class _TrigramSet:
+    """Keys of one kind (names or addresses) with a trigram inverted index."""
+
+    grams: Dict[str, FrozenSet[str]] = field(default_factory=dict)
+    postings: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))
+
+    def add(self, document_id: str, key: str) -> None:
+        grams = trigrams(key)
+        if not grams:
+            return
+        self.grams[document_id] = grams
+        for gram in grams:
+            self.postings[gram].add(document_id)
+
+    def remove(self, document_id: str) -> None:
+        for gram in self.grams.pop(document_id, ()):
+            ids = self.postings.get(gram)
+            if ids is not None:
+                ids.discard(document_id)
+                if not ids:
+                    del self.postings[gram]
+
+    def similar(self, key: str) -> Dict[str, float]:
+        """Jaccard trigram similarity of every document sharing a trigram."""
+
+        query = trigrams(key)
+        if not query:
+            return {}
+        shared: Dict[str, int] = defaultdict(int)
+        for gram in query:
+            for document_id in self.postings.get(gram, ()):
+                shared[document_id] += 1
+        return {
+            document_id: count / (len(query) + len(self.grams[document_id]) - count)
+            for document_id, count in shared.items()
+        }
+
+
+@dataclass
+class _Partition:
+    names: _TrigramSet = field(default_factory=_TrigramSet)
+    addresses: _TrigramSet = field(default_factory=_TrigramSet)
+    oibs: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))
+    doc_oibs: Dict[str, str] = field(default_factory=dict)
+    labels: Dict[str, str] = field(default_factory=dict)
+
+
+def _tenant_key(document: Dict[str, Any]) -> str:
+    return document.get("tenant_id") or GLOBAL_TENANT_KEY
+
+
+class EntityIndex:
+    """Per-tenant fuzzy lookup of tenants (zakupnici) and properties.
+
+    Names are reduced to keys without case, diacritics and legal forms;
+    addresses to their street-and-number part. Candidates are found through
+    a trigram inverted index and ranked by trigram (Jaccard) similarity, with
+    an exact OIB always ranked first. Built lazily from the store, kept
+    current by a document store write listener and rebuilt by
+    :meth:`ensure_current` after writes made by other workers.
+    """
+
+    def __init__(self, database: Any) -> None:
+        self._database = database
+        # collections_version(MATCH_COLLECTIONS) the index was built from
+        self._version: Optional[str] = None
+        # (collection, tenant key) -> partition
+        self._partitions: Dict[Tuple[str, str], _Partition] = defaultdict(_Partition)
+        # (collection, document id) -> tenant key it is indexed under
+        self._owners: Dict[Tuple[str, str], str] = {}
+        self._ready = False
+        self._build: Optional[asyncio.Future] = None
+        self._pending: Optional[List[Any]] = None
+
+    # -- maintenance -----------------------------------------------------
+
+    def _remove(self, collection: str, document_id: str) -> None:
+        tenant_key = self._owners.pop((collection, document_id), None)
+        if tenant_key is None:
+            return
+        partition = self._partitions[(collection, tenant_key)]
+        partition.names.remove(document_id)
+        partition.addresses.remove(document_id)
+        partition.labels.pop(document_id, None)
+        oib = partition.doc_oibs.pop(document_id, None)
+        if oib is not None:
+            partition.oibs[oib].discard(document_id)
+            if not partition.oibs[oib]:
+                del partition.oibs[oib]
+
+    def _add(self, collection: str, document: Dict[str, Any]) -> None:
+        document_id = document.get("id")
+        if not document_id:
+            return
+        document_id = str(document_id)
+        self._remove(collection, document_id)
+        tenant_key = _tenant_key(document)
+        partition = self._partitions[(collection, tenant_key)]
+        self._owners[(collection, document_id)] = tenant_key
+
+        if collection == "zakupnici":
+            label = document.get("naziv_firme") or document.get("ime_prezime") or ""
+            for value in (document.get("naziv_firme"), document.get("ime_prezime")):
+                if value:
+                    partition.names.add(document_id, name_key(value))
+                    break
+            oib = oib_key(document.get("oib"))
+            if oib:
+                partition.oibs[oib].add(document_id)
+                partition.doc_oibs[document_id] = oib
+        else:
+            label = document.get("naziv") or document.get("adresa") or ""
+            partition.names.add(document_id, name_key(document.get("naziv")))
+            partition.addresses.add(document_id, address_key(document.get("adresa")))
+        partition.labels[document_id] = str(label)
+
+    def _apply(self, events: List[Any]) -> None:
+        for event in events:
+            if event.collection not in MATCH_COLLECTIONS:
+                continue
+            if event.after is not None:
+                self._add(event.collection, event.after)
+            elif event.before is not None and event.before.get("id"):
+                self._remove(event.collection, str(event.before["id"]))
+
+    async def on_write(self, events: List[Any]) -> None:
+        """Document store write listener."""
+
+        if self._pending is not None:
+            self._pending.extend(events)
+        elif self._ready:
+            self._apply(events)
+
+    async def ensure_built(self) -> None:
+        if self._ready:
+            return
+        # Concurrent first callers share a single build
+        if self._build is None or self._build.done():
+            self._build = asyncio.ensure_future(self.rebuild())
+        await asyncio.shield(self._build)
+
+    async def ensure_current(self) -> None:
+        """Build the index, or rebuild it when tenants or properties changed in
+        the database since it was built (e.g. through another worker)."""
+
+        version = await self._database.collections_version(MATCH_COLLECTIONS)
+        if self._ready and version == self._version:
+            return
+        if self._build is None or self._build.done():
+            self._build = asyncio.ensure_future(self.rebuild(version))
+        await asyncio.shield(self._build)
+
+    async def rebuild(self, version: Optional[str] = None) -> None:
+        self._pending = []
+        try:
+            self._partitions = defaultdict(_Partition)
+            self._owners = {}
+            loaded = await asyncio.gather(
+                *(
+                    self._database[collection].find({}).to_list(None)
+                    for collection in MATCH_COLLECTIONS
+                )
+            )
+            for collection, documents in zip(MATCH_COLLECTIONS, loaded):
+                for document in documents:
+                    self._add(collection, document)
+            self._apply(self._pending)
+            self._version = version
+            self._ready = True
+        finally:
+            self._pending = None
+        logger.info("Entity match index built with %s documents", len(self._owners))
+
+    # -- queries ---------------------------------------------------------
+
+    def _visible(self, collection: str, tenant_id: Optional[str]) -> List[_Partition]:
+        if tenant_id:
+            keys = [(collection, tenant_id), (collection, GLOBAL_TENANT_KEY)]
+            return [self._partitions[key] for key in keys if key in self._partitions]
+        return [p for (name, _), p in self._partitions.items() if name == collection]
+
+    @staticmethod
+    def _rank(
+        scored: Dict[str, Tuple[float, str, str]], limit: int
+    ) -> List[MatchCandidate]:
+        candidates = [
+            MatchCandidate(document_id, score, reason, label)
+            for document_id, (score, reason, label) in scored.items()
+            if score >= MIN_SIMILARITY
+        ]
+        # An exact OIB outranks any name similarity
+        candidates.sort(key=lambda c: (c.reason != "oib", -c.score, c.label, c.id))
+        return candidates[:limit]
+
+    def match_tenant(
+        self,
+        naziv: Optional[str] = None,
+        oib: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        limit: int = MAX_CANDIDATES,
+    ) -> List[MatchCandidate]:
+        """Ranked zakupnici for an extracted company / person name and OIB."""
+
+        scored: Dict[str, Tuple[float, str, str]] = {}
+        oib = oib_key(oib)
+        key = name_key(naziv)
+        for partition in self._visible("zakupnici", tenant_id):
+            if key:
+                for document_id, similarity in partition.names.similar(key).items():
+                    label = partition.labels[document_id]
+                    scored[document_id] = (similarity, "naziv", label)
+            for document_id in partition.oibs.get(oib, ()) if oib else ():
+                scored[document_id] = (1.0, "oib", partition.labels[document_id])
+        return self._rank(scored, limit)
+
+    def match_property(
+        self,
+        naziv: Optional[str] = None,
+        adresa: Optional[str] = None,
+        tenant_id: Optional[str] = None,
+        limit: int = MAX_CANDIDATES,
+    ) -> List[MatchCandidate]:
+        """Ranked nekretnine for an extracted property name and address."""
+
+        scored: Dict[str, Tuple[float, str, str]] = {}
+        keys = (("naziv", name_key(naziv)), ("adresa", address_key(adresa)))
+        for partition in self._visible("nekretnine", tenant_id):
+            for reason, key in keys:
+                if not key:
+                    continue
+                index = partition.names if reason == "naziv" else partition.addresses
+                for document_id, similarity in index.similar(key).items():
+                    if similarity > scored.get(document_id, (0.0,))[0]:
+                        label = partition.labels[document_id]
+                        scored[document_id] = (similarity, reason, label)
+        return self._rank(scored, limit)
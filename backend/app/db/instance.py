@@ -1,11 +1,52 @@
+from datetime import timedelta
+
 from app.core.config import get_settings
+from app.core.principal_cache import principal_cache
+from app.core.token_revocation import revocation_list
+from app.db.contract_intervals import ContractIntervalIndex
 from app.db.document_store import MariaDBDatabase
+from app.db.entity_index import EntityIndex
+from app.db.refresh_tokens import RefreshTokenStore
+from app.db.scheduled_jobs import JobStore
+from app.db.search_index import SearchIndex
 from app.db.session import get_async_session_factory
+from app.db.suggest_trie import SuggestionIndex
 from app.db.tenant import TenantAwareDatabase
+from app.db.tenant_kpis import TenantKpiStore
+from app.db.token_revocations import RevocationStore
 
 settings = get_settings()
 
 # Initialize the database instance
 session_factory = get_async_session_factory()
 _mariadb = MariaDBDatabase(session_factory)
+_mariadb.add_write_listener(principal_cache.on_write)
+_mariadb.add_write_listener(revocation_list.on_write)
+tenant_kpis = TenantKpiStore(session_factory)
+_mariadb.add_write_listener(tenant_kpis.on_write)
+search_index = SearchIndex(_mariadb)
+_mariadb.add_write_listener(search_index.on_write)
+suggestions = SuggestionIndex(_mariadb)
+_mariadb.add_write_listener(suggestions.on_write)
+entity_index = EntityIndex(_mariadb)
+_mariadb.add_write_listener(entity_index.on_write)
+contract_intervals = ContractIntervalIndex(_mariadb)
+_mariadb.add_write_listener(contract_intervals.on_write)
 db = TenantAwareDatabase(_mariadb)
+# Unscoped store for system-wide jobs; request code goes through ``db``
+store = _mariadb
+refresh_tokens = RefreshTokenStore(
+    session_factory, timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+)
+job_store = JobStore(session_factory)
+revocation_list.attach(
+    RevocationStore(
+        session_factory, timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+)
+
+
+async def rebuild_tenant_kpis():
+    """Recompute the materialised dashboard KPIs from the raw collections."""
+
+    return await tenant_kpis.rebuild(_mariadb)
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Tuple
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger("app.db.slow_query")
+
+SHAPE_PLACEHOLDER = "?"
+
+
+def query_shape(query: Any) -> Any:
+    """Return the structure of a Mongo-style query with all literal values stripped."""
+
+    if isinstance(query, dict):
+        return {key: query_shape(value) for key, value in sorted(query.items())}
+    if isinstance(query, list):
+        # Operator lists ($or/$and) keep their sub-query shapes, value lists collapse.
+        if query and all(isinstance(item, dict) for item in query):
+            return [query_shape(item) for item in query]
+        return [SHAPE_PLACEHOLDER]
+    return SHAPE_PLACEHOLDER
+
+
+def _shape_key(query: Any) -> str:
+    if not query:
+        return "{}"
+    return repr(query_shape(query))
+
+
+class QueryCall:
+    """Counters collected for a single document store call."""
+
+    __slots__ = ("rows_fetched", "rows_matched", "deep_copies")
+
+    def __init__(self) -> None:
+        self.rows_fetched = 0
+        self.rows_matched = 0
+        self.deep_copies = 0
+
+
+@dataclass
+class QueryShapeStats:
+    collection: str
+    operation: str
+    shape: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    rows_fetched: int = 0
+    rows_matched: int = 0
+    deep_copies: int = 0
+    slow_calls: int = 0
+
+    @property
+    def avg_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["total_ms"] = round(self.total_ms, 3)
+        data["max_ms"] = round(self.max_ms, 3)
+        data["avg_ms"] = round(self.avg_ms, 3)
+        return data
+
+
+class QueryProfiler:
+    """Aggregates per-shape timings for MariaDBCollection calls.
+
+    Disabled by default; it can be switched on at startup via
+    ``QUERY_PROFILER_ENABLED`` or at runtime through ``/api/debug/query-stats``.
+    """
+
+    def __init__(self, enabled: bool = False, slow_query_ms: float = 200.0) -> None:
+        self.enabled = enabled
+        self.slow_query_ms = slow_query_ms
+        self._stats: Dict[Tuple[str, str, str], QueryShapeStats] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def track(
+        self, collection: str, operation: str, query: Any = None
+    ) -> Iterator[QueryCall]:
+        call = QueryCall()
+        if not self.enabled:
+            yield call
+            return
+        start = time.perf_counter()
+        try:
+            yield call
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.record(collection, operation, query, call, elapsed_ms)
+
+    def record(
+        self,
+        collection: str,
+        operation: str,
+        query: Any,
+        call: QueryCall,
+        elapsed_ms: float,
+    ) -> None:
+        shape = _shape_key(query)
+        key = (collection, operation, shape)
+        is_slow = self.slow_query_ms is not None and elapsed_ms >= self.slow_query_ms
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = QueryShapeStats(collection, operation, shape)
+                self._stats[key] = stats
+            stats.calls += 1
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.rows_fetched += call.rows_fetched
+            stats.rows_matched += call.rows_matched
+            stats.deep_copies += call.deep_copies
+            if is_slow:
+                stats.slow_calls += 1
+        if is_slow:
+            logger.warning(
+                "Slow query on %s.%s (%.1f ms): shape=%s fetched=%d matched=%d deep_copies=%d",
+                collection,
+                operation,
+                elapsed_ms,
+                shape,
+                call.rows_fetched,
+                call.rows_matched,
+                call.deep_copies,
+            )
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(self._stats.values())
+        if order_by == "avg_ms":
+            entries.sort(key=lambda s: s.avg_ms, reverse=True)
+        else:
+            entries.sort(key=lambda s: getattr(s, order_by, 0), reverse=True)
+        return [entry.to_dict() for entry in entries[:limit]]
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = list(self._stats.values())
+        return {
+            "enabled": self.enabled,
+            "slow_query_ms": self.slow_query_ms,
+            "shapes": len(entries),
+            "calls": sum(s.calls for s in entries),
+            "total_ms": round(sum(s.total_ms for s in entries), 3),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+
+profiler = QueryProfiler(
+    enabled=settings.QUERY_PROFILER_ENABLED,
+    slow_query_ms=settings.SLOW_QUERY_MS,
+)
@@ -2,7 +2,44 @@ from __future__ import annotations
 
 import copy
 import re
-from typing import Any, Dict, List, Optional
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+try:  # Python 3.11+
+    import re._parser as _sre_parse
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse as _sre_parse
+
+MAX_REGEX_LENGTH = 256
+MAX_REGEX_QUANTIFIERS = 16
+# Two unbounded quantifiers (".*.*x") already backtrack cubically on a miss
+MAX_UNBOUNDED_QUANTIFIERS = 1
+# Product of the spans (high - low + 1) of the bounded quantifiers
+MAX_BOUNDED_REPEAT_PRODUCT = 64
+# Only this much of a field value is searched by $regex, bounding the
+# remaining (polynomial) backtracking of any accepted pattern
+MAX_REGEX_SUBJECT_LENGTH = 1000
+
+_REPEAT_OPS = {
+    getattr(_sre_parse, name)
+    for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(_sre_parse, name)
+}
+
+
+class QueryRejected(ValueError):
+    """A query the store refuses to evaluate; ``message`` is user-facing."""
+
+    message = "Neispravan upit"
+
+
+class UnsafeRegexError(QueryRejected):
+    message = "Izraz za pretragu nije dopušten"
+
+
+class QueryBudgetExceeded(QueryRejected):
+    message = "Pretraga je trajala predugo, suzite upit"
 
 
 def deepcopy_document(data: Dict[str, Any]) -> Dict[str, Any]:
@@ -11,15 +48,101 @@ def deepcopy_document(data: Dict[str, Any]) -> Dict[str, Any]:
     return copy.deepcopy(data)
 
 
-def _regex_match(pattern: str, value: Any, *, case_insensitive: bool) -> bool:
+def _check_regex_tree(items: Any, inside_repeat: bool, counter: List[int]) -> None:
+    # counter: [quantifiers, unbounded quantifiers, bounded repeat product]
+    for op, av in items:
+        if op in _REPEAT_OPS:
+            low, high, sub = av
+            if high == _sre_parse.MAXREPEAT:
+                counter[1] += 1
+                if counter[1] > MAX_UNBOUNDED_QUANTIFIERS:
+                    raise UnsafeRegexError("too many unbounded quantifiers")
+            else:
+                counter[2] *= high - low + 1
+                if counter[2] > MAX_BOUNDED_REPEAT_PRODUCT:
+                    raise UnsafeRegexError("bounded quantifiers too wide")
+            repeats = high > 1
+            if repeats:
+                counter[0] += 1
+                if counter[0] > MAX_REGEX_QUANTIFIERS:
+                    raise UnsafeRegexError("too many quantifiers")
+                # (a+)+ and (a|ab)* backtrack exponentially on near misses
+                if inside_repeat:
+                    raise UnsafeRegexError("nested quantifier")
+                if any(sub_op == _sre_parse.BRANCH for sub_op, _ in _flatten(sub)):
+                    raise UnsafeRegexError("quantified alternation")
+            _check_regex_tree(sub, inside_repeat or repeats, counter)
+        elif op == _sre_parse.SUBPATTERN:
+            _check_regex_tree(av[-1], inside_repeat, counter)
+        elif op == _sre_parse.BRANCH:
+            for branch in av[1]:
+                _check_regex_tree(branch, inside_repeat, counter)
+        elif op in (_sre_parse.ASSERT, _sre_parse.ASSERT_NOT):
+            _check_regex_tree(av[1], inside_repeat, counter)
+        elif op in (_sre_parse.GROUPREF, _sre_parse.GROUPREF_EXISTS):
+            raise UnsafeRegexError("backreference")
+        elif getattr(_sre_parse, "ATOMIC_GROUP", None) == op:
+            _check_regex_tree(av, inside_repeat, counter)
+
+
+def _flatten(items: Any) -> List[Any]:
+    """Nodes of ``items``, descending into (non-capturing) groups."""
+
+    nodes = []
+    for op, av in items:
+        nodes.append((op, av))
+        if op == _sre_parse.SUBPATTERN:
+            nodes.extend(_flatten(av[-1]))
+    return nodes
+
+
+@lru_cache(maxsize=256)
+def compile_regex(pattern: str, case_insensitive: bool = False) -> re.Pattern:
+    """Compile a user-supplied ``$regex`` once, rejecting ReDoS-prone shapes.
+
+    Patterns are limited in length and number of quantifiers, with at most
+    one unbounded quantifier and a small product of bounded repeat spans;
+    nested quantifiers, quantified alternation and backreferences are
+    refused. Matching only searches the first ``MAX_REGEX_SUBJECT_LENGTH``
+    characters of a value, so one evaluation stays short: the query budget
+    is only checked between documents.
+    """
+
+    if len(pattern) > MAX_REGEX_LENGTH:
+        raise UnsafeRegexError("pattern too long")
     flags = re.IGNORECASE if case_insensitive else 0
-    return re.search(pattern, str(value or ""), flags) is not None
+    try:
+        parsed = _sre_parse.parse(pattern, flags)
+    except re.error as exc:
+        raise UnsafeRegexError(str(exc)) from exc
+    _check_regex_tree(parsed, False, [0, 0, 1])
+    return re.compile(pattern, flags)
+
+
+@lru_cache(maxsize=256)
+def compile_literal(text: str, case_insensitive: bool = True) -> re.Pattern:
+    """Escaped pattern for a ``$contains`` literal substring match."""
+
+    return re.compile(re.escape(text), re.IGNORECASE if case_insensitive else 0)
+
+
+def _regex_match(pattern: str, value: Any, *, case_insensitive: bool) -> bool:
+    compiled = compile_regex(pattern, case_insensitive)
+    subject = str(value or "")[:MAX_REGEX_SUBJECT_LENGTH]
+    return compiled.search(subject) is not None
 
 
 def value_matches(doc_value: Any, condition_value: Any) -> bool:
     """Evaluate a single field against a Mongo-style condition."""
 
     if isinstance(condition_value, dict):
+        if "$contains" in condition_value:
+            # Literal substring; case-insensitive unless $options omits "i"
+            options = condition_value.get("$options", "i")
+            compiled = compile_literal(
+                str(condition_value["$contains"]), "i" in options
+            )
+            return compiled.search(str(doc_value or "")) is not None
         if "$regex" in condition_value:
             pattern = condition_value["$regex"]
             case_insensitive = "i" in condition_value.get("$options", "")
@@ -74,6 +197,40 @@ def document_matches(document: Dict[str, Any], query: Optional[Dict[str, Any]])
     return True
 
 
+def _uses_regex(query: Any) -> bool:
+    if isinstance(query, dict):
+        return "$regex" in query or any(_uses_regex(v) for v in query.values())
+    if isinstance(query, list):
+        return any(_uses_regex(item) for item in query)
+    return False
+
+
+def query_matcher(
+    query: Optional[Dict[str, Any]], budget_seconds: Optional[float] = None
+) -> Callable[[Dict[str, Any]], bool]:
+    """Predicate for ``query``; regex queries get a CPU time budget.
+
+    The budget covers evaluating the query across the scanned documents and
+    raises :class:`QueryBudgetExceeded` once spent, so a single expensive
+    search cannot occupy a worker indefinitely.
+    """
+
+    if not budget_seconds or not _uses_regex(query):
+        return lambda document: document_matches(document, query)
+
+    deadline: List[float] = []
+
+    def matches(document: Dict[str, Any]) -> bool:
+        now = time.monotonic()
+        if not deadline:
+            deadline.append(now + budget_seconds)
+        elif now > deadline[0]:
+            raise QueryBudgetExceeded("regex time budget exhausted")
+        return document_matches(document, query)
+
+    return matches
+
+
 def apply_set(document: Dict[str, Any], updates: Dict[str, Any]) -> None:
     """Apply a $set style update operation to a document in-place."""
 
@@ -81,6 +238,72 @@ def apply_set(document: Dict[str, Any], updates: Dict[str, Any]) -> None:
         document[key] = value
 
 
+def coerce_number(value: Any) -> float:
+    """Coerce stored amounts (numbers or strings like "100,50") to float."""
+
+    try:
+        # Handle strings like "100", "100.50", but maybe not "1.000,00"
+        if isinstance(value, str):
+            if not value.strip():
+                return 0.0
+            if "," in value and "." not in value:
+                value = value.replace(",", ".")
+        return float(value or 0)
+    except (ValueError, TypeError):
+        return 0.0
+
+
+def _group_key(document: Dict[str, Any], id_spec: Any) -> Any:
+    if isinstance(id_spec, str) and id_spec.startswith("$"):
+        return document.get(id_spec[1:])
+    return id_spec
+
+
+def _group_documents(
+    documents: List[Dict[str, Any]], group_spec: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """Single pass $group supporting ``_id: "$field"`` and ``$sum`` accumulators.
+
+    ``$sum`` accepts a field reference (``"$field"``) or a constant, so
+    ``{"$sum": 1}`` counts documents per group.
+    """
+
+    id_spec = group_spec.get("_id")
+    accumulators = []
+    for key, value in group_spec.items():
+        if key == "_id" or not isinstance(value, dict) or "$sum" not in value:
+            continue
+        raw = value["$sum"]
+        if isinstance(raw, str) and raw.startswith("$"):
+            accumulators.append((key, raw[1:], None))
+        else:
+            constant = raw if isinstance(raw, (int, float)) else coerce_number(raw)
+            accumulators.append((key, None, constant))
+
+    groups: Dict[Any, Dict[str, Any]] = {}
+    # A constant _id always yields one group, even for an empty input
+    if not (isinstance(id_spec, str) and id_spec.startswith("$")):
+        groups[id_spec] = {"_id": id_spec, **{key: 0 for key, _, _ in accumulators}}
+
+    for document in documents:
+        group_id = _group_key(document, id_spec)
+        try:
+            group = groups.get(group_id)
+        except TypeError:
+            # Unhashable group keys (lists, dicts) are grouped by their repr
+            group_id = repr(group_id)
+            group = groups.get(group_id)
+        if group is None:
+            group = {"_id": group_id, **{key: 0 for key, _, _ in accumulators}}
+            groups[group_id] = group
+        for key, field, constant in accumulators:
+            if field is not None:
+                group[key] += coerce_number(document.get(field, 0))
+            else:
+                group[key] += constant
+    return list(groups.values())
+
+
 def aggregate_pipeline(
     documents: List[Dict[str, Any]], pipeline: List[Dict[str, Any]]
 ) -> List[Dict[str, Any]]:
@@ -93,38 +316,5 @@ def aggregate_pipeline(
             results = [doc for doc in results if document_matches(doc, match_query)]
             continue
         if "$group" in stage:
-            group_spec = stage["$group"]
-            sum_key = None
-            sum_field = None
-            for key, value in group_spec.items():
-                if key == "_id":
-                    continue
-                if isinstance(value, dict) and "$sum" in value:
-                    sum_key = key
-                    raw = value["$sum"]
-                    if isinstance(raw, str) and raw.startswith("$"):
-                        sum_field = raw.lstrip("$")
-            total = 0
-            if sum_field:
-                for doc in results:
-                    try:
-                        val = doc.get(sum_field, 0)
-                        # Handle strings like "100", "100.50", but maybe not "1.000,00"
-                        if isinstance(val, str):
-                            # Simple cleanup for common formats if needed, or just let float() try
-                            # If it's empty string
-                            if not val.strip():
-                                val = 0
-                            else:
-                                val = (
-                                    val.replace(",", ".")
-                                    if "," in val and "." not in val
-                                    else val
-                                )
-                        total += float(val or 0)
-                    except (ValueError, TypeError):
-                        pass
-            results = (
-                [{"_id": group_spec.get("_id"), sum_key: total}] if sum_key else results
-            )
+            results = _group_documents(results, stage["$group"])
     return results
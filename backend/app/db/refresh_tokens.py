@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import secrets
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+import sqlalchemy as sa
+from app.db.base import Base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class RefreshTokenRecord(Base):
+    """Opaque refresh token, stored only as a SHA-256 hash."""
+
+    __tablename__ = "refresh_tokens"
+
+    id: Mapped[str] = mapped_column(sa.String(length=64), primary_key=True)
+    token_hash: Mapped[str] = mapped_column(
+        sa.String(length=64), nullable=False, unique=True, index=True
+    )
+    user_id: Mapped[str] = mapped_column(
+        sa.String(length=64), nullable=False, index=True
+    )
+    family_id: Mapped[str] = mapped_column(
+        sa.String(length=64), nullable=False, index=True
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=False), default=datetime.utcnow, nullable=False
+    )
+    expires_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=False), nullable=False
+    )
+    revoked_at: Mapped[Optional[datetime]] = mapped_column(
+        sa.DateTime(timezone=False), nullable=True
+    )
+    replaced_by: Mapped[Optional[str]] = mapped_column(
+        sa.String(length=64), nullable=True
+    )
+
+
+class RefreshTokenError(Exception):
+    """Raised when a refresh token is unknown, expired or already used."""
+
+
+@dataclass
+class IssuedRefreshToken:
+    token: str
+    user_id: str
+    family_id: str
+    expires_at: datetime
+
+
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class RefreshTokenStore:
+    """Rotating refresh tokens grouped into families.
+
+    Every refresh consumes the presented token and issues a successor in the
+    same family. Presenting an already consumed token means it leaked, so the
+    whole family is revoked.
+    """
+
+    def __init__(
+        self, session_factory: async_sessionmaker[AsyncSession], lifetime: timedelta
+    ) -> None:
+        self._session_factory = session_factory
+        self.lifetime = lifetime
+
+    def _new_record(
+        self, user_id: str, family_id: str, now: datetime
+    ) -> Tuple[RefreshTokenRecord, IssuedRefreshToken]:
+        token = secrets.token_urlsafe(48)
+        record = RefreshTokenRecord(
+            id=uuid.uuid4().hex,
+            token_hash=hash_refresh_token(token),
+            user_id=user_id,
+            family_id=family_id,
+            created_at=now,
+            expires_at=now + self.lifetime,
+        )
+        issued = IssuedRefreshToken(token, user_id, family_id, record.expires_at)
+        return record, issued
+
+    async def issue(self, user_id: str) -> IssuedRefreshToken:
+        now = datetime.utcnow()
+        record, issued = self._new_record(user_id, uuid.uuid4().hex, now)
+        async with self._session_factory() as session:
+            session.add(record)
+            await session.commit()
+        return issued
+
+    async def rotate(self, token: str) -> IssuedRefreshToken:
+        now = datetime.utcnow()
+        async with self._session_factory() as session:
+            result = await session.execute(
+                sa.select(RefreshTokenRecord).where(
+                    RefreshTokenRecord.token_hash == hash_refresh_token(token)
+                )
+            )
+            current = result.scalars().first()
+            if current is None:
+                raise RefreshTokenError("unknown")
+            if current.revoked_at is not None:
+                await self._revoke_family(session, current.family_id, now)
+                await session.commit()
+                raise RefreshTokenError("reused")
+            if current.expires_at <= now:
+                raise RefreshTokenError("expired")
+
+            successor, issued = self._new_record(
+                current.user_id, current.family_id, now
+            )
+            # Conditional update so two concurrent refreshes cannot both win.
+            consumed = await session.execute(
+                sa.update(RefreshTokenRecord)
+                .where(
+                    RefreshTokenRecord.id == current.id,
+                    RefreshTokenRecord.revoked_at.is_(None),
+                )
+                .values(revoked_at=now, replaced_by=successor.id)
+            )
+            if consumed.rowcount != 1:
+                await session.rollback()
+                raise RefreshTokenError("reused")
+            session.add(successor)
+            await session.commit()
+        return issued
+
+    async def revoke(self, token: str) -> Optional[str]:
+        """Revoke the family of ``token``; returns its user id if it was known."""
+
+        now = datetime.utcnow()
+        async with self._session_factory() as session:
+            result = await session.execute(
+                sa.select(
+                    RefreshTokenRecord.user_id, RefreshTokenRecord.family_id
+                ).where(RefreshTokenRecord.token_hash == hash_refresh_token(token))
+            )
+            row = result.first()
+            if row is None:
+                return None
+            await self._revoke_family(session, row.family_id, now)
+            await session.commit()
+            return row.user_id
+
+    async def revoke_user(self, user_id: str) -> None:
+        now = datetime.utcnow()
+        async with self._session_factory() as session:
+            await session.execute(
+                sa.update(RefreshTokenRecord)
+                .where(
+                    RefreshTokenRecord.user_id == user_id,
+                    RefreshTokenRecord.revoked_at.is_(None),
+                )
+                .values(revoked_at=now)
+            )
+            await session.commit()
+
+    async def purge_expired(self) -> int:
+        async with self._session_factory() as session:
+            result = await session.execute(
+                sa.delete(RefreshTokenRecord).where(
+                    RefreshTokenRecord.expires_at <= datetime.utcnow()
+                )
+            )
+            await session.commit()
+            return result.rowcount or 0
+
+    @staticmethod
+    async def _revoke_family(
+        session: AsyncSession, family_id: str, now: datetime
+    ) -> None:
+        await session.execute(
+            sa.update(RefreshTokenRecord)
+            .where(
+                RefreshTokenRecord.family_id == family_id,
+                RefreshTokenRecord.revoked_at.is_(None),
+            )
+            .values(revoked_at=now)
+        )
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import sqlalchemy as sa
+from app.db.base import Base
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class ScheduledJobRecord(Base):
+    """Schedule and last outcome of one background job, shared by all workers."""
+
+    __tablename__ = "scheduled_jobs"
+
+    name: Mapped[str] = mapped_column(sa.String(length=64), primary_key=True)
+    schedule: Mapped[str] = mapped_column(sa.String(length=64), nullable=False)
+    next_run_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=False), nullable=False, index=True
+    )
+    last_run_at: Mapped[Optional[datetime]] = mapped_column(
+        sa.DateTime(timezone=False), nullable=True
+    )
+    last_status: Mapped[Optional[str]] = mapped_column(
+        sa.String(length=16), nullable=True
+    )
+    last_duration_ms: Mapped[Optional[float]] = mapped_column(sa.Float, nullable=True)
+    last_error: Mapped[Optional[str]] = mapped_column(sa.Text, nullable=True)
+    lease_owner: Mapped[Optional[str]] = mapped_column(
+        sa.String(length=128), nullable=True
+    )
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(
+        sa.DateTime(timezone=False), nullable=True
+    )
+
+
+class JobRunRecord(Base):
+    """One execution of a background job."""
+
+    __tablename__ = "job_runs"
+
+    id: Mapped[str] = mapped_column(sa.String(length=64), primary_key=True)
+    job_name: Mapped[str] = mapped_column(
+        sa.String(length=64), nullable=False, index=True
+    )
+    trigger: Mapped[str] = mapped_column(sa.String(length=16), nullable=False)
+    worker: Mapped[str] = mapped_column(sa.String(length=128), nullable=False)
+    status: Mapped[str] = mapped_column(sa.String(length=16), nullable=False)
+    started_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=False), nullable=False, index=True
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(
+        sa.DateTime(timezone=False), nullable=True
+    )
+    duration_ms: Mapped[Optional[float]] = mapped_column(sa.Float, nullable=True)
+    rows_processed: Mapped[Optional[int]] = mapped_column(sa.Integer, nullable=True)
+    result: Mapped[Optional[Dict[str, Any]]] = mapped_column(sa.JSON, nullable=True)
+    error: Mapped[Optional[str]] = mapped_column(sa.Text, nullable=True)
+
+
+@dataclass
+class JobLease:
+    name: str
+    owner: str
+    expires_at: datetime
+    # When the job was due; later than this means it is catching up
+    due_at: datetime
+
+
+def _job_dict(record: ScheduledJobRecord) -> Dict[str, Any]:
+    return {
+        "name": record.name,
+        "schedule": record.schedule,
+        "next_run_at": record.next_run_at,
+        "last_run_at": record.last_run_at,
+        "last_status": record.last_status,
+        "last_duration_ms": record.last_duration_ms,
+        "last_error": record.last_error,
+        "running": record.lease_owner is not None
+        and record.lease_expires_at is not None
+        and record.lease_expires_at > datetime.utcnow(),
+    }
+
+
+def _run_dict(record: JobRunRecord) -> Dict[str, Any]:
+    return {
+        "id": record.id,
+        "job_name": record.job_name,
+        "trigger": record.trigger,
+        "worker": record.worker,
+        "status": record.status,
+        "started_at": record.started_at,
+        "finished_at": record.finished_at,
+        "duration_ms": record.duration_ms,
+        "rows_processed": record.rows_processed,
+        "result": record.result,
+        "error": record.error,
+    }
+
+
+class JobStore:
+    """Job rows with time-limited leases, plus the history of their runs.
+
+    A worker may only run a job after winning a conditional update that sets
+    it as the lease owner, so with several workers each due run executes
+    once. A lease left behind by a crashed worker expires and the job becomes
+    claimable again.
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self._session_factory = session_factory
+
+    async def register(self, name: str, schedule: str, next_run_at: datetime) -> None:
+        """Create the job row, or update its schedule if it changed.
+
+        A stored ``next_run_at`` in the past is kept, so a run missed while
+        the service was down still happens (once) after startup.
+        """
+
+        async with self._session_factory() as session:
+            record = await session.get(ScheduledJobRecord, name)
+            if record is None:
+                session.add(
+                    ScheduledJobRecord(
+                        name=name, schedule=schedule, next_run_at=next_run_at
+                    )
+                )
+            elif record.schedule != schedule:
+                record.schedule = schedule
+                record.next_run_at = next_run_at
+            else:
+                return
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Another worker registered it first
+                await session.rollback()
+
+    async def due(self, now: datetime) -> List[str]:
+        async with self._session_factory() as session:
+            result = await session.execute(
+                sa.select(ScheduledJobRecord.name)
+                .where(ScheduledJobRecord.next_run_at <= now)
+                .order_by(ScheduledJobRecord.next_run_at)
+            )
+            return list(result.scalars())
+
+    async def claim(
+        self,
+        name: str,
+        owner: str,
+        now: datetime,
+        lease: timedelta,
+        force: bool = False,
+    ) -> Optional[JobLease]:
+        """Take the lease of a due job (any idle job if ``force``)."""
+
+        conditions = [
+            ScheduledJobRecord.name == name,
+            sa.or_(
+                ScheduledJobRecord.lease_expires_at.is_(None),
+                ScheduledJobRecord.lease_expires_at <= now,
+            ),
+        ]
+        if not force:
+            conditions.append(ScheduledJobRecord.next_run_at <= now)
+        async with self._session_factory() as session:
+            due_at = await session.scalar(
+                sa.select(ScheduledJobRecord.next_run_at).where(*conditions)
+            )
+            if due_at is None:
+                return None
+            # Conditional update so two workers cannot both win the lease
+            claimed = await session.execute(
+                sa.update(ScheduledJobRecord)
+                .where(*conditions)
+                .values(lease_owner=owner, lease_expires_at=now + lease)
+            )
+            if claimed.rowcount != 1:
+                await session.rollback()
+                return None
+            await session.commit()
+        return JobLease(name, owner, now + lease, due_at)
+
+    async def renew(self, job: JobLease, lease: timedelta) -> bool:
+        expires_at = datetime.utcnow() + lease
+        async with self._session_factory() as session:
+            renewed = await session.execute(
+                sa.update(ScheduledJobRecord)
+                .where(
+                    ScheduledJobRecord.name == job.name,
+                    ScheduledJobRecord.lease_owner == job.owner,
+                )
+                .values(lease_expires_at=expires_at)
+            )
+            await session.commit()
+        if renewed.rowcount == 1:
+            job.expires_at = expires_at
+        return renewed.rowcount == 1
+
+    async def complete(
+        self,
+        job: JobLease,
+        *,
+        status: str,
+        started_at: datetime,
+        duration_ms: float,
+        next_run_at: Optional[datetime],
+        error: Optional[str] = None,
+    ) -> None:
+        """Record the outcome, schedule the next run and release the lease.
+
+        ``next_run_at=None`` keeps the stored next run (an on-demand run).
+        """
+
+        values: Dict[str, Any] = {
+            "last_run_at": started_at,
+            "last_status": status,
+            "last_duration_ms": duration_ms,
+            "last_error": error,
+            "lease_owner": None,
+            "lease_expires_at": None,
+        }
+        if next_run_at is not None:
+            values["next_run_at"] = next_run_at
+        async with self._session_factory() as session:
+            await session.execute(
+                sa.update(ScheduledJobRecord)
+                .where(
+                    ScheduledJobRecord.name == job.name,
+                    ScheduledJobRecord.lease_owner == job.owner,
+                )
+                .values(**values)
+            )
+            await session.commit()
+
+    async def list(self) -> List[Dict[str, Any]]:
+        async with self._session_factory() as session:
+            result = await session.execute(
+                sa.select(ScheduledJobRecord).order_by(ScheduledJobRecord.name)
+            )
+            return [_job_dict(record) for record in result.scalars()]
+
+    async def start_run(self, job: JobLease, trigger: str) -> str:
+        run_id = uuid.uuid4().hex
+        async with self._session_factory() as session:
+            session.add(
+                JobRunRecord(
+                    id=run_id,
+                    job_name=job.name,
+                    trigger=trigger,
+                    worker=job.owner,
+                    status="running",
+                    started_at=datetime.utcnow(),
+                )
+            )
+            await session.commit()
+        return run_id
+
+    async def finish_run(
+        self,
+        run_id: str,
+        *,
+        status: str,
+        duration_ms: float,
+        rows_processed: Optional[int] = None,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        async with self._session_factory() as session:
+            await session.execute(
+                sa.update(JobRunRecord)
+                .where(JobRunRecord.id == run_id)
+                .values(
+                    status=status,
+                    finished_at=datetime.utcnow(),
+                    duration_ms=duration_ms,
+                    rows_processed=rows_processed,
+                    result=result,
+                    error=error,
+                )
+            )
+            await session.commit()
+
+    async def runs(
+        self, job_name: Optional[str] = None, limit: int = 50
+    ) -> List[Dict[str, Any]]:
+        """Most recent runs first."""
+
+        stmt = sa.select(JobRunRecord).order_by(JobRunRecord.started_at.desc())
+        if job_name:
+            stmt = stmt.where(JobRunRecord.job_name == job_name)
+        async with self._session_factory() as session:
+            result = await session.execute(stmt.limit(limit))
+            return [_run_dict(record) for record in result.scalars()]
+
+    async def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        async with self._session_factory() as session:
+            record = await session.get(JobRunRecord, run_id)
+            return _run_dict(record) if record is not None else None
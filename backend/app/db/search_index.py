@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import logging
+import re
+import unicodedata
+from copy import deepcopy
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Indexed fields per collection with their (whole word, prefix) weights.
+# Ranking tiers: exact identifiers (OIB, contract number) > names > addresses
+# > free-text notes; a prefix hit always scores below the whole word.
+IDENTIFIER = (8.0, 1.0)
+NAME = (3.0, 2.0)
+ADDRESS = (1.5, 1.0)
+NOTES = (1.0, 0.5)
+
+SEARCH_FIELDS: Dict[str, Dict[str, Tuple[float, float]]] = {
+    "nekretnine": {"naziv": NAME, "adresa": ADDRESS, "katastarska_opcina": NOTES},
+    "zakupnici": {"naziv_firme": NAME, "ime_prezime": NAME, "oib": IDENTIFIER},
+    "ugovori": {"interna_oznaka": IDENTIFIER, "napomena": NOTES},
+}
+
+MIN_PREFIX = 2
+MAX_PREFIX = 20
+# Score of a mid-word (substring) hit per query token, below any prefix hit
+SUBSTRING_WEIGHT = 0.25
+
+# đ has no Unicode decomposition, so NFKD alone would leave it untouched
+_EXTRA_FOLDS = str.maketrans({"đ": "d", "Đ": "d", "ß": "ss"})
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+DocKey = Tuple[str, str]
+
+
+def normalize_text(value: Any) -> str:
+    """Case- and diacritic-fold text: "Šestinski Đir" -> "sestinski dir"."""
+
+    text = str(value or "").translate(_EXTRA_FOLDS)
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return text.casefold()
+
+
+def tokenize(value: Any) -> List[str]:
+    return _TOKEN_RE.findall(normalize_text(value))
+
+
+def _prefixes(token: str) -> List[str]:
+    top = min(len(token), MAX_PREFIX)
+    prefixes = [token[:length] for length in range(MIN_PREFIX, top + 1)]
+    if len(token) > MAX_PREFIX:
+        prefixes.append(token)
+    return prefixes
+
+
+@dataclass
+class SearchHit:
+    collection: str
+    document_id: str
+    score: float
+    document: Dict[str, Any]
+
+
+class SearchIndex:
+    """In-memory inverted index over the searchable collections.
+
+    Every token of an indexed field is expanded into its prefixes
+    (``MIN_PREFIX``..``MAX_PREFIX`` characters), so prefix lookups are a
+    single dictionary access. Postings map to a weight: whole-token matches
+    outrank prefix matches and fields carry their own weight.
+
+    The index is built lazily from the store, kept up to date by a document
+    store write listener and rebuilt by :meth:`ensure_current` when the
+    stored collections changed through another worker.
+    """
+
+    def __init__(self, database: Any) -> None:
+        self._database = database
+        # collections_version(SEARCH_FIELDS) the index was built from
+        self._version: Optional[str] = None
+        self._postings: Dict[str, Dict[DocKey, float]] = {}
+        self._doc_terms: Dict[DocKey, Set[str]] = {}
+        self._documents: Dict[DocKey, Dict[str, Any]] = {}
+        # Folded tokens of the indexed fields, for the substring fallback
+        self._texts: Dict[DocKey, str] = {}
+        self._ready = False
+        self._build: Optional[asyncio.Task] = None
+        self._pending: Optional[List[Any]] = None
+
+    # -- maintenance -----------------------------------------------------
+
+    def _remove(self, key: DocKey) -> None:
+        for term in self._doc_terms.pop(key, ()):
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self._postings[term]
+        self._documents.pop(key, None)
+        self._texts.pop(key, None)
+
+    def _add(self, collection: str, document: Dict[str, Any]) -> None:
+        document_id = document.get("id")
+        if not document_id:
+            return
+        key = (collection, str(document_id))
+        self._remove(key)
+
+        weights: Dict[str, float] = {}
+        tokens: List[str] = []
+        for field, (exact_weight, prefix_weight) in SEARCH_FIELDS[collection].items():
+            for token in tokenize(document.get(field)):
+                tokens.append(token)
+                for prefix in _prefixes(token):
+                    if prefix == token:
+                        weight = exact_weight
+                    else:
+                        weight = prefix_weight * (0.5 + 0.5 * len(prefix) / len(token))
+                    if weight > weights.get(prefix, 0.0):
+                        weights[prefix] = weight
+
+        for term, weight in weights.items():
+            self._postings.setdefault(term, {})[key] = weight
+        self._doc_terms[key] = set(weights)
+        self._documents[key] = document
+        self._texts[key] = " ".join(tokens)
+
+    def _apply(self, events: List[Any]) -> None:
+        for event in events:
+            if event.collection not in SEARCH_FIELDS:
+                continue
+            if event.after is not None:
+                self._add(event.collection, deepcopy(event.after))
+            elif event.before is not None and event.before.get("id"):
+                self._remove((event.collection, str(event.before["id"])))
+
+    async def on_write(self, events: List[Any]) -> None:
+        """Document store write listener."""
+
+        if self._pending is not None:
+            # A build is loading snapshots; replay these once it finishes
+            self._pending.extend(events)
+        elif self._ready:
+            self._apply(events)
+
+    async def ensure_built(self) -> None:
+        if self._ready:
+            return
+        # Concurrent first queries share a single build
+        if self._build is None or self._build.done():
+            self._build = asyncio.ensure_future(self.rebuild())
+        await asyncio.shield(self._build)
+
+    async def ensure_current(self) -> None:
+        """Build the index, or rebuild it when a searchable collection changed
+        in the database since it was built (e.g. through another worker)."""
+
+        version = await self._database.collections_version(SEARCH_FIELDS)
+        if self._ready and version == self._version:
+            return
+        if self._build is None or self._build.done():
+            self._build = asyncio.ensure_future(self.rebuild(version))
+        await asyncio.shield(self._build)
+
+    async def rebuild(self, version: Optional[str] = None) -> None:
+        self._pending = []
+        try:
+            self._postings = {}
+            self._doc_terms = {}
+            self._documents = {}
+            self._texts = {}
+            # Load the source collections concurrently
+            loaded = await asyncio.gather(
+                *(
+                    self._database[collection].find({}).to_list(None)
+                    for collection in SEARCH_FIELDS
+                )
+            )
+            for collection, documents in zip(SEARCH_FIELDS, loaded):
+                for document in documents:
+                    self._add(collection, document)
+            self._apply(self._pending)
+            self._version = version
+            self._ready = True
+        finally:
+            self._pending = None
+        logger.info("Search index built with %s documents", len(self._documents))
+
+    # -- queries ---------------------------------------------------------
+
+    def _offer(
+        self,
+        heap: List[Tuple[float, str]],
+        key: DocKey,
+        score: float,
+        tenant_id: Optional[str],
+        limit: int,
+    ) -> None:
+        owner = self._documents[key].get("tenant_id")
+        if tenant_id and owner and owner != tenant_id:
+            return
+        entry = (score, key[1])
+        if len(heap) < limit:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def _term_postings(self, token: str) -> Dict[DocKey, float]:
+        if len(token) > MAX_PREFIX:
+            exact = self._postings.get(token)
+            if exact is not None:
+                return exact
+            token = token[:MAX_PREFIX]
+        return self._postings.get(token, {})
+
+    def search(
+        self,
+        query: str,
+        tenant_id: Optional[str] = None,
+        collections: Optional[Iterable[str]] = None,
+        limit: int = 10,
+    ) -> Dict[str, List[SearchHit]]:
+        """Top ``limit`` documents per collection matching every query token.
+
+        Tokens match as word prefixes. A collection without any prefix hit
+        falls back to matching the tokens anywhere inside words (as the old
+        substring search did), ranked below every prefix hit. Each
+        collection keeps a bounded min-heap, so only ``limit`` hits per type
+        are ever materialised. ``tenant_id`` restricts results to that
+        tenant's and global documents, mirroring tenant-scoped queries.
+        """
+
+        wanted = list(collections) if collections is not None else list(SEARCH_FIELDS)
+        results: Dict[str, List[SearchHit]] = {name: [] for name in wanted}
+        tokens = [token for token in tokenize(query) if len(token) >= MIN_PREFIX]
+        if not tokens or limit <= 0:
+            return results
+
+        postings = sorted((self._term_postings(token) for token in tokens), key=len)
+        # Drive the intersection from the rarest term
+        heaps: Dict[str, List[Tuple[float, str]]] = {name: [] for name in wanted}
+        for key, score in postings[0].items():
+            heap = heaps.get(key[0])
+            if heap is None:
+                continue
+            for other in postings[1:]:
+                weight = other.get(key)
+                if weight is None:
+                    break
+                score += weight
+            else:
+                self._offer(heap, key, score, tenant_id, limit)
+
+        missing = {name for name, heap in heaps.items() if not heap}
+        if missing:
+            # Mid-word hits ("2345" inside an OIB); a scan, but only on a miss
+            score = SUBSTRING_WEIGHT * len(tokens)
+            for key, text in self._texts.items():
+                if key[0] in missing and all(token in text for token in tokens):
+                    self._offer(heaps[key[0]], key, score, tenant_id, limit)
+
+        for collection, heap in heaps.items():
+            results[collection] = [
+                SearchHit(
+                    collection,
+                    document_id,
+                    score,
+                    self._documents[(collection, document_id)],
+                )
+                for score, document_id in sorted(heap, reverse=True)
+            ]
+        return results
@@ -0,0 +1,368 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from app.db.search_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# Documents without a tenant_id are visible to every tenant (see app.db.tenant)
+GLOBAL_TENANT_KEY = "__global__"
+
+# Fields offered as typeahead suggestions, per collection
+SUGGEST_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "zakupnici": ("naziv_firme", "ime_prezime", "oib"),
+    "nekretnine": ("naziv",),
+    "ugovori": ("interna_oznaka",),
+}
+
+SHORT_PREFIX = 2
+MAX_COMPLETIONS = 20
+
+# (collection, document id, field)
+Entry = Tuple[str, str, str]
+
+
+class _Node:
+    __slots__ = ("children", "entries")
+
+    def __init__(self) -> None:
+        # first character of the edge -> (edge label, child)
+        self.children: Dict[str, Tuple[str, _Node]] = {}
+        self.entries: Set[Entry] = set()
+
+
+class PrefixTrie:
+    """Compressed (radix) prefix trie mapping keys to sets of entries.
+
+    Edges carry whole substrings and chains of single-child nodes are merged,
+    so the depth is bounded by the number of branching points rather than the
+    key length.
+    """
+
+    def __init__(self) -> None:
+        self._root = _Node()
+        self.size = 0
+        # Completions of very short prefixes span most of the trie; they are
+        # memoised until the next mutation.
+        self._short_cache: Dict[str, List[Entry]] = {}
+
+    def insert(self, key: str, entry: Entry) -> None:
+        node, rest = self._root, key
+        while rest:
+            edge = node.children.get(rest[0])
+            if edge is None:
+                child = _Node()
+                node.children[rest[0]] = (rest, child)
+                node, rest = child, ""
+                break
+            label, child = edge
+            common = len(os.path.commonprefix([label, rest]))
+            if common < len(label):
+                # Split the edge at the point where the keys diverge
+                middle = _Node()
+                middle.children[label[common]] = (label[common:], child)
+                node.children[rest[0]] = (label[:common], middle)
+                child = middle
+            node, rest = child, rest[common:]
+        if entry not in node.entries:
+            node.entries.add(entry)
+            self.size += 1
+            self._short_cache.clear()
+
+    def remove(self, key: str, entry: Entry) -> None:
+        path: List[Tuple[_Node, str]] = []
+        node, rest = self._root, key
+        while rest:
+            edge = node.children.get(rest[0])
+            if edge is None or not rest.startswith(edge[0]):
+                return
+            path.append((node, rest[0]))
+            node, rest = edge[1], rest[len(edge[0]) :]
+        if entry not in node.entries:
+            return
+        node.entries.discard(entry)
+        self.size -= 1
+        self._short_cache.clear()
+
+        # Prune empty leaves and re-merge single-child chains bottom-up
+        while path:
+            parent, first = path.pop()
+            label, child = parent.children[first]
+            if child.entries:
+                break
+            if not child.children:
+                del parent.children[first]
+                continue
+            if len(child.children) == 1:
+                ((grand_label, grand_child),) = child.children.values()
+                parent.children[first] = (label + grand_label, grand_child)
+            break
+
+    def _locate(self, prefix: str) -> Optional[_Node]:
+        node, rest = self._root, prefix
+        while rest:
+            edge = node.children.get(rest[0])
+            if edge is None:
+                return None
+            label, child = edge
+            if label.startswith(rest):
+                return child
+            if not rest.startswith(label):
+                return None
+            node, rest = child, rest[len(label) :]
+        return node
+
+    def iter_prefix(self, prefix: str) -> Iterator[Entry]:
+        """Entries whose key starts with ``prefix``, shortest keys first."""
+
+        start = self._locate(prefix)
+        if start is None:
+            return
+        # Best-first walk ordered by key length; edges vary in length, so a
+        # plain breadth-first walk would not yield shorter keys first.
+        counter = itertools.count()
+        heap = [(0, next(counter), start)]
+        while heap:
+            depth, _, node = heapq.heappop(heap)
+            yield from sorted(node.entries)
+            for first in sorted(node.children):
+                label, child = node.children[first]
+                heapq.heappush(heap, (depth + len(label), next(counter), child))
+
+    def complete(self, prefix: str, limit: int) -> List[Entry]:
+        """Up to ``limit`` distinct entries under ``prefix``, shortest first."""
+
+        short = len(prefix) <= SHORT_PREFIX and limit <= MAX_COMPLETIONS
+        if short:
+            cached = self._short_cache.get(prefix)
+            if cached is not None:
+                return cached[:limit]
+        wanted = MAX_COMPLETIONS if short else limit
+        found: List[Entry] = []
+        seen: Set[Entry] = set()
+        for entry in self.iter_prefix(prefix):
+            if entry not in seen:
+                seen.add(entry)
+                found.append(entry)
+                if len(found) >= wanted:
+                    break
+        if short:
+            self._short_cache[prefix] = found
+        return found[:limit]
+
+
+def _keys(value: Any) -> List[str]:
+    """Trie keys for a field value: the folded phrase from every word on."""
+
+    tokens = tokenize(value)
+    return [" ".join(tokens[index:]) for index in range(len(tokens))]
+
+
+def _tenant_key(document: Dict[str, Any]) -> str:
+    return document.get("tenant_id") or GLOBAL_TENANT_KEY
+
+
+class SuggestionIndex:
+    """Per-tenant typeahead tries over :data:`SUGGEST_FIELDS`.
+
+    A tenant's trie is built from the store the first time that tenant asks
+    for suggestions; from then on a document store write listener keeps it
+    current, and :meth:`ensure_current` rebuilds it when the stored
+    collections changed through another worker. Values are indexed from every
+    word on, so "sibe" suggests "Poslovni centar Šibenik".
+    """
+
+    def __init__(self, database: Any) -> None:
+        self._database = database
+        self._tries: Dict[str, PrefixTrie] = {}
+        self._labels: Dict[Entry, str] = {}
+        self._doc_keys: Dict[Tuple[str, str], List[Tuple[str, str, Entry]]] = {}
+        self._built: Set[str] = set()
+        self._complete = False
+        self._builds: Dict[Optional[str], asyncio.Future] = {}
+        # Stored collections_version each scope's tries were checked against
+        self._versions: Dict[Optional[str], str] = {}
+        # Events that arrive while a build is loading; ``None`` = all tenants
+        self._pending: Dict[Optional[str], List[Any]] = {}
+
+    def _add(self, collection: str, document: Dict[str, Any]) -> None:
+        document_id = document.get("id")
+        if not document_id:
+            return
+        doc_key = (collection, str(document_id))
+        self._remove(doc_key)
+        tenant_key = _tenant_key(document)
+        trie = self._tries.setdefault(tenant_key, PrefixTrie())
+        inserted = []
+        for field in SUGGEST_FIELDS[collection]:
+            value = document.get(field)
+            if not value:
+                continue
+            entry = (collection, str(document_id), field)
+            self._labels[entry] = str(value)
+            for key in _keys(value):
+                trie.insert(key, entry)
+                inserted.append((tenant_key, key, entry))
+        self._doc_keys[doc_key] = inserted
+
+    def _remove(self, doc_key: Tuple[str, str]) -> None:
+        for tenant_key, key, entry in self._doc_keys.pop(doc_key, ()):
+            trie = self._tries.get(tenant_key)
+            if trie is not None:
+                trie.remove(key, entry)
+            self._labels.pop(entry, None)
+
+    def _apply(self, event: Any) -> None:
+        if event.after is not None:
+            self._add(event.collection, event.after)
+        elif event.before is not None and event.before.get("id"):
+            self._remove((event.collection, str(event.before["id"])))
+
+    async def on_write(self, events: List[Any]) -> None:
+        """Document store write listener."""
+
+        for event in events:
+            if event.collection not in SUGGEST_FIELDS:
+                continue
+            tenant_keys = {
+                _tenant_key(document)
+                for document in (event.before, event.after)
+                if document is not None
+            }
+            buffers = [
+                self._pending[key]
+                for key in tenant_keys | {None}
+                if key in self._pending
+            ]
+            for buffer in buffers:
+                buffer.append(event)
+            if not buffers and (self._complete or tenant_keys & self._built):
+                self._apply(event)
+
+    async def _build(self, tenant_key: Optional[str]) -> None:
+        """Load one tenant's documents (every tenant's if ``None``)."""
+
+        if tenant_key is None:
+            query: Dict[str, Any] = {}
+        elif tenant_key == GLOBAL_TENANT_KEY:
+            query = {"tenant_id": None}
+        else:
+            query = {"tenant_id": tenant_key}
+
+        self._pending[tenant_key] = []
+        try:
+            loaded = await asyncio.gather(
+                *(
+                    self._database[collection].find(query).to_list(None)
+                    for collection in SUGGEST_FIELDS
+                )
+            )
+            for collection, documents in zip(SUGGEST_FIELDS, loaded):
+                for document in documents:
+                    self._add(collection, document)
+            # Replaying is idempotent: _add replaces a document's keys
+            for event in self._pending[tenant_key]:
+                self._apply(event)
+            if tenant_key is None:
+                self._complete = True
+            else:
+                self._tries.setdefault(tenant_key, PrefixTrie())
+                self._built.add(tenant_key)
+        finally:
+            self._pending.pop(tenant_key, None)
+        logger.info("Built typeahead trie for %s", tenant_key or "all tenants")
+
+    async def ensure_built(self, tenant_id: Optional[str]) -> None:
+        """Build the tries ``tenant_id`` can see (all of them if unscoped)."""
+
+        if self._complete:
+            return
+        wanted = [tenant_id, GLOBAL_TENANT_KEY] if tenant_id else [None]
+        for key in wanted:
+            if key in self._built:
+                continue
+            # Concurrent first requests share a single build
+            build = self._builds.get(key)
+            if build is None or build.done():
+                build = asyncio.ensure_future(self._build(key))
+                self._builds[key] = build
+            await asyncio.shield(build)
+
+    def _discard(self, tenant_key: Optional[str]) -> None:
+        """Forget one tenant's trie (every trie if ``None``) so it is reloaded."""
+
+        if tenant_key is None:
+            self._tries = {}
+            self._labels = {}
+            self._doc_keys = {}
+            self._built = set()
+        else:
+            self._tries.pop(tenant_key, None)
+            for doc_key, inserted in list(self._doc_keys.items()):
+                if inserted and inserted[0][0] == tenant_key:
+                    for _, _, entry in inserted:
+                        self._labels.pop(entry, None)
+                    del self._doc_keys[doc_key]
+            self._built.discard(tenant_key)
+        # The other tries are still current, but no longer make up all of them
+        self._complete = False
+
+    async def ensure_current(self, tenant_id: Optional[str]) -> None:
+        """:meth:`ensure_built`, first dropping the tries ``tenant_id`` sees when
+        their collections changed in the database (e.g. through another
+        worker) since they were last checked."""
+
+        version = await self._database.collections_version(SUGGEST_FIELDS, tenant_id)
+        if self._versions.get(tenant_id) == version:
+            await self.ensure_built(tenant_id)
+            return
+        wanted = [tenant_id, GLOBAL_TENANT_KEY] if tenant_id else [None]
+        busy = False
+        for key in wanted:
+            build = self._builds.get(key)
+            if build is not None and not build.done():
+                # Already loading; it may predate ``version``, so check again
+                busy = True
+            else:
+                self._discard(key)
+        await self.ensure_built(tenant_id)
+        if not busy:
+            self._versions[tenant_id] = version
+
+    def suggest(
+        self, prefix: str, tenant_id: Optional[str] = None, limit: int = 8
+    ) -> List[Dict[str, Any]]:
+        key = " ".join(tokenize(prefix))
+        if not key or limit <= 0:
+            return []
+        if tenant_id:
+            # A tenant sees its own documents and global ones
+            tries = [
+                self._tries[name]
+                for name in (tenant_id, GLOBAL_TENANT_KEY)
+                if name in self._tries
+            ]
+        else:
+            tries = list(self._tries.values())
+
+        results: List[Dict[str, Any]] = []
+        for trie in tries:
+            for entry in trie.complete(key, limit - len(results)):
+                collection, document_id, field = entry
+                results.append(
+                    {
+                        "tip": collection,
+                        "id": document_id,
+                        "polje": field,
+                        "tekst": self._labels[entry],
+                    }
+                )
+            if len(results) >= limit:
+                break
+        return results
@@ -161,6 +161,11 @@ class TenantAwareDatabase:
     def __init__(self, db: MariaDBDatabase):
         self._db = db
 
+    def transaction(self):
+        """See :meth:`MariaDBDatabase.transaction`."""
+
+        return self._db.transaction()
+
     def __getattr__(self, item: str) -> TenantAwareCollection:
         return TenantAwareCollection(self._db[item], item)
 
@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import sqlalchemy as sa
+from app.db.base import Base
+from app.db.query_utils import coerce_number
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.ext.mutable import MutableDict
+from sqlalchemy.orm import Mapped, mapped_column
+
+logger = logging.getLogger(__name__)
+
+# Documents without a tenant_id are visible to every tenant (see app.db.tenant)
+GLOBAL_TENANT_KEY = "__global__"
+
+KPI_SOURCE_COLLECTIONS = ("nekretnine", "ugovori", "maintenance_tasks", "podsjetnici")
+
+Path = Tuple[str, ...]
+
+
+class TenantKpiRecord(Base):
+    """Materialised dashboard counters for one tenant."""
+
+    __tablename__ = "tenant_kpis"
+
+    tenant_key: Mapped[str] = mapped_column(sa.String(length=64), primary_key=True)
+    data: Mapped[Dict[str, Any]] = mapped_column(
+        MutableDict.as_mutable(sa.JSON()), nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=False),
+        default=datetime.utcnow,
+        onupdate=datetime.utcnow,
+        nullable=False,
+    )
+
+
+def empty_kpis() -> Dict[str, Any]:
+    return {
+        "properties": 0,
+        "portfolio_value": 0.0,
+        "contracts": {},
+        "maintenance": {},
+        "open_reminders": 0,
+    }
+
+
+def _status(document: Dict[str, Any]) -> str:
+    # Freshly written documents may still hold Enum members instead of strings
+    status = document.get("status")
+    return str(getattr(status, "value", status))
+
+
+def _contributions(
+    collection: str, document: Dict[str, Any]
+) -> List[Tuple[Path, float]]:
+    """What a single document adds to its tenant's KPI row."""
+
+    if collection == "nekretnine":
+        return [
+            (("properties",), 1),
+            (("portfolio_value",), coerce_number(document.get("trzisna_vrijednost"))),
+        ]
+    if collection == "ugovori":
+        status = _status(document)
+        return [
+            (("contracts", status, "count"), 1),
+            (
+                ("contracts", status, "rent"),
+                coerce_number(document.get("osnovna_zakupnina")),
+            ),
+        ]
+    if collection == "maintenance_tasks":
+        return [(("maintenance", _status(document)), 1)]
+    if collection == "podsjetnici":
+        return [(("open_reminders",), 1)] if document.get("zavrseno") is False else []
+    return []
+
+
+def _tenant_key(document: Dict[str, Any]) -> str:
+    return document.get("tenant_id") or GLOBAL_TENANT_KEY
+
+
+def _apply(data: Dict[str, Any], path: Path, amount: float) -> None:
+    node = data
+    for key in path[:-1]:
+        node = node.setdefault(key, {})
+    node[path[-1]] = node.get(path[-1], 0) + amount
+
+
+def _prune(data: Dict[str, Any]) -> None:
+    """Drop status buckets that no document occupies any more."""
+
+    for status in [s for s, v in data["contracts"].items() if not v.get("count")]:
+        del data["contracts"][status]
+    for status in [s for s, v in data["maintenance"].items() if not v]:
+        del data["maintenance"][status]
+
+
+def merge_kpis(rows: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    merged = empty_kpis()
+    for row in rows:
+        merged["properties"] += row.get("properties", 0)
+        merged["portfolio_value"] += row.get("portfolio_value", 0.0)
+        merged["open_reminders"] += row.get("open_reminders", 0)
+        for status, values in row.get("contracts", {}).items():
+            for key, value in values.items():
+                _apply(merged, ("contracts", status, key), value)
+        for status, value in row.get("maintenance", {}).items():
+            _apply(merged, ("maintenance", status), value)
+    return merged
+
+
+class TenantKpiStore:
+    """Per-tenant KPI rows kept current by document store write events.
+
+    Each committed write subtracts the contribution of the old document and
+    adds that of the new one, so the dashboard reads counters instead of
+    scanning collections. :meth:`rebuild` recomputes every row from scratch
+    to repair drift (e.g. events lost when a process died mid-write).
+    """
+
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self._session_factory = session_factory
+
+    async def on_write(self, events: List[Any]) -> None:
+        deltas: Dict[str, Dict[Path, float]] = defaultdict(lambda: defaultdict(int))
+        for event in events:
+            if event.collection not in KPI_SOURCE_COLLECTIONS:
+                continue
+            if event.before:
+                key = _tenant_key(event.before)
+                for path, amount in _contributions(event.collection, event.before):
+                    deltas[key][path] -= amount
+            if event.after:
+                key = _tenant_key(event.after)
+                for path, amount in _contributions(event.collection, event.after):
+                    deltas[key][path] += amount
+
+        deltas = {
+            key: {path: amount for path, amount in changes.items() if amount}
+            for key, changes in deltas.items()
+        }
+        deltas = {key: changes for key, changes in deltas.items() if changes}
+        if not deltas:
+            return
+        try:
+            await self._apply_deltas(deltas)
+        except IntegrityError:
+            # Another worker created a missing row concurrently; rows exist now.
+            await self._apply_deltas(deltas)
+
+    async def _apply_deltas(self, deltas: Dict[str, Dict[Path, float]]) -> None:
+        async with self._session_factory() as session:
+            result = await session.execute(
+                sa.select(TenantKpiRecord)
+                .where(TenantKpiRecord.tenant_key.in_(list(deltas)))
+                .with_for_update()
+            )
+            records = {record.tenant_key: record for record in result.scalars()}
+            for key, changes in deltas.items():
+                record = records.get(key)
+                # Work on a fresh copy; nested JSON mutations are not tracked
+                data = merge_kpis([record.data]) if record else empty_kpis()
+                for path, amount in changes.items():
+                    _apply(data, path, amount)
+                _prune(data)
+                if record is None:
+                    session.add(TenantKpiRecord(tenant_key=key, data=data))
+                else:
+                    record.data = data
+            await session.commit()
+
+    async def read(self, tenant_id: Optional[str]) -> Dict[str, Any]:
+        """KPIs visible to ``tenant_id``: its own row plus the global row.
+
+        Without a tenant every row is visible, matching unscoped queries.
+        """
+
+        statement = sa.select(TenantKpiRecord.data)
+        if tenant_id:
+            statement = statement.where(
+                TenantKpiRecord.tenant_key.in_([tenant_id, GLOBAL_TENANT_KEY])
+            )
+        async with self._session_factory() as session:
+            result = await session.execute(statement)
+            return merge_kpis(result.scalars())
+
+    async def is_empty(self) -> bool:
+        async with self._session_factory() as session:
+            result = await session.execute(
+                sa.select(TenantKpiRecord.tenant_key).limit(1)
+            )
+            return result.first() is None
+
+    async def rebuild(self, database: Any) -> Dict[str, Dict[str, Any]]:
+        """Recompute every tenant row from the source collections."""
+
+        rows: Dict[str, Dict[str, Any]] = defaultdict(empty_kpis)
+        for collection in KPI_SOURCE_COLLECTIONS:
+            documents = await database[collection].find({}).to_list(None)
+            for document in documents:
+                data = rows[_tenant_key(document)]
+                for path, amount in _contributions(collection, document):
+                    _apply(data, path, amount)
+        for data in rows.values():
+            _prune(data)
+
+        async with self._session_factory() as session:
+            await session.execute(sa.delete(TenantKpiRecord))
+            for key, data in rows.items():
+                session.add(TenantKpiRecord(tenant_key=key, data=data))
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Another worker rebuilt the rows concurrently
+                await session.rollback()
+                logger.info("Tenant KPIs were rebuilt by another worker")
+                return dict(rows)
+        logger.info("Rebuilt tenant KPIs for %s tenants", len(rows))
+        return dict(rows)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Tuple
+
+import sqlalchemy as sa
+from app.db.base import Base
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class RevokedAccessTokenRecord(Base):
+    """Logged out access token, kept until it would have expired anyway."""
+
+    __tablename__ = "revoked_access_tokens"
+
+    jti: Mapped[str] = mapped_column(sa.String(length=64), primary_key=True)
+    expires_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=False), nullable=False, index=True
+    )
+
+
+class ClaimsChangeRecord(Base):
+    """Last time the role, scopes or memberships of a user changed."""
+
+    __tablename__ = "user_claims_changes"
+
+    user_id: Mapped[str] = mapped_column(sa.String(length=64), primary_key=True)
+    changed_at: Mapped[datetime] = mapped_column(
+        sa.DateTime(timezone=False), nullable=False, index=True
+    )
+
+
+class RevocationStore:
+    """Access token revocations shared by all workers.
+
+    Times are naive UTC. Rows are only useful for the lifetime of an access
+    token, so expired ones are deleted whenever a token is revoked.
+    """
+
+    def __init__(
+        self, session_factory: async_sessionmaker[AsyncSession], lifetime: timedelta
+    ) -> None:
+        self._session_factory = session_factory
+        self.lifetime = lifetime
+
+    async def revoke(self, jti: str, expires_at: datetime) -> None:
+        now = datetime.utcnow()
+        async with self._session_factory() as session:
+            await session.execute(
+                sa.delete(RevokedAccessTokenRecord).where(
+                    RevokedAccessTokenRecord.expires_at <= now
+                )
+            )
+            await session.execute(
+                sa.delete(ClaimsChangeRecord).where(
+                    ClaimsChangeRecord.changed_at <= now - self.lifetime
+                )
+            )
+            await session.commit()
+            session.add(RevokedAccessTokenRecord(jti=jti, expires_at=expires_at))
+            try:
+                await session.commit()
+            except IntegrityError:
+                # Already revoked (e.g. a repeated logout)
+                await session.rollback()
+
+    async def mark_changed(self, user_ids: Iterable[str], changed_at: datetime) -> None:
+        async with self._session_factory() as session:
+            for user_id in sorted(set(user_ids)):
+                updated = await session.execute(
+                    sa.update(ClaimsChangeRecord)
+                    .where(ClaimsChangeRecord.user_id == user_id)
+                    .values(changed_at=changed_at)
+                )
+                if updated.rowcount:
+                    await session.commit()
+                    continue
+                session.add(ClaimsChangeRecord(user_id=user_id, changed_at=changed_at))
+                try:
+                    await session.commit()
+                except IntegrityError:
+                    # Another worker inserted the row first
+                    await session.rollback()
+                    await session.execute(
+                        sa.update(ClaimsChangeRecord)
+                        .where(ClaimsChangeRecord.user_id == user_id)
+                        .values(changed_at=changed_at)
+                    )
+                    await session.commit()
+
+    async def lookup(
+        self, jti: Optional[str], user_id: str
+    ) -> Tuple[Optional[datetime], Optional[datetime]]:
+        """(revoked token expiry, claims change time) for one token."""
+
+        async with self._session_factory() as session:
+            expires_at = None
+            if jti:
+                expires_at = await session.scalar(
+                    sa.select(RevokedAccessTokenRecord.expires_at).where(
+                        RevokedAccessTokenRecord.jti == jti
+                    )
+                )
+            changed_at = await session.scalar(
+                sa.select(ClaimsChangeRecord.changed_at).where(
+                    ClaimsChangeRecord.user_id == user_id
+                )
+            )
+            return expires_at, changed_at
+
+    async def clear(self) -> None:
+        async with self._session_factory() as session:
+            await session.execute(sa.delete(RevokedAccessTokenRecord))
+            await session.execute(sa.delete(ClaimsChangeRecord))
+            await session.commit()
@@ -5,50 +5,38 @@ import uuid
 from contextlib import asynccontextmanager
 
 from app.api.v1.api import api_router
+from app.core import tracing
 from app.core.config import get_settings
 from app.core.roles import DEFAULT_ROLE, resolve_role_scopes
-from app.core.security import hash_password
-from app.db.instance import db
+from app.core.security import hash_password_async, password_hash_pool
+from app.db.instance import db, tenant_kpis
+from app.db.query_utils import QueryRejected
 from app.db.session import dispose_engine
 from app.db.utils import prepare_for_mongo
 from app.models.domain import ActivityLog, User
-from app.services.contract_status_service import sync_contract_and_unit_statuses
-from app.services.reminder_service import check_contract_expirations
+from app.services.scheduler import TENANT_KPIS_JOB, scheduler
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
 
-async def run_scheduler():
-    """
-    Background task to run periodic jobs.
-    """
-    while True:
-        try:
-            # Run daily checks
-            await check_contract_expirations()
-            await sync_contract_and_unit_statuses()
-        except Exception as e:
-            logger.error(f"Error in background scheduler: {e}")
-
-        # Sleep for 24 hours
-        await asyncio.sleep(86400)
-
-
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup logic
     # Startup logic
     # Always attempt to create tables (safe operation if they exist)
     from app.db.base import Base
+    from app.db.document_store import ensure_timestamp_precision
     from app.db.session import get_engine
 
     engine = get_engine()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await ensure_timestamp_precision(conn)
 
     # Seed admin if needed
     if (
@@ -65,7 +53,9 @@ async def lifespan(app: FastAPI):
                 full_name=settings.INITIAL_ADMIN_FULL_NAME,
                 role=role,
                 scopes=resolve_role_scopes(role, ["*"] if role == "owner" else []),
-                password_hash=hash_password(settings.INITIAL_ADMIN_PASSWORD),
+                password_hash=await hash_password_async(
+                    settings.INITIAL_ADMIN_PASSWORD
+                ),
             )
             user_data = prepare_for_mongo(user.model_dump())
             await db.users.insert_one(user_data)
@@ -77,7 +67,9 @@ async def lifespan(app: FastAPI):
                 {"email": email},
                 {
                     "$set": {
-                        "password_hash": hash_password(settings.INITIAL_ADMIN_PASSWORD),
+                        "password_hash": await hash_password_async(
+                            settings.INITIAL_ADMIN_PASSWORD
+                        ),
                         "full_name": settings.INITIAL_ADMIN_FULL_NAME,
                         "role": settings.INITIAL_ADMIN_ROLE,
                         "scopes": resolve_role_scopes(
@@ -88,12 +80,24 @@ async def lifespan(app: FastAPI):
                 },
             )
 
-    # Start background scheduler
-    asyncio.create_task(run_scheduler())
+    # Materialised dashboard KPIs are built once, then maintained on writes.
+    # Run as a job: of several workers starting together only the one
+    # holding its lease rebuilds, the others skip it.
+    if await tenant_kpis.is_empty():
+        await scheduler.run_now(TENANT_KPIS_JOB, trigger="startup")
+
+    # Start background scheduler; the job table picks one worker per run
+    scheduler_task = None
+    if settings.SCHEDULER_ENABLED:
+        scheduler_task = asyncio.create_task(scheduler.run_forever())
 
     yield
 
     # Shutdown logic
+    if scheduler_task is not None:
+        scheduler_task.cancel()
+    password_hash_pool.shutdown()
+    tracing.tracer.close()
     await dispose_engine()
 
 
@@ -111,6 +115,12 @@ async def root():
     return {"message": "Welcome to Riforma API. Visit /docs for documentation."}
 
 
+@app.exception_handler(QueryRejected)
+async def query_rejected_handler(request: Request, exc: QueryRejected):
+    # Unsafe or too expensive user-supplied search patterns
+    return JSONResponse(status_code=400, content={"detail": exc.message})
+
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -158,9 +168,19 @@ async def activity_logger(request: Request, call_next):
     start_time = time.perf_counter()
 
     try:
-        response = await call_next(request)
+        # The request_id doubles as the trace id so traces can be joined with activity logs
+        with tracing.start_trace(
+            request_id,
+            f"{request.method} {request.url.path}",
+            method=request.method,
+            path=request.url.path,
+        ) as root_span:
+            response = await call_next(request)
+            if root_span is not None:
+                root_span.attributes["status_code"] = response.status_code
         status_code = response.status_code
         duration_ms = round((time.perf_counter() - start_time) * 1000, 2)
+        response.headers["X-Request-Id"] = request_id
 
         principal = getattr(request.state, "current_user", None) or {
             "id": "guest",
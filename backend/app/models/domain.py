@@ -44,6 +44,7 @@ class StatusUgovora(str, Enum):
     NA_ISTEKU = "na_isteku"
     RASKINUTO = "raskinuto"
     ARHIVIRANO = "arhivirano"
+    ISTEKAO = "istekao"
 
 
 class ZakupnikStatus(str, Enum):
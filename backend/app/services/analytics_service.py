@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from app.db.instance import db, store
+from app.db.query_utils import coerce_number
+from app.db.tenant import CURRENT_TENANT_ID
+
+TIMESERIES_COLLECTIONS = ("ugovori", "property_units", "maintenance_tasks")
+
+# Contracts that still produce rent in future months
+ONGOING_CONTRACT_STATUSES = ("aktivno", "na_isteku")
+
+MONTHS_BACK = 12
+MONTHS_AHEAD = 12
+EXPIRY_HORIZON_MONTHS = 24
+
+_cache: Dict[Optional[str], Tuple[str, Dict[str, Any]]] = {}
+
+
+def _month_index(value: date) -> int:
+    return value.year * 12 + value.month - 1
+
+
+def _month_label(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _iso_day(value: Any) -> str:
+    text = str(value or "")[:10]
+    try:
+        np.datetime64(text, "D")
+    except ValueError:
+        return "NaT"
+    return text if text else "NaT"
+
+
+def _to_months(values: Sequence[Any]) -> np.ndarray:
+    """Dates / ISO strings -> month indices (year * 12 + month - 1), -1 if missing."""
+
+    months = np.array([_iso_day(v) for v in values], dtype="datetime64[D]").astype(
+        "datetime64[M]"
+    )
+    return np.where(np.isnat(months), -1, months.astype(np.int64) + 1970 * 12)
+
+
+def _status_column(documents: List[Dict[str, Any]]) -> np.ndarray:
+    return np.array(
+        [str(getattr(d.get("status"), "value", d.get("status"))) for d in documents],
+        dtype=object,
+    )
+
+
+def _rent_roll(
+    contracts: List[Dict[str, Any]], current: int
+) -> Tuple[List[Dict[str, Any]], np.ndarray, np.ndarray]:
+    months = np.arange(current - MONTHS_BACK, current + MONTHS_AHEAD + 1)
+    starts = _to_months([c.get("datum_pocetka") for c in contracts])
+    ends = _to_months([c.get("datum_zavrsetka") for c in contracts])
+    rents = np.array(
+        [coerce_number(c.get("osnovna_zakupnina")) for c in contracts], dtype=float
+    )
+    statuses = _status_column(contracts)
+    ongoing = np.isin(statuses, ONGOING_CONTRACT_STATUSES)
+
+    if not contracts:
+        roll = np.zeros(len(months))
+        counts = np.zeros(len(months), dtype=np.int64)
+    else:
+        # (contracts x months) activity mask; future months only count
+        # contracts that are still running.
+        valid = (starts >= 0) & (ends >= 0)
+        active = (
+            valid[:, None]
+            & (starts[:, None] <= months[None, :])
+            & (ends[:, None] >= months[None, :])
+        )
+        active &= ongoing[:, None] | (months[None, :] <= current)
+        roll = rents @ active
+        counts = active.sum(axis=0)
+
+    series = [
+        {
+            "mjesec": _month_label(int(month)),
+            "zakupnina": round(float(total), 2),
+            "aktivni_ugovori": int(count),
+        }
+        for month, total, count in zip(months, roll, counts)
+    ]
+    return series, ends, ongoing
+
+
+def _expiries(
+    ends: np.ndarray, ongoing: np.ndarray, current: int
+) -> List[Dict[str, Any]]:
+    offsets = ends - current
+    in_horizon = ongoing & (offsets >= 0) & (offsets < EXPIRY_HORIZON_MONTHS)
+    counts = np.bincount(offsets[in_horizon], minlength=EXPIRY_HORIZON_MONTHS)
+    return [
+        {"mjesec": _month_label(current + offset), "broj_ugovora": int(count)}
+        for offset, count in enumerate(counts[:EXPIRY_HORIZON_MONTHS])
+    ]
+
+
+def _occupancy(units: List[Dict[str, Any]]) -> Dict[str, Any]:
+    statuses = _status_column(units)
+    labels, status_counts = np.unique(statuses, return_counts=True)
+    by_status = {str(label): int(count) for label, count in zip(labels, status_counts)}
+
+    property_ids = np.array(
+        [str(u.get("nekretnina_id") or "") for u in units], dtype=object
+    )
+    occupied = statuses == "iznajmljeno"
+    by_property = []
+    if units:
+        ids, inverse = np.unique(property_ids, return_inverse=True)
+        totals = np.bincount(inverse)
+        rented = np.bincount(inverse, weights=occupied.astype(float))
+        by_property = [
+            {
+                "nekretnina_id": str(pid) or None,
+                "ukupno_jedinica": int(total),
+                "iznajmljeno": int(rent),
+                "popunjenost": round(float(rent / total) * 100, 2),
+            }
+            for pid, total, rent in zip(ids, totals, rented)
+        ]
+
+    total_units = len(units)
+    return {
+        "ukupno_jedinica": total_units,
+        "po_statusu": by_status,
+        "popunjenost": (
+            round(float(occupied.sum()) / total_units * 100, 2) if total_units else 0.0
+        ),
+        "po_nekretnini": by_property,
+    }
+
+
+def _maintenance_costs(tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    if not tasks:
+        return []
+    property_ids = np.array(
+        [str(t.get("nekretnina_id") or "") for t in tasks], dtype=object
+    )
+    material = np.array(
+        [coerce_number(t.get("trosak_materijal")) for t in tasks], dtype=float
+    )
+    labour = np.array([coerce_number(t.get("trosak_rad")) for t in tasks], dtype=float)
+    ids, inverse = np.unique(property_ids, return_inverse=True)
+    material_totals = np.bincount(inverse, weights=material)
+    labour_totals = np.bincount(inverse, weights=labour)
+    task_counts = np.bincount(inverse)
+    rows = [
+        {
+            "nekretnina_id": str(pid) or None,
+            "broj_zadataka": int(count),
+            "trosak_materijal": round(float(mat), 2),
+            "trosak_rad": round(float(lab), 2),
+            "ukupno": round(float(mat + lab), 2),
+        }
+        for pid, count, mat, lab in zip(
+            ids, task_counts, material_totals, labour_totals
+        )
+    ]
+    rows.sort(key=lambda row: row["ukupno"], reverse=True)
+    return rows
+
+
+async def compute_timeseries(today: Optional[date] = None) -> Dict[str, Any]:
+    contracts = await db.ugovori.find().to_list(None)
+    units = await db.property_units.find().to_list(None)
+    tasks = await db.maintenance_tasks.find().to_list(None)
+
+    current = _month_index(today or date.today())
+    rent_roll, ends, ongoing = _rent_roll(contracts, current)
+    return {
+        "mjesecni_prihod": rent_roll,
+        "popunjenost": _occupancy(units),
+        "istek_ugovora": _expiries(ends, ongoing, current),
+        "troskovi_odrzavanja": _maintenance_costs(tasks),
+    }
+
+
+async def get_timeseries() -> Dict[str, Any]:
+    """Tenant-scoped timeseries, cached until one of its collections changes
+    (through any worker)."""
+
+    tenant_id = CURRENT_TENANT_ID.get()
+    # Read before the collections: a concurrent write leaves a stale entry
+    version = await store.collections_version(TIMESERIES_COLLECTIONS, tenant_id)
+    # Month boundaries also invalidate the result
+    version += f"-{_month_index(date.today())}"
+    cached = _cache.get(tenant_id)
+    if cached and cached[0] == version:
+        return cached[1]
+    result = await compute_timeseries()
+    _cache[tenant_id] = (version, result)
+    return result
@@ -0,0 +1,450 @@
+import codecs
+import csv
+import logging
+from dataclasses import dataclass, field
+from typing import IO, Any, Dict, Iterator, List, Optional, Tuple
+
+from app.db.contract_intervals import (
+    BLOCKING_STATUSES,
+    ContractInterval,
+    UnitIntervals,
+    stored_unit_intervals,
+)
+from app.db.instance import contract_intervals, db, store
+from app.db.search_index import normalize_text
+from app.db.tenant import CURRENT_TENANT_ID
+from app.db.utils import prepare_for_mongo
+from app.services.domain_events import publish_contract_change
+from pydantic import BaseModel, ValidationError
+
+try:
+    import openpyxl
+except ImportError:  # pragma: no cover - optional dependency
+    openpyxl = None
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 200
+
+# Excel saves "CSV" in the Windows code page of a Croatian locale
+FALLBACK_CSV_ENCODING = "cp1250"
+
+# Spreadsheet headers that name a reference instead of an id
+HEADER_ALIASES = {
+    "nekretnina": "nekretnina_id",
+    "zakupnik": "zakupnik_id",
+    "jedinica": "property_unit_id",
+    "unit": "property_unit_id",
+    "unit_id": "property_unit_id",
+}
+
+NUMBER_FIELDS = {
+    "osnovna_zakupnina",
+    "zakupnina_po_m2",
+    "cam_troskovi",
+    "polog_depozit",
+    "garancija",
+}
+
+
+class ImportFileError(ValueError):
+    """The upload cannot be read as a contract sheet at all."""
+
+
+@dataclass
+class ImportReport:
+    dry_run: bool
+    ukupno_redaka: int = 0
+    uvezeno: int = 0
+    ugovori: List[str] = field(default_factory=list)
+    greske: List[Dict[str, Any]] = field(default_factory=list)
+
+    def fail(self, row: int, messages: List[str]) -> None:
+        self.greske.append({"redak": row, "greske": messages})
+
+
+def _header(name: Any) -> str:
+    key = str(name or "").strip().lower().replace(" ", "_")
+    return HEADER_ALIASES.get(key, key)
+
+
+def _csv_encoding(stream: IO[bytes]) -> str:
+    """UTF-8 (with or without BOM) when the whole file decodes as such,
+    else the Windows-1250 code page; the stream is rewound either way."""
+
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    encoding = "utf-8-sig"
+    try:
+        for chunk in iter(lambda: stream.read(65536), b""):
+            decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        encoding = FALLBACK_CSV_ENCODING
+    stream.seek(0)
+    return encoding
+
+
+def _csv_rows(stream: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    try:
+        text = codecs.getreader(_csv_encoding(stream))(stream)
+        sample = text.read(4096)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        lines = _chain(sample, text)
+        reader = csv.reader(lines, dialect)
+        headers = [_header(cell) for cell in next(reader, [])]
+        if not any(headers):
+            raise ImportFileError("Datoteka nema zaglavlje")
+        for row in reader:
+            if any(cell.strip() for cell in row):
+                yield reader.line_num, dict(zip(headers, row))
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ImportFileError(f"Neispravna CSV datoteka: {exc}")
+
+
+def _chain(sample: str, rest: Any) -> Iterator[str]:
+    # Re-join the sniffed sample with the rest of the stream, line by line
+    buffered = sample + rest.readline()
+    for line in buffered.splitlines(keepends=True):
+        yield line
+    for line in rest:
+        yield line
+
+
+def _xlsx_rows(stream: IO[bytes]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    if openpyxl is None:
+        raise ImportFileError("Uvoz XLSX datoteka zahtijeva paket openpyxl")
+    try:
+        workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ImportFileError(f"Neispravna XLSX datoteka: {exc}")
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [_header(cell) for cell in next(rows, ())]
+        if not any(headers):
+            raise ImportFileError("Datoteka nema zaglavlje")
+        for number, row in enumerate(rows, start=2):
+            if any(cell not in (None, "") for cell in row):
+                yield number, dict(zip(headers, row))
+    finally:
+        workbook.close()
+
+
+def read_rows(stream: IO[bytes], filename: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """(row number, cells by header) for every non-empty data row."""
+
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        return _xlsx_rows(stream)
+    if filename.lower().endswith((".csv", ".txt")):
+        return _csv_rows(stream)
+    raise ImportFileError("Podržane su samo CSV i XLSX datoteke")
+
+
+def _number(value: Any) -> Any:
+    """Accept "1.234,50" and "1234,5" as well as plain numbers."""
+
+    if not isinstance(value, str):
+        return value
+    text = value.strip().replace(" ", "")
+    if "," in text:
+        text = text.replace(".", "").replace(",", ".")
+    return text
+
+
+class ReferenceMaps:
+    """Properties, tenants and units visible to the importer, loaded once."""
+
+    def __init__(self) -> None:
+        self.properties: Dict[str, Dict[str, Any]] = {}
+        self.tenants: Dict[str, Dict[str, Any]] = {}
+        self.units: Dict[str, Dict[str, Any]] = {}
+        self._property_names: Dict[str, List[str]] = {}
+        self._tenant_keys: Dict[str, List[str]] = {}
+        self._unit_labels: Dict[Tuple[str, str], List[str]] = {}
+
+    @classmethod
+    async def load(cls) -> "ReferenceMaps":
+        maps = cls()
+        for prop in await db.nekretnine.find({}).to_list(None):
+            maps.properties[prop["id"]] = prop
+            key = normalize_text(prop.get("naziv")).strip()
+            maps._property_names.setdefault(key, []).append(prop["id"])
+        for tenant in await db.zakupnici.find({}).to_list(None):
+            maps.tenants[tenant["id"]] = tenant
+            for value in (
+                tenant.get("oib"),
+                tenant.get("naziv_firme"),
+                tenant.get("ime_prezime"),
+            ):
+                if value:
+                    key = normalize_text(value).strip()
+                    maps._tenant_keys.setdefault(key, []).append(tenant["id"])
+        for unit in await db.property_units.find({}).to_list(None):
+            maps.units[unit["id"]] = unit
+            for label in (unit.get("oznaka"), unit.get("naziv")):
+                if label:
+                    key = (unit.get("nekretnina_id"), normalize_text(label).strip())
+                    maps._unit_labels.setdefault(key, []).append(unit["id"])
+        return maps
+
+    @staticmethod
+    def _pick(ids: List[str], what: str, value: Any) -> str:
+        unique = sorted(set(ids))
+        if not unique:
+            raise LookupError(f"{what} '{value}' nije pronađen(a)")
+        if len(unique) > 1:
+            raise LookupError(f"{what} '{value}' nije jednoznačan(na)")
+        return unique[0]
+
+    def property_id(self, value: Any) -> str:
+        if value in self.properties:
+            return value
+        key = normalize_text(value).strip()
+        return self._pick(self._property_names.get(key, []), "Nekretnina", value)
+
+    def tenant_id(self, value: Any) -> str:
+        if value in self.tenants:
+            return value
+        key = normalize_text(value).strip()
+        return self._pick(self._tenant_keys.get(key, []), "Zakupnik", value)
+
+    def unit_id(self, value: Any, property_id: str) -> str:
+        if value in self.units:
+            return value
+        key = (property_id, normalize_text(value).strip())
+        return self._pick(self._unit_labels.get(key, []), "Jedinica", value)
+
+
+def _errors(exc: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+        for error in exc.errors()
+    ]
+
+
+class ContractImporter:
+    """Validates sheet rows and stores the valid ones in batches.
+
+    References are resolved through :class:`ReferenceMaps`; overlaps are
+    checked against the interval index and against the rows already accepted
+    from the same file, and again against the database when a batch is
+    stored.
+    """
+
+    def __init__(
+        self,
+        model: type,
+        maps: ReferenceMaps,
+        created_by: str,
+        dry_run: bool = False,
+    ) -> None:
+        self._model = model
+        self._maps = maps
+        self._created_by = created_by
+        self._tenant_id = CURRENT_TENANT_ID.get()
+        self._accepted: Dict[str, UnitIntervals] = {}
+        self._batch: List[Tuple[int, Dict[str, Any]]] = []
+        self.report = ImportReport(dry_run=dry_run)
+
+    def _payload(self, cells: Dict[str, Any]) -> Dict[str, Any]:
+        payload: Dict[str, Any] = {}
+        for key, value in cells.items():
+            if (
+                not key
+                or value is None
+                or (isinstance(value, str) and not value.strip())
+            ):
+                continue
+            if isinstance(value, str):
+                value = value.strip()
+            payload[key] = _number(value) if key in NUMBER_FIELDS else value
+        # Date cells from XLSX arrive as datetimes
+        for key in ("datum_potpisivanja", "datum_pocetka", "datum_zavrsetka"):
+            if hasattr(payload.get(key), "date"):
+                payload[key] = payload[key].date()
+        return payload
+
+    def _resolve(self, payload: Dict[str, Any]) -> List[str]:
+        problems = []
+        for key, resolve in (
+            ("nekretnina_id", self._maps.property_id),
+            ("zakupnik_id", self._maps.tenant_id),
+        ):
+            if key in payload:
+                try:
+                    payload[key] = resolve(payload[key])
+                except LookupError as exc:
+                    problems.append(str(exc))
+        if "property_unit_id" in payload and not problems:
+            try:
+                payload["property_unit_id"] = self._maps.unit_id(
+                    payload["property_unit_id"], payload.get("nekretnina_id")
+                )
+            except LookupError as exc:
+                problems.append(str(exc))
+        return problems
+
+    def _overlap(self, item: Dict[str, Any]) -> Optional[str]:
+        unit_id = item.get("property_unit_id")
+        if not unit_id:
+            return None
+        start = item["datum_pocetka"].isoformat()
+        end = item["datum_zavrsetka"].isoformat()
+        existing = contract_intervals.find_overlap(
+            unit_id, start, end, tenant_id=self._tenant_id
+        )
+        if existing is not None:
+            return f"Postoji preklapanje s ugovorom {existing.label} za ovaj period."
+        accepted = self._accepted.get(unit_id)
+        found = accepted.find_overlap(start, end) if accepted else None
+        if found is not None:
+            return f"Preklapa se s retkom {found.contract_id} iz iste datoteke."
+        return None
+
+    def _accept(self, row: int, item: Dict[str, Any]) -> None:
+        status = getattr(item["status"], "value", item["status"])
+        if item.get("property_unit_id") and status in BLOCKING_STATUSES:
+            # Later rows must not overlap this one either
+            self._accepted.setdefault(item["property_unit_id"], UnitIntervals()).put(
+                ContractInterval(
+                    item["datum_pocetka"].isoformat(),
+                    item["datum_zavrsetka"].isoformat(),
+                    str(row),
+                )
+            )
+
+    def _with_rent(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        # Same rule as calculate_rent_if_needed, from the prefetched units
+        unit = self._maps.units.get(item.get("property_unit_id") or "")
+        if (
+            item.get("zakupnina_po_m2")
+            and item.get("osnovna_zakupnina", 0) == 0
+            and unit
+            and unit.get("povrsina_m2")
+        ):
+            item["osnovna_zakupnina"] = item["zakupnina_po_m2"] * unit["povrsina_m2"]
+        return item
+
+    async def add(self, row: int, cells: Dict[str, Any]) -> None:
+        self.report.ukupno_redaka += 1
+        payload = self._payload(cells)
+        problems = self._resolve(payload)
+        if problems:
+            self.report.fail(row, problems)
+            return
+        try:
+            item: BaseModel = self._model.model_validate(payload)
+        except ValidationError as exc:
+            self.report.fail(row, _errors(exc))
+            return
+        data = item.model_dump()
+        conflict = self._overlap(data)
+        if conflict:
+            self.report.fail(row, [conflict])
+            return
+        self._accept(row, data)
+        data = self._with_rent(data)
+        data["created_by"] = self._created_by
+        if self._tenant_id:
+            data["tenant_id"] = self._tenant_id
+        self._batch.append((row, prepare_for_mongo(data)))
+        if len(self._batch) >= BATCH_SIZE:
+            await self.flush()
+
+    def _release(self, rows: List[Tuple[int, Dict[str, Any]]]) -> None:
+        # Rows that were not stored must not block later rows of the file
+        for row, doc in rows:
+            accepted = self._accepted.get(doc.get("property_unit_id") or "")
+            if accepted is not None:
+                accepted.discard(str(row))
+
+    async def _store(
+        self, batch: List[Tuple[int, Dict[str, Any]]]
+    ) -> Tuple[List[str], Dict[int, str]]:
+        """Insert the rows that still fit the stored contracts of their units.
+
+        Returns the new contract ids and the rejected rows with the reason.
+        The units are locked inside the transaction, so contracts written
+        meanwhile by other workers (which the interval index may not know
+        yet) are seen.
+        """
+
+        blocking = [
+            (row, doc)
+            for row, doc in batch
+            if doc.get("property_unit_id") and doc.get("status") in BLOCKING_STATUSES
+        ]
+        rejected: Dict[int, str] = {}
+        # One transaction per batch: the contracts and their unit updates
+        async with db.transaction():
+            async with store.bulk() as bulk:
+                stored = await stored_unit_intervals(
+                    bulk,
+                    [doc["property_unit_id"] for _, doc in blocking],
+                    self._tenant_id,
+                )
+                for row, doc in blocking:
+                    existing = stored[doc["property_unit_id"]].find_overlap(
+                        doc["datum_pocetka"], doc["datum_zavrsetka"]
+                    )
+                    if existing is not None:
+                        rejected[row] = (
+                            f"Postoji preklapanje s ugovorom {existing.label} "
+                            "za ovaj period."
+                        )
+                rows = [(row, doc) for row, doc in batch if row not in rejected]
+                ids = (
+                    await bulk.insert_many("ugovori", [doc for _, doc in rows])
+                    if rows
+                    else []
+                )
+            for contract_id, (_, doc) in zip(ids, rows):
+                await publish_contract_change(contract_id, None, doc)
+        return ids, rejected
+
+    async def flush(self) -> None:
+        batch, self._batch = self._batch, []
+        if not batch:
+            return
+        if self.report.dry_run:
+            self.report.uvezeno += len(batch)
+            return
+        try:
+            ids, rejected = await self._store(batch)
+        except Exception as exc:
+            logger.error(f"Contract import batch failed: {exc}")
+            for row, _ in batch:
+                self.report.fail(row, [f"Spremanje nije uspjelo: {exc}"])
+            self._release(batch)
+            return
+        for row, message in rejected.items():
+            self.report.fail(row, [message])
+        self._release([(row, doc) for row, doc in batch if row in rejected])
+        self.report.uvezeno += len(ids)
+        self.report.ugovori.extend(ids)
+
+
+async def import_contracts(
+    stream: IO[bytes],
+    filename: str,
+    model: type,
+    created_by: str,
+    dry_run: bool = False,
+) -> ImportReport:
+    rows = read_rows(stream, filename)
+    await contract_intervals.ensure_current()
+    importer = ContractImporter(model, await ReferenceMaps.load(), created_by, dry_run)
+    for row, cells in rows:
+        await importer.add(row, cells)
+    await importer.flush()
+    report = importer.report
+    logger.info(
+        "Contract import of %s: %s rows, %s imported, %s rejected",
+        filename,
+        report.ukupno_redaka,
+        report.uvezeno,
+        len(report.greske),
+    )
+    return report
@@ -1,97 +1,153 @@
 import logging
+import time
 from datetime import date
+from typing import Any, Dict
 
-from app.db.instance import db
+import sqlalchemy as sa
+from app.db.document_store import field
+from app.db.instance import store
 from app.models.domain import PropertyUnitStatus, StatusUgovora
+from app.services.domain_events import ContractActivated, ContractEnded, event_bus
 
 logger = logging.getLogger(__name__)
 
+# Contracts in these statuses keep their unit rented
+ACTIVE_STATUSES = (StatusUgovora.AKTIVNO, StatusUgovora.NA_ISTEKU)
 
-async def sync_contract_and_unit_statuses():
+
+async def sync_unit_status(event: Any) -> None:
     """
-    Synchronizes contract statuses based on dates and updates property unit statuses.
-    1. Finds active contracts that have expired (end_date < today) -> Sets to EXPIRED.
-    2. For any contract transition to EXPIRED, updates linked unit to AVAILABLE.
-    3. (Self-healing) Ensures active contracts have units marked as RENTED.
+    Keeps a unit's status in line with the contracts holding it.
+    Runs inside the transaction of the contract write that raised the event.
     """
-    logger.info("Starting contract status synchronization...")
+    if isinstance(event, ContractActivated):
+        async with store.bulk() as bulk:
+            await bulk.set_where(
+                "property_units",
+                {"status": PropertyUnitStatus.IZNAJMLJENO},
+                ids=[event.unit_id],
+            )
+        return
+
+    # Released only if no other active contract still holds the unit. Read
+    # from the database with the unit locked, so a contract written on
+    # another worker (or concurrently) is taken into account.
+    async with store.bulk() as bulk:
+        await bulk.lock("property_units", [event.unit_id])
+        holders = await bulk.values(
+            "ugovori",
+            "id",
+            field("property_unit_id") == event.unit_id,
+            field("status").in_([status.value for status in ACTIVE_STATUSES]),
+        )
+        if any(holder != event.contract_id for holder in holders):
+            return
+        await bulk.set_where(
+            "property_units",
+            {"status": PropertyUnitStatus.DOSTUPNO},
+            field("status") == PropertyUnitStatus.IZNAJMLJENO.value,
+            ids=[event.unit_id],
+        )
 
-    today = date.today()
 
-    # 1. Access collection directly or via some helper? Direct is fine.
+event_bus.subscribe(ContractActivated, sync_unit_status)
+event_bus.subscribe(ContractEnded, sync_unit_status)
 
-    # Find Active contracts where end_date < today
-    # Note: ensure dates are stored reliably. If string, we might depend on format.
-    # Best practice is to query assuming ISO strings YYYY-MM-DD which sort correctly.
 
-    today_str = today.isoformat()
+async def sync_contract_and_unit_statuses() -> Dict[str, Any]:
+    """
+    Expires active contracts whose end date has passed and releases their units.
+    1. Active contracts with end_date < today -> EXPIRED.
+    2. Their RENTED units -> AVAILABLE, unless another active contract still holds them.
+    Both steps are set-based statements in one transaction; returns counts and timings.
+    """
+    logger.info("Starting contract status synchronization...")
+    started = time.perf_counter()
 
-    # Find active contracts that are theoretically expired
-    cursor = db.ugovori.find(
-        {"status": StatusUgovora.AKTIVNO, "datum_zavrsetka": {"$lt": today_str}}
+    # Dates are stored as ISO strings (YYYY-MM-DD), which sort correctly
+    today_str = date.today().isoformat()
+    expired = (
+        field("status") == StatusUgovora.AKTIVNO.value,
+        field("datum_zavrsetka") < today_str,
+    )
+    still_active = (
+        field("status").in_(
+            [StatusUgovora.AKTIVNO.value, StatusUgovora.NA_ISTEKU.value]
+        ),
+        sa.or_(
+            field("status") == StatusUgovora.NA_ISTEKU.value,
+            field("datum_zavrsetka") >= today_str,
+        ),
     )
 
-    expired_contracts = await cursor.to_list(length=None)
-    logger.info(f"Found {len(expired_contracts)} expired contracts to update.")
-
-    for contract in expired_contracts:
-        contract_id = contract.get("id")
-        unit_id = contract.get("property_unit_id")
-
-        logger.info(
-            f"Expiring contract {contract_id} (Ended: {contract.get('datum_zavrsetka')})"
+    async with store.bulk() as bulk:
+        expiring_units = set(await bulk.values("ugovori", "property_unit_id", *expired))
+        held_units = set(
+            await bulk.values("ugovori", "property_unit_id", *still_active)
         )
+        release = sorted(unit for unit in expiring_units - held_units if unit)
 
-        # Update Contract Status
-        await db.ugovori.update_one(
-            {"id": contract_id}, {"$set": {"status": StatusUgovora.ISTEKAO}}
+        expired_count = await bulk.set_where(
+            "ugovori", {"status": StatusUgovora.ISTEKAO}, *expired
+        )
+        released_count = await bulk.set_where(
+            "property_units",
+            {"status": PropertyUnitStatus.DOSTUPNO},
+            field("status") == PropertyUnitStatus.IZNAJMLJENO.value,
+            ids=release,
         )
 
-        # If there is a linked unit, free it up
-        if unit_id:
-            logger.info(f"Releasing unit {unit_id} to AVAILABLE.")
-            await db.property_units.update_one(
-                {"id": unit_id}, {"$set": {"status": PropertyUnitStatus.DOSTUPNO}}
-            )
-
-    logger.info("Contract status synchronization completed.")
+    summary = {
+        "istekli_ugovori": expired_count,
+        "oslobodene_jedinice": released_count,
+        "trajanje_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info(
+        "Contract status synchronization completed: %s contracts expired, "
+        "%s units released in %s ms",
+        expired_count,
+        released_count,
+        summary["trajanje_ms"],
+    )
 
     # Run self-healing for orphaned units
     await fix_orphaned_rented_units()
+    return summary
 
 
-async def fix_orphaned_rented_units():
+async def fix_orphaned_rented_units(dry_run: bool = False) -> Dict[str, Any]:
     """
-    Finds units marked as RENTED (IZNAJMLJENO) that do NOT have a corresponding ACTIVE contract.
-    Sets them back to AVAILABLE (DOSTUPNO).
+    Finds units marked as RENTED (IZNAJMLJENO) that do NOT have a corresponding active contract
+    and sets them back to AVAILABLE (DOSTUPNO).
+    The units are found with one anti-join and released with one bulk update; with
+    ``dry_run`` nothing is changed and the affected unit ids are only reported.
     """
-    logger.info("Starting orphaned unit cleanup...")
-
-    # 1. Get all units that claim to be RENTED
-    rented_units_cursor = db.property_units.find(
-        {"status": PropertyUnitStatus.IZNAJMLJENO}
-    )
-    rented_units = await rented_units_cursor.to_list(length=None)
-
-    count_fixed = 0
-    for unit in rented_units:
-        unit_id = unit.get("id")
-        # 2. Check if there is an ACTIVE contract for this unit
-        active_contract = await db.ugovori.find_one(
-            {"property_unit_id": unit_id, "status": StatusUgovora.AKTIVNO}
+    logger.info("Starting orphaned unit cleanup%s...", " (dry run)" if dry_run else "")
+
+    async with store.bulk() as bulk:
+        orphaned = await bulk.ids_without(
+            "property_units",
+            "ugovori",
+            "property_unit_id",
+            field("status") == PropertyUnitStatus.IZNAJMLJENO.value,
+            related_values={"status": list(ACTIVE_STATUSES)},
         )
-
-        # 3. If no active contract found, fix the status
-        if not active_contract:
-            logger.warning(
-                f"Unit {unit_id} is marked RENTED but has no ACTIVE contract. Fixing to AVAILABLE."
+        fixed = 0
+        if orphaned and not dry_run:
+            fixed = await bulk.set_where(
+                "property_units",
+                {"status": PropertyUnitStatus.DOSTUPNO},
+                field("status") == PropertyUnitStatus.IZNAJMLJENO.value,
+                ids=orphaned,
             )
-            await db.property_units.update_one(
-                {"id": unit_id}, {"$set": {"status": PropertyUnitStatus.DOSTUPNO}}
-            )
-            count_fixed += 1
 
-    if count_fixed > 0:
-        logger.info(f"Fixed {count_fixed} orphaned rented units.")
+    if orphaned:
+        logger.warning(
+            "%s rented units have no active contract%s: %s",
+            len(orphaned),
+            "" if dry_run else f", {fixed} fixed to AVAILABLE",
+            ", ".join(orphaned),
+        )
     else:
         logger.info("No orphaned rented units found.")
+    return {"dry_run": dry_run, "jedinice": orphaned, "popravljeno": fixed}
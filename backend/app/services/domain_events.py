@@ -0,0 +1,93 @@
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, DefaultDict, Dict, List, Optional, Type
+
+from app.models.domain import StatusUgovora
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ContractActivated:
+    """A contract started holding its unit."""
+
+    contract_id: str
+    unit_id: str
+
+
+@dataclass(frozen=True)
+class ContractEnded:
+    """A contract stopped holding its unit (ended, terminated, moved or deleted)."""
+
+    contract_id: str
+    unit_id: str
+
+
+Handler = Callable[[Any], Awaitable[None]]
+
+# A contract in one of these statuses holds its unit
+HOLDING_STATUSES = (StatusUgovora.AKTIVNO.value, StatusUgovora.NA_ISTEKU.value)
+
+
+class EventBus:
+    """In-process publish/subscribe for domain events.
+
+    Handlers run in the publisher's task, in subscription order, so when
+    publishing inside ``db.transaction()`` their store writes join that
+    transaction; a failing handler aborts it together with the write that
+    raised the event.
+    """
+
+    def __init__(self) -> None:
+        self._handlers: DefaultDict[Type[Any], List[Handler]] = defaultdict(list)
+
+    def subscribe(self, event_type: Type[Any], handler: Handler) -> None:
+        if handler not in self._handlers[event_type]:
+            self._handlers[event_type].append(handler)
+
+    async def publish(self, event: Any) -> None:
+        for handler in list(self._handlers[type(event)]):
+            await handler(event)
+
+
+event_bus = EventBus()
+
+
+def _holding(contract: Optional[Dict[str, Any]]) -> Optional[str]:
+    """The unit a contract document holds, if any."""
+
+    if not contract or not contract.get("property_unit_id"):
+        return None
+    status = contract.get("status")
+    if getattr(status, "value", status) not in HOLDING_STATUSES:
+        return None
+    return str(contract["property_unit_id"])
+
+
+def contract_events(
+    contract_id: str,
+    before: Optional[Dict[str, Any]],
+    after: Optional[Dict[str, Any]],
+) -> List[Any]:
+    """Events for a contract going from ``before`` to ``after`` (``None`` = absent)."""
+
+    held_before, held_after = _holding(before), _holding(after)
+    if held_before == held_after:
+        return []
+    events: List[Any] = []
+    if held_before:
+        events.append(ContractEnded(contract_id, held_before))
+    if held_after:
+        events.append(ContractActivated(contract_id, held_after))
+    return events
+
+
+async def publish_contract_change(
+    contract_id: str,
+    before: Optional[Dict[str, Any]],
+    after: Optional[Dict[str, Any]],
+) -> None:
+    for event in contract_events(contract_id, before, after):
+        logger.debug("Publishing %s", event)
+        await event_bus.publish(event)
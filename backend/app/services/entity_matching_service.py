@@ -0,0 +1,42 @@
+from typing import Any, Dict, List, Optional
+
+from app.db.instance import entity_index
+from app.db.tenant import CURRENT_TENANT_ID
+
+# Similarity above which a name/address candidate is linked automatically
+AUTO_MATCH_SIMILARITY = 0.6
+
+
+async def match_zakupnik(
+    naziv: Optional[str] = None, oib: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Ranked existing tenants for an extracted name and OIB."""
+
+    await entity_index.ensure_current()
+    candidates = entity_index.match_tenant(
+        naziv=naziv, oib=oib, tenant_id=CURRENT_TENANT_ID.get()
+    )
+    return [candidate.as_dict() for candidate in candidates]
+
+
+async def match_nekretnina(
+    naziv: Optional[str] = None, adresa: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """Ranked existing properties for an extracted name and address."""
+
+    await entity_index.ensure_current()
+    candidates = entity_index.match_property(
+        naziv=naziv, adresa=adresa, tenant_id=CURRENT_TENANT_ID.get()
+    )
+    return [candidate.as_dict() for candidate in candidates]
+
+
+def confident_match(candidates: List[Dict[str, Any]]) -> Optional[str]:
+    """Id of the top candidate if it is safe to link without asking."""
+
+    if not candidates:
+        return None
+    best = candidates[0]
+    if best["razlog"] == "oib" or best["score"] >= AUTO_MATCH_SIMILARITY:
+        return best["id"]
+    return None
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from app.db.instance import db, store
+from app.db.query_utils import coerce_number
+from app.db.tenant import CURRENT_TENANT_ID
+from app.services.contract_status_service import ACTIVE_STATUSES
+from app.services.indexation_service import month_index, month_label
+
+FORECAST_COLLECTIONS = ("ugovori",)
+
+MIN_MONTHS = 12
+MAX_MONTHS = 60
+# Renewal term assumed when a contract does not state its own duration
+DEFAULT_RENEWAL_MONTHS = 12
+GROUPINGS = (
+    ("po_nekretnini", "nekretnina_id"),
+    ("po_zakupniku", "zakupnik_id"),
+    ("po_jedinici", "property_unit_id"),
+)
+
+# Forecasts for a few parameter combinations per tenant
+_CACHE_SIZE = 64
+_cache: "OrderedDict[Tuple[Any, ...], Tuple[str, Dict[str, Any]]]" = OrderedDict()
+
+
+def _round(values: np.ndarray) -> List[float]:
+    return [round(float(value), 2) for value in values]
+
+
+def _grouped(
+    keys: List[Optional[str]], rent: np.ndarray, cam: np.ndarray
+) -> List[Dict[str, Any]]:
+    """Sum the (contracts x months) matrices per key; largest total first."""
+
+    labels = np.array([key or "" for key in keys], dtype=object)
+    ids, inverse = np.unique(labels, return_inverse=True)
+    rent_totals = np.zeros((len(ids), rent.shape[1]))
+    cam_totals = np.zeros((len(ids), cam.shape[1]))
+    np.add.at(rent_totals, inverse, rent)
+    np.add.at(cam_totals, inverse, cam)
+    rows = [
+        {
+            "id": str(group_id) or None,
+            "zakupnina": _round(group_rent),
+            "cam": _round(group_cam),
+            "ukupno": round(float(group_rent.sum() + group_cam.sum()), 2),
+        }
+        for group_id, group_rent, group_cam in zip(ids, rent_totals, cam_totals)
+    ]
+    rows.sort(key=lambda row: row["ukupno"], reverse=True)
+    return rows
+
+
+def build_forecast(
+    contracts: List[Dict[str, Any]],
+    current: int,
+    months: int = MIN_MONTHS,
+    include_renewals: bool = False,
+    indexation_rate: Optional[float] = None,
+) -> Dict[str, Any]:
+    """Monthly rent and CAM of ``contracts`` from month index ``current``.
+
+    A contract contributes to every month from its start to its end month;
+    with ``include_renewals`` contracts holding ``opcija_produljenja`` also
+    run for one more term after their end. ``indexation_rate`` (percent per
+    year) escalates indexed contracts on each anniversary of their last
+    indexation (else start).
+    """
+
+    horizon = current + np.arange(months)
+    count = len(contracts)
+    rents = np.array(
+        [coerce_number(c.get("osnovna_zakupnina")) for c in contracts], dtype=float
+    )
+    cams = np.array(
+        [coerce_number(c.get("cam_troskovi")) for c in contracts], dtype=float
+    )
+    starts = np.array(
+        [month_index(c.get("datum_pocetka")) for c in contracts], dtype=np.int64
+    )
+    ends = np.array(
+        [month_index(c.get("datum_zavrsetka")) for c in contracts], dtype=np.int64
+    )
+    terms = np.array(
+        [
+            int(coerce_number(c.get("trajanje_mjeseci"))) or DEFAULT_RENEWAL_MONTHS
+            for c in contracts
+        ],
+        dtype=np.int64,
+    )
+    renewable = np.array(
+        [bool(c.get("opcija_produljenja")) for c in contracts], dtype=bool
+    )
+    indexed = np.array([bool(c.get("indeksacija")) for c in contracts], dtype=bool)
+    bases = np.array(
+        [
+            month_index(c.get("datum_zadnje_indeksacije") or c.get("datum_pocetka"))
+            for c in contracts
+        ],
+        dtype=np.int64,
+    )
+    valid = (starts >= 0) & (ends >= 0)
+
+    # (contracts x months) masks
+    contracted = (
+        valid[:, None]
+        & (starts[:, None] <= horizon[None, :])
+        & (ends[:, None] >= horizon[None, :])
+    )
+    renewal = np.zeros_like(contracted)
+    if include_renewals:
+        renewal = (
+            (valid & renewable)[:, None]
+            & (ends[:, None] < horizon[None, :])
+            & (ends[:, None] + terms[:, None] >= horizon[None, :])
+        )
+    running = contracted | renewal
+
+    factor = np.ones((count, months))
+    if indexation_rate:
+        # Anniversaries passed between now and each forecast month
+        steps = (horizon[None, :] - bases[:, None]) // 12 - (
+            current - bases[:, None]
+        ) // 12
+        steps = np.where(indexed[:, None] & (bases[:, None] >= 0), steps, 0)
+        factor = (1 + indexation_rate / 100) ** np.maximum(steps, 0)
+
+    rent = rents[:, None] * factor * running
+    cam = cams[:, None] * running
+
+    expiring = valid[:, None] & (ends[:, None] == horizon[None, :])
+    labels = [month_label(int(month)) for month in horizon]
+    return {
+        "od": labels[0],
+        "do": labels[-1],
+        "mjeseci": labels,
+        "ukupno": {
+            "zakupnina": _round(rent.sum(axis=0)),
+            "cam": _round(cam.sum(axis=0)),
+            "ukupno": _round(rent.sum(axis=0) + cam.sum(axis=0)),
+            "iz_produljenja": _round((rent * renewal).sum(axis=0)),
+            "aktivni_ugovori": [int(n) for n in running.sum(axis=0)],
+        },
+        "istek_ugovora": [
+            {
+                "mjesec": label,
+                "broj_ugovora": int(number),
+                "zakupnina": round(float(amount), 2),
+                "s_opcijom_produljenja": int(options),
+            }
+            for label, number, amount, options in zip(
+                labels,
+                expiring.sum(axis=0),
+                (rents[:, None] * expiring).sum(axis=0),
+                (expiring & renewable[:, None]).sum(axis=0),
+            )
+        ],
+        **{
+            name: _grouped([c.get(key) for c in contracts], rent, cam)
+            for name, key in GROUPINGS
+        },
+    }
+
+
+async def get_forecast(
+    months: int = MIN_MONTHS,
+    include_renewals: bool = False,
+    indexation_rate: Optional[float] = None,
+    today: Optional[date] = None,
+) -> Dict[str, Any]:
+    """Tenant-scoped forecast, cached until the tenant's contracts change.
+
+    The cache is keyed on the stored version of the contracts, so writes made
+    through other workers invalidate it too. The version is read before the
+    contracts, so a concurrent write leaves an entry that is already stale.
+    """
+
+    tenant_id = CURRENT_TENANT_ID.get()
+    current = month_index(today or date.today())
+    key = (tenant_id, months, include_renewals, indexation_rate)
+    version = await store.collections_version(FORECAST_COLLECTIONS, tenant_id)
+    # Month boundaries also invalidate the result
+    version += f"-{current}"
+    cached = _cache.get(key)
+    if cached and cached[0] == version:
+        _cache.move_to_end(key)
+        return cached[1]
+    contracts = await db.ugovori.find(
+        {"status": {"$in": [status.value for status in ACTIVE_STATUSES]}}
+    ).to_list(None)
+    result = build_forecast(
+        contracts, current, months, include_renewals, indexation_rate
+    )
+    _cache[key] = (version, result)
+    _cache.move_to_end(key)
+    while len(_cache) > _CACHE_SIZE:
+        _cache.popitem(last=False)
+    return result
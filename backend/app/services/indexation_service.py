@@ -0,0 +1,359 @@
+from __future__ import annotations
+
+import ast
+import time
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from app.db.instance import db, store
+from app.db.query_utils import coerce_number
+from app.services.contract_status_service import ACTIVE_STATUSES
+
+SERIES_COLLECTION = "indeksi_cijena"
+DEFAULT_SERIES = "CPI"
+DEFAULT_FORMULA = "zakupnina * indeks"
+# Contracts are indexed at most once per this many months by default
+DEFAULT_MIN_MONTHS = 12
+
+ArrayFunc = Callable[[Dict[str, np.ndarray]], np.ndarray]
+
+
+class FormulaError(ValueError):
+    """``formula_indeksacije`` is not a valid indexation formula."""
+
+
+# Names a formula may use; each is one column of the contract arrays
+FORMULA_VARIABLES = (
+    "zakupnina",  # current osnovna_zakupnina
+    "indeks",  # new index value / base index value
+    "promjena",  # indeks - 1
+    "stari_indeks",
+    "novi_indeks",
+    "mjeseci",  # months since the base period
+)
+
+_FUNCTIONS: Dict[str, Callable[..., np.ndarray]] = {
+    "min": np.minimum,
+    "max": np.maximum,
+    "abs": np.abs,
+    "round": np.round,
+}
+
+_OPERATORS: Dict[type, Callable[[Any, Any], Any]] = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+    ast.Pow: np.power,
+}
+
+
+def _compile_node(node: ast.AST) -> ArrayFunc:
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body)
+    if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+        value = float(node.value)
+        return lambda columns: np.float64(value)
+    if isinstance(node, ast.Name) and node.id in FORMULA_VARIABLES:
+        name = node.id
+        return lambda columns: columns[name]
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        operand = _compile_node(node.operand)
+        if isinstance(node.op, ast.USub):
+            return lambda columns: np.negative(operand(columns))
+        return operand
+    if isinstance(node, ast.BinOp) and type(node.op) in _OPERATORS:
+        operator = _OPERATORS[type(node.op)]
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        return lambda columns: operator(left(columns), right(columns))
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in _FUNCTIONS
+        and not node.keywords
+        and node.args
+    ):
+        function = _FUNCTIONS[node.func.id]
+        args = [_compile_node(arg) for arg in node.args]
+        if node.func.id in ("min", "max"):
+            # Fold min(a, b, c) into pairwise element-wise calls
+            def fold(columns: Dict[str, np.ndarray]) -> np.ndarray:
+                result = args[0](columns)
+                for arg in args[1:]:
+                    result = function(result, arg(columns))
+                return result
+
+            return fold
+        if node.func.id == "round" and len(args) == 2:
+            digits = node.args[1]
+            if not isinstance(digits, ast.Constant) or not isinstance(
+                digits.value, int
+            ):
+                raise FormulaError("round() prima cijeli broj decimala")
+            places = digits.value
+            return lambda columns: np.round(args[0](columns), places)
+        if len(args) != 1:
+            raise FormulaError(f"{node.func.id}() prima jedan argument")
+        return lambda columns: function(args[0](columns))
+    raise FormulaError(f"Nepodržan izraz: {ast.dump(node)[:60]}")
+
+
+@lru_cache(maxsize=256)
+def compile_formula(formula: str) -> ArrayFunc:
+    """Compile an indexation formula into a function over column arrays.
+
+    Formulas are arithmetic over :data:`FORMULA_VARIABLES` with ``min``,
+    ``max``, ``abs`` and ``round``, e.g. ``max(zakupnina, zakupnina * indeks)``.
+    """
+
+    try:
+        tree = ast.parse(formula, mode="eval")
+    except SyntaxError as exc:
+        raise FormulaError(f"Neispravna formula: {exc.msg}")
+    return _compile_node(tree)
+
+
+def month_index(value: Any) -> int:
+    """``date`` / ``"YYYY-MM[-DD]"`` -> year * 12 + month - 1; -1 if unreadable."""
+
+    if isinstance(value, (date, datetime)):
+        return value.year * 12 + value.month - 1
+    text = str(value or "")
+    try:
+        return int(text[:4]) * 12 + int(text[5:7]) - 1
+    except ValueError:
+        return -1
+
+
+def month_label(index: int) -> str:
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+class IndexSeries:
+    """A price index as sorted month indices and values."""
+
+    def __init__(self, name: str, points: Sequence[Dict[str, Any]]) -> None:
+        pairs = sorted(
+            (
+                month_index(point.get("razdoblje")),
+                coerce_number(point.get("vrijednost")),
+            )
+            for point in points
+        )
+        pairs = [(month, value) for month, value in pairs if month >= 0 and value > 0]
+        self.name = name
+        self.months = np.array([month for month, _ in pairs], dtype=np.int64)
+        self.values = np.array([value for _, value in pairs], dtype=float)
+
+    @property
+    def latest(self) -> Optional[int]:
+        return int(self.months[-1]) if len(self.months) else None
+
+    def at(self, months: np.ndarray) -> np.ndarray:
+        """Value in force at each month (latest point not after it); NaN before
+        the series starts."""
+
+        positions = np.searchsorted(self.months, months, side="right") - 1
+        values = np.full(len(months), np.nan)
+        known = positions >= 0
+        values[known] = self.values[positions[known]]
+        return values
+
+
+async def load_series() -> Dict[str, IndexSeries]:
+    documents = await db[SERIES_COLLECTION].find({}).to_list(None)
+    return {
+        document["naziv"]: IndexSeries(
+            document["naziv"], document.get("vrijednosti", [])
+        )
+        for document in documents
+    }
+
+
+async def save_series(name: str, points: List[Dict[str, Any]]) -> Dict[str, Any]:
+    document = {
+        "id": name,
+        "naziv": name,
+        "vrijednosti": sorted(points, key=lambda point: point["razdoblje"]),
+        "azurirano": datetime.utcnow().isoformat(),
+    }
+    collection = db[SERIES_COLLECTION]
+    if await collection.find_one({"id": name}):
+        await collection.update_one({"id": name}, {"$set": document})
+    else:
+        await collection.insert_one(document)
+    return document
+
+
+def _skip(contract: Dict[str, Any], reason: str) -> Dict[str, Any]:
+    return {
+        "id": contract["id"],
+        "interna_oznaka": contract.get("interna_oznaka"),
+        "razlog": reason,
+    }
+
+
+def compute_indexation(
+    contracts: List[Dict[str, Any]],
+    series: Dict[str, IndexSeries],
+    target: Optional[int] = None,
+    min_months: int = DEFAULT_MIN_MONTHS,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """New rents for ``contracts`` as of month index ``target``.
+
+    Each contract is indexed from its base period (last indexation, else
+    start) to ``target`` (default: the latest month of its series). Returns
+    ``(changes, skipped)``; unchanged rents appear in neither.
+    """
+
+    count = len(contracts)
+    rents = np.array(
+        [coerce_number(c.get("osnovna_zakupnina")) for c in contracts], dtype=float
+    )
+    bases = np.array(
+        [
+            month_index(c.get("datum_zadnje_indeksacije") or c.get("datum_pocetka"))
+            for c in contracts
+        ],
+        dtype=np.int64,
+    )
+    names = np.array(
+        [str(c.get("indeks") or DEFAULT_SERIES).strip() for c in contracts],
+        dtype=object,
+    )
+    formulas = np.array(
+        [
+            str(c.get("formula_indeksacije") or DEFAULT_FORMULA).strip()
+            for c in contracts
+        ],
+        dtype=object,
+    )
+
+    old_index = np.full(count, np.nan)
+    new_index = np.full(count, np.nan)
+    targets = np.full(count, -1, dtype=np.int64)
+    reasons: Dict[int, str] = {}
+
+    # Index lookups: one searchsorted per series
+    for name in np.unique(names) if count else []:
+        rows = np.flatnonzero(names == name)
+        known = series.get(name)
+        if known is None or known.latest is None:
+            reasons.update({int(row): f"Nepoznat indeks {name}" for row in rows})
+            continue
+        month = known.latest if target is None else target
+        targets[rows] = month
+        old_index[rows] = known.at(bases[rows])
+        new_index[rows] = known.at(np.full(len(rows), month))
+
+    months = targets - bases
+    for row in np.flatnonzero(bases < 0):
+        reasons.setdefault(int(row), "Nedostaje datum početka")
+    for row in np.flatnonzero(np.isnan(old_index) | np.isnan(new_index)):
+        reasons.setdefault(int(row), "Nema vrijednosti indeksa za bazno razdoblje")
+    for row in np.flatnonzero(months < min_months):
+        reasons.setdefault(int(row), "Indeksacija još nije dospjela")
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = new_index / old_index
+    columns = {
+        "zakupnina": rents,
+        "indeks": ratio,
+        "promjena": ratio - 1,
+        "stari_indeks": old_index,
+        "novi_indeks": new_index,
+        "mjeseci": months.astype(float),
+    }
+    new_rents = rents.copy()
+    # One vectorised evaluation per distinct formula
+    for formula in np.unique(formulas) if count else []:
+        rows = np.flatnonzero(formulas == formula)
+        try:
+            with np.errstate(all="ignore"):
+                result = compile_formula(formula)(
+                    {key: values[rows] for key, values in columns.items()}
+                )
+        except FormulaError as exc:
+            reasons.update({int(row): str(exc) for row in rows})
+            continue
+        new_rents[rows] = np.broadcast_to(result, rows.shape)
+    new_rents = np.round(new_rents, 2)
+    for row in np.flatnonzero(~np.isfinite(new_rents) | (new_rents < 0)):
+        reasons.setdefault(int(row), "Formula ne daje valjanu zakupninu")
+
+    valid = np.ones(count, dtype=bool)
+    valid[list(reasons)] = False
+    changed = valid & (new_rents != np.round(rents, 2))
+    changes = [
+        {
+            "id": contracts[row]["id"],
+            "interna_oznaka": contracts[row].get("interna_oznaka"),
+            "indeks": names[row],
+            "bazno_razdoblje": month_label(int(bases[row])),
+            "razdoblje": month_label(int(targets[row])),
+            "stari_indeks": float(old_index[row]),
+            "novi_indeks": float(new_index[row]),
+            "stara_zakupnina": float(rents[row]),
+            "nova_zakupnina": float(new_rents[row]),
+            "promjena_posto": (
+                round(float(new_rents[row] / rents[row] - 1) * 100, 2)
+                if rents[row]
+                else None
+            ),
+        }
+        for row in np.flatnonzero(changed)
+    ]
+    skipped = [_skip(contracts[row], reason) for row, reason in sorted(reasons.items())]
+    return changes, skipped
+
+
+async def run_indexation(
+    razdoblje: Optional[str] = None,
+    ugovor_ids: Optional[List[str]] = None,
+    min_months: int = DEFAULT_MIN_MONTHS,
+    apply: bool = False,
+) -> Dict[str, Any]:
+    """Preview (or with ``apply`` store) indexed rents of the caller's
+    indexable active contracts."""
+
+    started = time.perf_counter()
+    target = month_index(razdoblje) if razdoblje else None
+    if target is not None and target < 0:
+        raise ValueError("Razdoblje mora biti u obliku GGGG-MM")
+    query: Dict[str, Any] = {
+        "indeksacija": True,
+        "status": {"$in": [status.value for status in ACTIVE_STATUSES]},
+    }
+    if ugovor_ids:
+        query["id"] = {"$in": ugovor_ids}
+    contracts = await db.ugovori.find(query).to_list(None)
+    changes, skipped = compute_indexation(
+        contracts, await load_series(), target, min_months
+    )
+
+    updated = 0
+    if apply and changes:
+        async with store.bulk() as bulk:
+            updated = await bulk.set_each(
+                "ugovori",
+                {
+                    change["id"]: {
+                        "osnovna_zakupnina": change["nova_zakupnina"],
+                        "datum_zadnje_indeksacije": f"{change['razdoblje']}-01",
+                    }
+                    for change in changes
+                },
+            )
+    return {
+        "razdoblje": razdoblje,
+        "primijenjeno": apply,
+        "ukupno_ugovora": len(contracts),
+        "azurirano": updated,
+        "ukupno_staro": round(sum(c["stara_zakupnina"] for c in changes), 2),
+        "ukupno_novo": round(sum(c["nova_zakupnina"] for c in changes), 2),
+        "promjene": changes,
+        "preskoceni": skipped,
+        "trajanje_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
@@ -1,95 +1,158 @@
 import logging
 import uuid
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
 
-from app.db.instance import db
+from app.db.document_store import field
+from app.db.instance import store
 from app.db.utils import prepare_for_mongo
+from app.models.domain import StatusUgovora
 
 logger = logging.getLogger(__name__)
 
+# Thresholds for reminders (in days before the contract ends)
+THRESHOLDS = (90, 60, 30)
 
-async def check_contract_expirations():
-    """
-    Checks for contracts expiring in 90, 60, or 30 days and creates reminders.
-    Should be run periodically (e.g., daily).
-    """
-    logger.info("Starting automatic contract expiration check...")
+# Last successful run, so a missed day does not lose reminders
+WATERMARK_COLLECTION = "job_state"
+WATERMARK_ID = "contract_expiration_reminders"
 
-    # 1. Fetch active contracts
-    # We only care about active contracts
-    cursor = db.ugovori.find({"status": "aktivno"})
-    active_contracts = await cursor.to_list(length=None)
+# Namespace for reminder ids derived from (contract_id, threshold)
+REMINDER_NAMESPACE = uuid.UUID("6f1c2a7e-3b0d-4c55-9a42-1d8e0f7b5c21")
 
-    logger.info(f"Found {len(active_contracts)} active contracts.")
 
-    today = date.today()
+def reminder_key(contract_id: str, threshold: int) -> str:
+    """Idempotency key of the reminder for one contract and threshold."""
 
-    # Thresholds for reminders (in days)
-    thresholds = [90, 60, 30]
+    return f"istek_ugovora:{contract_id}:{threshold}"
 
-    created_count = 0
 
-    for contract in active_contracts:
-        end_date = contract.get("datum_zavrsetka")
+def reminder_id(contract_id: str, threshold: int) -> str:
+    # The key doubles as the document id, so a reminder can only exist once
+    return str(uuid.uuid5(REMINDER_NAMESPACE, reminder_key(contract_id, threshold)))
 
-        # Ensure end_date is a date object (depending on how mongo driver returns it, might be datetime or str)
-        if isinstance(end_date, str):
-            try:
-                end_date = datetime.strptime(end_date, "%Y-%m-%d").date()
-            except ValueError:
-                continue
-        elif isinstance(end_date, datetime):
-            end_date = end_date.date()
 
-        if not end_date:
-            continue
+def _end_date(contract: Dict[str, Any]) -> Optional[date]:
+    try:
+        return date.fromisoformat(str(contract.get("datum_zavrsetka") or "")[:10])
+    except ValueError:
+        return None
+
 
-        days_until_expiry = (end_date - today).days
+def crossed_threshold(
+    end_date: date, since: date, today: date, thresholds: Tuple[int, ...] = THRESHOLDS
+) -> Optional[int]:
+    """The most urgent threshold whose day fell in ``(since, today]``."""
 
-        # Check if we hit any threshold exactly (or within a reasonable small window if run daily)
-        # We'll use strict equality for simplicity if run daily, or a range if safer.
-        # Let's use a small window (0-1 days) to ensure we don't miss it if the job runs late.
+    crossed = [
+        days for days in thresholds if since < end_date - timedelta(days=days) <= today
+    ]
+    return min(crossed) if crossed else None
+
+
+async def check_contract_expirations(today: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Creates reminders for active contracts whose end date crossed 90, 60 or 30 days
+    since the last successful run (the stored watermark).
+    Should be run periodically (e.g., daily); after a missed run the next one catches up.
+    """
+    logger.info("Starting automatic contract expiration check...")
 
-        for days in thresholds:
-            if days_until_expiry == days:
-                await create_expiration_reminder_if_not_exists(contract, days)
-                created_count += 1
+    today = today or date.today()
+    async with store.bulk() as bulk:
+        state = await bulk.documents(WATERMARK_COLLECTION, ids=[WATERMARK_ID])
+        # On the first run only today's crossings count
+        since = (
+            date.fromisoformat(state[0]["watermark"])
+            if state
+            else today - timedelta(days=1)
+        )
+        if since >= today:
+            logger.info("Contract expirations already checked for %s.", today)
+            return {"kreirano": 0, "od": since.isoformat(), "do": today.isoformat()}
+
+        # Only end dates that can have crossed a threshold in (since, today];
+        # the comparison runs in the database on the ISO date strings.
+        window_start = (since + timedelta(days=min(THRESHOLDS))).isoformat()
+        window_end = (today + timedelta(days=max(THRESHOLDS) + 1)).isoformat()
+        contracts = await bulk.documents(
+            "ugovori",
+            field("status").in_(
+                [StatusUgovora.AKTIVNO.value, StatusUgovora.NA_ISTEKU.value]
+            ),
+            field("datum_zavrsetka") > window_start,
+            field("datum_zavrsetka") < window_end,
+        )
+
+        candidates: Dict[str, Dict[str, Any]] = {}
+        for contract in contracts:
+            end_date = _end_date(contract)
+            if end_date is None or end_date < today:
+                continue
+            threshold = crossed_threshold(end_date, since, today)
+            if threshold is not None:
+                reminder = _expiration_reminder(
+                    contract, threshold, (end_date - today).days
+                )
+                candidates[reminder["id"]] = reminder
+
+        # One lookup replaces a podsjetnici scan per contract
+        existing = {
+            reminder["id"]
+            for reminder in await bulk.documents("podsjetnici", ids=sorted(candidates))
+        }
+        new_reminders: List[Dict[str, Any]] = [
+            reminder for key, reminder in candidates.items() if key not in existing
+        ]
+        if new_reminders:
+            await bulk.insert_many("podsjetnici", new_reminders)
+
+        watermark = {"id": WATERMARK_ID, "watermark": today.isoformat()}
+        if state:
+            await bulk.set_where(
+                WATERMARK_COLLECTION,
+                {"watermark": watermark["watermark"]},
+                ids=[WATERMARK_ID],
+            )
+        else:
+            await bulk.insert_many(WATERMARK_COLLECTION, [watermark])
 
-    logger.info(f"Automatic check completed. Created {created_count} new reminders.")
+    logger.info(
+        "Automatic check completed for %s..%s. Created %s new reminders.",
+        since,
+        today,
+        len(new_reminders),
+    )
+    return {
+        "kreirano": len(new_reminders),
+        "od": since.isoformat(),
+        "do": today.isoformat(),
+    }
 
 
-async def create_expiration_reminder_if_not_exists(contract, days_remaining):
+def _expiration_reminder(
+    contract: Dict[str, Any], threshold: int, days_remaining: int
+) -> Dict[str, Any]:
     contract_id = contract.get("id")
     contract_number = contract.get("interna_oznaka", "Nepoznat")
     tenant_name = contract.get("zakupnik_naziv", "Nepoznati zakupnik")
 
-    title = f"Istek ugovora: {contract_number} ({days_remaining} dana)"
+    title = f"Istek ugovora: {contract_number} ({threshold} dana)"
     description = f"Ugovor za {tenant_name} istječe za {days_remaining} dana. Datum isteka: {contract.get('datum_zavrsetka')}."
 
-    # Check if reminder already exists for this expiration event
-    # We query by related entity ID and partial title match or specific metadata if we had it.
-    # Simple check: Title + Entity ID
-    existing = await db.podsjetnici.find_one(
-        {"povezani_entitet_id": contract_id, "naslov": title, "zavrseno": False}
-    )
-
-    if existing:
-        return
-
     reminder_data = {
-        "id": str(uuid.uuid4()),
+        "id": reminder_id(contract_id, threshold),
+        "kljuc": reminder_key(contract_id, threshold),
         "naslov": title,
         "opis": description,
         "datum": datetime.now(),  # Reminder date is "now", meaning it's relevant today
         "povezani_entitet_id": contract_id,
         "tip_entiteta": "ugovor",
-        "prioritet": "visoko" if days_remaining <= 30 else "srednje",
+        "prioritet": "visoko" if threshold <= 30 else "srednje",
         "zavrseno": False,
         "created_at": datetime.now(),
         "created_by": "system",  # System generated
     }
-
-    await db.podsjetnici.insert_one(prepare_for_mongo(reminder_data))
-    logger.info(
-        f"Created reminder for contract {contract_number} ({days_remaining} days left)"
-    )
+    if contract.get("tenant_id"):
+        reminder_data["tenant_id"] = contract["tenant_id"]
+    return prepare_for_mongo(reminder_data)
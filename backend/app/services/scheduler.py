@@ -0,0 +1,233 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.config import get_settings
+from app.core.cron import CronSchedule
+from app.db.instance import job_store, rebuild_tenant_kpis
+from app.db.scheduled_jobs import JobLease, JobStore
+from app.services.contract_status_service import sync_contract_and_unit_statuses
+from app.services.reminder_service import check_contract_expirations
+from fastapi.encoders import jsonable_encoder
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+JobFunc = Callable[[], Awaitable[Any]]
+
+
+@dataclass
+class ScheduledJob:
+    name: str
+    schedule: CronSchedule
+    func: JobFunc
+
+
+def rows_processed(summary: Optional[Dict[str, Any]]) -> Optional[int]:
+    """Rows a job touched: the sum of the counts in its summary."""
+
+    if summary is None:
+        return None
+    return sum(
+        value
+        for value in summary.values()
+        if isinstance(value, int) and not isinstance(value, bool)
+    )
+
+
+class JobScheduler:
+    """Runs registered jobs on cron schedules kept in the database.
+
+    Every worker runs a scheduler; the job table decides which one executes
+    a due job (see :class:`~app.db.scheduled_jobs.JobStore`). Schedules are
+    evaluated in UTC. A run missed while all workers were down happens once
+    after startup, then the job continues on its schedule.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        lease: timedelta,
+        poll_seconds: float,
+        owner: Optional[str] = None,
+    ) -> None:
+        self._store = store
+        self.lease = lease
+        self.poll_seconds = poll_seconds
+        self.owner = (
+            owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+        self.jobs: Dict[str, ScheduledJob] = {}
+        self._background: Set[asyncio.Future] = set()
+
+    def register(self, name: str, schedule: str, func: JobFunc) -> None:
+        self.jobs[name] = ScheduledJob(name, CronSchedule.parse(schedule), func)
+
+    async def sync_registry(self, now: Optional[datetime] = None) -> None:
+        """Create the job rows (or apply changed schedules) in the database."""
+
+        now = now or datetime.utcnow()
+        for job in self.jobs.values():
+            await self._store.register(
+                job.name, job.schedule.expression, job.schedule.next_after(now)
+            )
+
+    async def run_due(self, now: Optional[datetime] = None) -> List[str]:
+        """Run every due job this worker manages to lease; returns their names."""
+
+        now = now or datetime.utcnow()
+        ran = []
+        for name in await self._store.due(now):
+            job = self.jobs.get(name)
+            if job is None:
+                continue
+            lease = await self._store.claim(name, self.owner, now, self.lease)
+            if lease is None:
+                # Another worker holds it
+                continue
+            if job.schedule.next_after(lease.due_at) < now:
+                logger.info(
+                    "Catching up job %s, due since %s", name, lease.due_at.isoformat()
+                )
+            run_id = await self._store.start_run(lease, "schedule")
+            await self._execute(job, lease, run_id, job.schedule.next_after(now))
+            ran.append(name)
+        return ran
+
+    async def _claim_now(
+        self, name: str, trigger: str
+    ) -> Optional[Tuple[ScheduledJob, JobLease, str]]:
+        job = self.jobs[name]
+        now = datetime.utcnow()
+        await self._store.register(
+            name, job.schedule.expression, job.schedule.next_after(now)
+        )
+        lease = await self._store.claim(name, self.owner, now, self.lease, force=True)
+        if lease is None:
+            return None
+        return job, lease, await self._store.start_run(lease, trigger)
+
+    async def run_now(self, name: str, trigger: str = "manual") -> Optional[str]:
+        """Run ``name`` to completion now; returns the run id.
+
+        Returns ``None`` without running it if the job is already running on
+        any worker. The job keeps its scheduled next run.
+        """
+
+        claimed = await self._claim_now(name, trigger)
+        if claimed is None:
+            return None
+        job, lease, run_id = claimed
+        await self._execute(job, lease, run_id, None)
+        return run_id
+
+    async def trigger(self, name: str) -> Optional[str]:
+        """Start ``name`` now in the background; returns the run id.
+
+        Returns ``None`` if the job is already running. The job keeps its
+        scheduled next run.
+        """
+
+        claimed = await self._claim_now(name, "manual")
+        if claimed is None:
+            return None
+        job, lease, run_id = claimed
+        task = asyncio.ensure_future(self._execute(job, lease, run_id, None))
+        # Keep a reference until it finishes so the task is not collected
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return run_id
+
+    async def _heartbeat(self, lease: JobLease) -> None:
+        # Keep the lease while a long job is still running
+        while True:
+            await asyncio.sleep(self.lease.total_seconds() / 3)
+            await self._store.renew(lease, self.lease)
+
+    async def _execute(
+        self,
+        job: ScheduledJob,
+        lease: JobLease,
+        run_id: str,
+        next_run_at: Optional[datetime],
+    ) -> None:
+        started_at = datetime.utcnow()
+        started = time.perf_counter()
+        heartbeat = asyncio.ensure_future(self._heartbeat(lease))
+        status, error, result = "ok", None, None
+        try:
+            result = await job.func()
+        except Exception as exc:
+            status, error = "error", f"{type(exc).__name__}: {exc}"
+            logger.exception("Job %s failed", job.name)
+        finally:
+            heartbeat.cancel()
+        duration_ms = round((time.perf_counter() - started) * 1000, 1)
+        summary = result if isinstance(result, dict) else None
+        await self._store.finish_run(
+            run_id,
+            status=status,
+            duration_ms=duration_ms,
+            rows_processed=rows_processed(summary),
+            result=jsonable_encoder(summary) if summary is not None else None,
+            error=error,
+        )
+        await self._store.complete(
+            lease,
+            status=status,
+            started_at=started_at,
+            duration_ms=duration_ms,
+            next_run_at=next_run_at,
+            error=error,
+        )
+        logger.info("Job %s finished (%s) in %s ms", job.name, status, duration_ms)
+
+    async def run_forever(self) -> None:
+        registered = False
+        while True:
+            try:
+                if not registered:
+                    await self.sync_registry()
+                    registered = True
+                await self.run_due()
+            except Exception as exc:
+                logger.error(f"Error in background scheduler: {exc}")
+            await asyncio.sleep(self.poll_seconds)
+
+
+TENANT_KPIS_JOB = "tenant_kpis_rebuild"
+
+
+async def rebuild_tenant_kpis_job() -> Dict[str, int]:
+    """Recompute the dashboard KPIs, repairing drift of the maintained rows."""
+
+    return {"tenants": len(await rebuild_tenant_kpis())}
+
+
+scheduler = JobScheduler(
+    job_store,
+    lease=timedelta(seconds=settings.SCHEDULER_LEASE_SECONDS),
+    poll_seconds=settings.SCHEDULER_POLL_SECONDS,
+)
+scheduler.register(
+    "contract_expiration_reminders",
+    settings.CONTRACT_REMINDERS_CRON,
+    check_contract_expirations,
+)
+scheduler.register(
+    "contract_status_sync",
+    settings.CONTRACT_STATUS_SYNC_CRON,
+    sync_contract_and_unit_statuses,
+)
+scheduler.register(
+    TENANT_KPIS_JOB,
+    settings.TENANT_KPIS_REBUILD_CRON,
+    rebuild_tenant_kpis_job,
+)
@@ -0,0 +1,120 @@
+"""Login throughput benchmark.
+
+Fires concurrent logins at a running API while a probe repeatedly requests a
+cheap endpoint, then reports login throughput and the probe's latency. With
+bcrypt offloaded to the password hash pool the probe latency should stay close
+to its idle baseline even while logins are saturating the pool.
+
+Usage:
+    python scripts/bench_login.py --email admin@example.com --password secret \\
+        --url http://localhost:8000 --concurrency 20 --logins 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from typing import List
+
+try:
+    import httpx
+except ImportError:
+    print("httpx not found")
+    sys.exit(1)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def describe(label: str, values: List[float]) -> None:
+    if not values:
+        print(f"{label}: no samples")
+        return
+    print(
+        f"{label}: n={len(values)} "
+        f"p50={percentile(values, 50):.1f}ms "
+        f"p95={percentile(values, 95):.1f}ms "
+        f"max={max(values):.1f}ms "
+        f"mean={statistics.mean(values):.1f}ms"
+    )
+
+
+async def probe(
+    client: httpx.AsyncClient, path: str, stop: asyncio.Event
+) -> List[float]:
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get(path)
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.02)
+    return latencies
+
+
+async def run_logins(
+    client: httpx.AsyncClient, args: argparse.Namespace
+) -> List[float]:
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    failures = 0
+
+    async def one_login() -> None:
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post(
+                "/api/auth/login",
+                json={"email": args.email, "password": args.password},
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+            if response.status_code != 200:
+                failures += 1
+
+    await asyncio.gather(*[one_login() for _ in range(args.logins)])
+    if failures:
+        print(f"Failed logins: {failures}")
+    return latencies
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--probe-path", default="/")
+    parser.add_argument("--baseline-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        stop = asyncio.Event()
+        baseline_task = asyncio.create_task(probe(client, args.probe_path, stop))
+        await asyncio.sleep(args.baseline_seconds)
+        stop.set()
+        baseline = await baseline_task
+
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(probe(client, args.probe_path, stop))
+        started = time.perf_counter()
+        login_latencies = await run_logins(client, args)
+        elapsed = time.perf_counter() - started
+        stop.set()
+        under_load = await probe_task
+
+        print(
+            f"Logins: {args.logins} in {elapsed:.2f}s ({args.logins / elapsed:.1f}/s)"
+        )
+        describe("Login latency", login_latencies)
+        describe(f"Probe {args.probe_path} idle", baseline)
+        describe(f"Probe {args.probe_path} during logins", under_load)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
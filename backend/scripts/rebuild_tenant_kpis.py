@@ -0,0 +1,32 @@
+"""Rebuild the materialised tenant_kpis rows from the source collections.
+
+Run after restoring a backup, after bulk edits made directly in the database,
+or whenever dashboard figures look out of sync:
+
+    python scripts/rebuild_tenant_kpis.py
+"""
+
+import asyncio
+
+from app.db.base import Base
+from app.db.instance import rebuild_tenant_kpis
+from app.db.session import dispose_engine, get_engine
+
+
+async def main():
+    engine = get_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    rows = await rebuild_tenant_kpis()
+    for tenant_key, data in sorted(rows.items()):
+        print(
+            f"{tenant_key}: {data['properties']} nekretnina, "
+            f"{sum(v['count'] for v in data['contracts'].values())} ugovora, "
+            f"{sum(data['maintenance'].values())} zadataka odrzavanja"
+        )
+    await dispose_engine()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,41 @@
+import os
+import sys
+from datetime import datetime
+
+import pytest
+
+# Add path to sys to find app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.cron import CronError, CronSchedule  # noqa: E402
+
+
+@pytest.mark.parametrize(
+    "expression, after, expected",
+    [
+        ("0 2 * * *", datetime(2026, 10, 19, 2, 0), datetime(2026, 10, 20, 2, 0)),
+        ("0 2 * * *", datetime(2026, 10, 19, 1, 59, 30), datetime(2026, 10, 19, 2)),
+        ("*/15 * * * *", datetime(2026, 10, 19, 2, 7), datetime(2026, 10, 19, 2, 15)),
+        # Friday evening -> Monday morning
+        ("0 9 * * 1-5", datetime(2026, 10, 23, 10), datetime(2026, 10, 26, 9)),
+        ("0 0 29 2 *", datetime(2026, 3, 1), datetime(2028, 2, 29)),
+        # Day of month OR weekday when both are restricted; 7 is Sunday
+        ("30 4 1,15 * 7", datetime(2026, 10, 19), datetime(2026, 10, 25, 4, 30)),
+        ("0 0 1 1 *", datetime(2026, 12, 31, 23, 59), datetime(2027, 1, 1)),
+    ],
+)
+def test_next_after(expression, after, expected):
+    assert CronSchedule.parse(expression).next_after(after) == expected
+
+
+@pytest.mark.parametrize(
+    "expression", ["* * * *", "60 * * * *", "*/0 * * * *", "5-1 * * * *", "a * * * *"]
+)
+def test_invalid_expressions_are_rejected(expression):
+    with pytest.raises(CronError):
+        CronSchedule.parse(expression)
+
+
+def test_schedule_that_never_fires():
+    with pytest.raises(CronError):
+        CronSchedule.parse("0 0 30 2 *").next_after(datetime(2026, 1, 1))
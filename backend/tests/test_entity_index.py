@@ -0,0 +1,103 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace
+
+# Add path to sys to find app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.entity_index import (  # noqa: E402
+    EntityIndex,
+    address_key,
+    name_key,
+    trigrams,
+)
+
+
+def _index(*documents):
+    index = EntityIndex(database=None)
+    index._ready = True
+    events = [
+        SimpleNamespace(collection=collection, before=None, after=document)
+        for collection, document in documents
+    ]
+    asyncio.run(index.on_write(events))
+    return index
+
+
+def test_keys_fold_case_diacritics_and_legal_forms():
+    assert name_key("Čistoća d.o.o.") == "cistoca"
+    assert name_key("CISTOCA DOO") == "cistoca"
+    assert name_key("Đurđa j.d.o.o.") == "durda"
+    assert address_key("Ul. Ivana Gundulića 5, 21000 Split") == "ivana gundulica 5"
+    assert trigrams("ab") == frozenset({"  a", " ab", "ab "})
+
+
+def test_tenant_matching_ranks_oib_then_similarity():
+    index = _index(
+        ("zakupnici", {"id": "t1", "naziv_firme": "Čistoća d.o.o.", "oib": "111"}),
+        ("zakupnici", {"id": "t2", "naziv_firme": "Cistoca Plus d.d.", "oib": "222"}),
+        ("zakupnici", {"id": "t3", "naziv_firme": "Zelenilo doo", "oib": "333"}),
+    )
+
+    # Legal-form variant and a typo still find the right tenant first
+    ranked = index.match_tenant(naziv="CISTOČA DOO")
+    assert [c.id for c in ranked][:1] == ["t1"]
+    assert ranked[0].score == 1.0
+    assert [c.id for c in index.match_tenant(naziv="Zelenillo")] == ["t3"]
+
+    # An exact OIB wins over a perfect name match
+    ranked = index.match_tenant(naziv="Čistoća d.o.o.", oib="HR 333")
+    assert [(c.id, c.reason) for c in ranked][:2] == [("t3", "oib"), ("t1", "naziv")]
+
+
+def test_property_matching_uses_name_or_address_and_tenant_scope():
+    index = _index(
+        (
+            "nekretnine",
+            {
+                "id": "p1",
+                "tenant_id": "a",
+                "naziv": "Lučki magazin",
+                "adresa": "Obala 3",
+            },
+        ),
+        (
+            "nekretnine",
+            {
+                "id": "p2",
+                "tenant_id": "b",
+                "naziv": "Stari grad",
+                "adresa": "Ul. Ivana Gundulića 5, Split",
+            },
+        ),
+    )
+
+    ranked = index.match_property(adresa="Ivana Gundulica 5", tenant_id="b")
+    assert [(c.id, c.reason) for c in ranked] == [("p2", "adresa")]
+    assert index.match_property(adresa="Ivana Gundulica 5", tenant_id="a") == []
+    assert [c.id for c in index.match_property(naziv="lucki magazin")] == ["p1"]
+
+
+def test_writes_update_and_remove_entries():
+    index = _index(("zakupnici", {"id": "t1", "naziv_firme": "Alfa", "oib": "1"}))
+    asyncio.run(
+        index.on_write(
+            [
+                SimpleNamespace(
+                    collection="zakupnici",
+                    before={"id": "t1"},
+                    after={"id": "t1", "naziv_firme": "Omega", "oib": "2"},
+                )
+            ]
+        )
+    )
+    assert index.match_tenant(naziv="Alfa", oib="1") == []
+    assert [c.id for c in index.match_tenant(oib="2")] == ["t1"]
+
+    asyncio.run(
+        index.on_write(
+            [SimpleNamespace(collection="zakupnici", before={"id": "t1"}, after=None)]
+        )
+    )
+    assert index.match_tenant(naziv="Omega", oib="2") == []
@@ -1,6 +1,8 @@
 import os
 import sys
+from contextlib import asynccontextmanager, contextmanager
 from datetime import date
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -10,9 +12,46 @@ from fastapi import HTTPException
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.api.v1.endpoints import contracts  # noqa: E402
+from app.db.contract_intervals import (  # noqa: E402
+    ContractInterval,
+    UnitIntervals,
+    _interval,
+)
 from app.models.domain import StatusUgovora  # noqa: E402
 
 
+@contextmanager
+def _stored_contracts(*contracts_data):
+    """Serve check_contract_overlap's database read from ``contracts_data``."""
+
+    async def stored_unit_intervals(bulk, unit_ids, tenant_id=None):
+        intervals = {unit_id: UnitIntervals() for unit_id in unit_ids}
+        for contract in contracts_data:
+            interval = _interval(contract)
+            if interval and contract["property_unit_id"] in intervals:
+                intervals[contract["property_unit_id"]].put(interval)
+        return intervals
+
+    @asynccontextmanager
+    async def bulk():
+        yield None
+
+    with patch(
+        "app.api.v1.endpoints.contracts.stored_unit_intervals", stored_unit_intervals
+    ), patch("app.api.v1.endpoints.contracts.store", SimpleNamespace(bulk=bulk)):
+        yield
+
+
+EXISTING_CONTRACT = {
+    "id": "existing_contract",
+    "interna_oznaka": "EXISTING-001",
+    "property_unit_id": "unit1",
+    "status": StatusUgovora.AKTIVNO,
+    "datum_pocetka": "2024-06-01",
+    "datum_zavrsetka": "2025-06-01",
+}
+
+
 @pytest.mark.asyncio
 async def test_check_contract_overlap_raises():
     # Setup
@@ -20,23 +59,14 @@ async def test_check_contract_overlap_raises():
     start = date(2024, 1, 1)
     end = date(2024, 12, 31)
 
-    # Mock db response to simulate existing contract
-    mock_contract = {
-        "id": "existing_contract",
-        "interna_oznaka": "EXISTING-001",
-        "datum_pocetka": "2024-06-01",
-        "datum_zavrsetka": "2025-06-01",
-    }
-
-    with patch("app.api.v1.endpoints.contracts.db") as mock_db:
-        mock_db.ugovori.find_one = AsyncMock(return_value=mock_contract)
-
+    with _stored_contracts(EXISTING_CONTRACT):
         # Test
         with pytest.raises(HTTPException) as excinfo:
             await contracts.check_contract_overlap(unit_id, start, end)
 
         assert excinfo.value.status_code == 400
         assert "Postoji preklapanje" in excinfo.value.detail
+        assert "EXISTING-001" in excinfo.value.detail
 
 
 @pytest.mark.asyncio
@@ -44,13 +74,46 @@ async def test_check_contract_overlap_passes():
     # Setup
     unit_id = "unit1"
     start = date(2024, 1, 1)
-    end = date(2024, 12, 31)
-
-    with patch("app.api.v1.endpoints.contracts.db") as mock_db:
-        mock_db.ugovori.find_one = AsyncMock(return_value=None)
-
+    end = date(2024, 5, 31)
+
+    with _stored_contracts(
+        EXISTING_CONTRACT,
+        # Other units and non-blocking statuses never overlap
+        {**EXISTING_CONTRACT, "id": "other-unit", "property_unit_id": "unit2"},
+        {
+            **EXISTING_CONTRACT,
+            "id": "ended",
+            "status": "raskinuto",
+            "datum_pocetka": "2024-01-01",
+        },
+    ):
         # Test - should not raise
         await contracts.check_contract_overlap(unit_id, start, end)
+        # The contract being edited does not conflict with itself
+        await contracts.check_contract_overlap(
+            unit_id,
+            date(2024, 7, 1),
+            date(2024, 8, 1),
+            exclude_contract_id="existing_contract",
+        )
+
+
+def test_unit_intervals_find_overlap_with_exclusion():
+    intervals = UnitIntervals()
+    for contract_id, start, end in [
+        ("long", "2020-01-01", "2030-12-31"),
+        ("a", "2024-01-01", "2024-03-31"),
+        ("b", "2024-06-01", "2024-08-31"),
+    ]:
+        intervals.put(ContractInterval(start, end, contract_id))
+
+    assert intervals.find_overlap("2019-01-01", "2019-12-31") is None
+    assert intervals.find_overlap("2024-04-01", "2024-05-01").contract_id == "long"
+    assert intervals.find_overlap("2024-04-01", "2024-05-01", "long") is None
+    assert intervals.find_overlap("2024-08-31", "2024-09-30", "long").contract_id == "b"
+    assert [
+        (a.contract_id, b.contract_id) for a, b in intervals.overlapping_pairs()
+    ] == [("long", "a"), ("long", "b")]
 
 
 @pytest.mark.asyncio
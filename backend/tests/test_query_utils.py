@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+
+import pytest
+
+# Add path to sys to find app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db import query_utils  # noqa: E402
+from app.db.query_utils import (  # noqa: E402
+    QueryBudgetExceeded,
+    UnsafeRegexError,
+    compile_regex,
+    document_matches,
+    query_matcher,
+)
+
+
+def test_contains_is_literal_and_case_insensitive_by_default():
+    doc = {"naziv": "Ured (1. kat) - A+B"}
+
+    assert document_matches(doc, {"naziv": {"$contains": "(1. KAT)"}})
+    assert document_matches(doc, {"naziv": {"$contains": "a+b"}})
+    assert not document_matches(doc, {"naziv": {"$contains": "a+b", "$options": ""}})
+    assert not document_matches(doc, {"naziv": {"$contains": "1.*kat"}})
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "(a+)+$",
+        "(a*)*b",
+        "(x|xy)*z",
+        r"(\w+\s?)+$",
+        r"(a)\1",
+        "a" * 300,
+        ".*.*.*.*x",
+        ".+a.+x",
+        ".{0,64}.{0,64}x",
+    ],
+)
+def test_redos_prone_patterns_are_rejected(pattern):
+    with pytest.raises(UnsafeRegexError):
+        compile_regex(pattern, True)
+
+
+def test_safe_patterns_compile_once():
+    compile_regex.cache_clear()
+    assert document_matches({"oib": "12345"}, {"oib": {"$regex": "^12[0-9]+$"}})
+    assert document_matches({"oib": "12345"}, {"oib": {"$regex": "^12[0-9]+$"}})
+    assert compile_regex.cache_info().hits == 1
+    assert compile_regex("(ab){2}c|d", False).search("ababc")
+
+
+def test_invalid_pattern_is_rejected():
+    with pytest.raises(UnsafeRegexError):
+        compile_regex("(unclosed", False)
+
+
+def test_regex_queries_stop_when_budget_is_spent(monkeypatch):
+    clock = iter([0.0, 0.05, 0.2])
+    monkeypatch.setattr(query_utils.time, "monotonic", lambda: next(clock))
+    matches = query_matcher({"naziv": {"$regex": "a"}}, budget_seconds=0.1)
+
+    assert matches({"naziv": "a"})
+    assert matches({"naziv": "a"})
+    with pytest.raises(QueryBudgetExceeded):
+        matches({"naziv": "a"})
+
+
+def test_plain_queries_are_not_budgeted():
+    matches = query_matcher({"naziv": {"$contains": "a"}}, budget_seconds=1e-9)
+    time.sleep(0.001)
+    assert all(matches({"naziv": "a"}) for _ in range(3))
+
+
+def test_regex_evaluation_stays_short_on_long_values():
+    assert document_matches({"naziv": "a" * 5000}, {"naziv": {"$regex": "^a+$"}})
+    started = time.perf_counter()
+    assert not query_utils.value_matches(
+        "a" * 3000 + "x", {"$regex": "a?a?a?a?a?a?.*y"}
+    )
+    assert time.perf_counter() - started < 0.5
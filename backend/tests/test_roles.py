@@ -0,0 +1,55 @@
+import os
+import sys
+
+# Add path to sys to find app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.roles import (  # noqa: E402
+    compile_scopes,
+    resolve_compiled_scopes,
+    resolve_role_scopes,
+    scope_matches,
+)
+
+
+def test_wildcard_and_exact_scopes():
+    compiled = compile_scopes(["properties:*", "leases:read", "self:read"])
+
+    assert compiled.allows("properties:delete")
+    assert compiled.allows("leases:read")
+    assert not compiled.allows("leases:update")
+    assert compiled.allows("self:read")
+    assert not compiled.allows("tenants:read")
+    assert not compiled.allows("reports")
+
+
+def test_any_action_implies_read():
+    compiled = compile_scopes(["users:assign", "documents:read"])
+
+    assert compiled.allows("users:read")
+    assert not compiled.allows("users:create")
+    assert compiled.allows("documents:read")
+    assert not compiled.allows("documents:create")
+
+
+def test_star_grants_everything():
+    assert scope_matches(["*"], "anything:at_all")
+    assert scope_matches(["*"], "plain")
+
+
+def test_compiled_scopes_are_memoised_per_role_and_scopes():
+    first = resolve_compiled_scopes("accountant", ["kpi:read"])
+    second = resolve_compiled_scopes("accountant", ["kpi:read"])
+
+    assert first is second
+    assert list(first.scopes) == resolve_role_scopes("accountant", ["kpi:read"])
+    assert resolve_compiled_scopes("viewer").allow_all
+
+
+def test_union_adds_tenant_scopes_without_mutating_original():
+    base = compile_scopes(["leases:read"])
+    extended = base.union(["maintenance:*"])
+
+    assert extended.allows("maintenance:update")
+    assert not base.allows("maintenance:update")
+    assert base.union(["leases:read"]) is base
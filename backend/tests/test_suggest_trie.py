@@ -0,0 +1,73 @@
+import os
+import sys
+
+# Add path to sys to find app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.db.suggest_trie import PrefixTrie  # noqa: E402
+
+
+def _entry(name):
+    return ("zakupnici", name, "naziv_firme")
+
+
+def test_prefix_lookup_returns_shorter_completions_first():
+    trie = PrefixTrie()
+    for key in ["ante", "antun", "ana", "anamarija", "bruno"]:
+        trie.insert(key, _entry(key))
+
+    assert [e[1] for e in trie.iter_prefix("an")] == [
+        "ana",
+        "ante",
+        "antun",
+        "anamarija",
+    ]
+    assert [e[1] for e in trie.iter_prefix("ant")] == ["ante", "antun"]
+    assert [e[1] for e in trie.iter_prefix("anamar")] == ["anamarija"]
+    assert list(trie.iter_prefix("c")) == []
+    assert list(trie.iter_prefix("antunx")) == []
+
+
+def test_edges_are_compressed_and_remerged_on_remove():
+    trie = PrefixTrie()
+    trie.insert("romana", _entry("romana"))
+    trie.insert("romanus", _entry("romanus"))
+    trie.insert("roman", _entry("roman"))
+
+    ((label, node),) = trie._root.children.values()
+    assert label == "roman"
+    assert sorted(edge for edge, _ in node.children.values()) == ["a", "us"]
+
+    trie.remove("roman", _entry("roman"))
+    trie.remove("romana", _entry("romana"))
+    ((label, node),) = trie._root.children.values()
+    assert label == "romanus"
+    assert trie.size == 1
+    assert [e[1] for e in trie.iter_prefix("rom")] == ["romanus"]
+
+    trie.remove("romanus", _entry("romanus"))
+    assert trie._root.children == {}
+    assert trie.size == 0
+
+
+def test_shared_keys_keep_every_entry():
+    trie = PrefixTrie()
+    trie.insert("split", _entry("a"))
+    trie.insert("split", _entry("b"))
+    trie.remove("split", _entry("a"))
+    assert list(trie.iter_prefix("sp")) == [_entry("b")]
+
+
+def test_complete_deduplicates_and_caches_short_prefixes():
+    trie = PrefixTrie()
+    # One entry indexed under several keys (e.g. every word of a name)
+    trie.insert("ana ana", _entry("x"))
+    trie.insert("ana", _entry("x"))
+    trie.insert("anita", _entry("y"))
+
+    assert trie.complete("a", 5) == [_entry("x"), _entry("y")]
+    assert "a" in trie._short_cache
+
+    trie.insert("ab", _entry("z"))
+    assert trie._short_cache == {}
+    assert trie.complete("a", 2) == [_entry("z"), _entry("x")]
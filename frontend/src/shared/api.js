@@ -93,6 +93,60 @@ apiClient.interceptors.request.use((config) => {
   return config;
 });
 
+const REFRESH_TOKEN_STORAGE_KEY = "refreshToken";
+let refreshInFlight = null;
+
+export const storeAuthTokens = ({ access_token, refresh_token } = {}) => {
+  if (typeof window === "undefined") {
+    return;
+  }
+  if (access_token) {
+    window.localStorage.setItem("authToken", access_token);
+  }
+  if (refresh_token) {
+    window.localStorage.setItem(REFRESH_TOKEN_STORAGE_KEY, refresh_token);
+  }
+};
+
+export const clearAuthTokens = () => {
+  if (typeof window === "undefined") {
+    return;
+  }
+  window.localStorage.removeItem("authToken");
+  window.localStorage.removeItem(REFRESH_TOKEN_STORAGE_KEY);
+};
+
+export const getStoredRefreshToken = () => {
+  if (typeof window === "undefined") {
+    return null;
+  }
+  return window.localStorage.getItem(REFRESH_TOKEN_STORAGE_KEY) || null;
+};
+
+// Concurrent 401s share one refresh call so the rotated token is only used once.
+const refreshAccessToken = () => {
+  const refreshToken = getStoredRefreshToken();
+  if (!refreshToken) {
+    return Promise.resolve(null);
+  }
+  if (!refreshInFlight) {
+    refreshInFlight = axios
+      .post(`${API_ROOT}/auth/refresh`, { refresh_token: refreshToken })
+      .then((response) => {
+        storeAuthTokens(response.data);
+        return response.data?.access_token || null;
+      })
+      .catch(() => {
+        clearAuthTokens();
+        return null;
+      })
+      .finally(() => {
+        refreshInFlight = null;
+      });
+  }
+  return refreshInFlight;
+};
+
 apiClient.interceptors.response.use(
   (response) => {
     // Automatic UI Update Trigger
@@ -130,7 +184,25 @@ apiClient.interceptors.response.use(
     }
     return response;
   },
-  (error) => {
+  async (error) => {
+    // Access tokens are short-lived: on the first 401 try to rotate the
+    // refresh token once and replay the original request.
+    const original = error?.config;
+    if (
+      error?.response?.status === 401 &&
+      original &&
+      !original._retried &&
+      !original.url?.includes("/auth/")
+    ) {
+      original._retried = true;
+      const token = await refreshAccessToken();
+      if (token) {
+        original.headers = original.headers || {};
+        original.headers.Authorization = `Bearer ${token}`;
+        return apiClient(original);
+      }
+    }
+
     // Only trigger logout for 401s on critical endpoints or if repeated
     // For now, let's just ensure we don't loop.
     // Also, if the error is from a "check" endpoint, maybe don't logout immediately?
@@ -149,6 +221,14 @@ apiClient.interceptors.response.use(
 
 export const api = {
   login: (payload) => apiClient.post(`${API_ROOT}/auth/login`, payload),
+  logout: (refreshToken, accessToken) =>
+    apiClient.post(
+      `${API_ROOT}/auth/logout`,
+      { refresh_token: refreshToken },
+      accessToken
+        ? { headers: { Authorization: `Bearer ${accessToken}` } }
+        : undefined,
+    ),
   getCurrentUser: () => apiClient.get(`${API_ROOT}/users/me`),
   registerUser: (payload) =>
     apiClient.post(`${API_ROOT}/auth/register`, payload),
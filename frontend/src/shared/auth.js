@@ -7,7 +7,12 @@ import React, {
   useState,
 } from "react";
 
-import { api } from "./api";
+import {
+  api,
+  clearAuthTokens,
+  getStoredRefreshToken,
+  storeAuthTokens,
+} from "./api";
 
 const AuthContext = createContext(null);
 
@@ -58,9 +63,7 @@ export const AuthProvider = ({ children }) => {
 
   useEffect(() => {
     const handleUnauthorized = () => {
-      if (typeof window !== "undefined") {
-        window.localStorage.removeItem("authToken");
-      }
+      clearAuthTokens();
       setUser(null);
       setLoading(false);
     };
@@ -74,10 +77,7 @@ export const AuthProvider = ({ children }) => {
   const login = useCallback(
     async ({ email, password }) => {
       const response = await api.login({ email, password });
-      const token = response.data?.access_token;
-      if (token && typeof window !== "undefined") {
-        window.localStorage.setItem("authToken", token);
-      }
+      storeAuthTokens(response.data);
       const userData = response.data?.user;
       if (userData) {
         setUser(userData);
@@ -99,9 +99,9 @@ export const AuthProvider = ({ children }) => {
   );
 
   const logout = useCallback(() => {
-    if (typeof window !== "undefined") {
-      window.localStorage.removeItem("authToken");
-    }
+    // Revoke server-side with the tokens read before they are dropped
+    api.logout(getStoredRefreshToken(), getStoredToken()).catch(() => {});
+    clearAuthTokens();
     setUser(null);
   }, []);
 
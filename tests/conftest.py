@@ -12,6 +12,7 @@ os.environ.setdefault("USE_IN_MEMORY_DB", "true")
 os.environ.setdefault("OPENAI_API_KEY", "test")
 os.environ.setdefault("AUTO_RUN_MIGRATIONS", "false")
 os.environ.setdefault("SEED_ADMIN_ON_STARTUP", "false")
+os.environ.setdefault("SCHEDULER_ENABLED", "false")
 os.environ.setdefault("DATABASE_URL", "sqlite+aiosqlite:///./test.db")
 
 from app.core.config import get_settings  # noqa: E402
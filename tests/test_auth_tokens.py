@@ -0,0 +1,118 @@
+import asyncio
+from datetime import timedelta
+
+from app.core.config import get_settings
+from app.core.principal_cache import principal_cache
+from app.core.token_revocation import TokenRevocationList, revocation_list
+from app.db.instance import session_factory
+from app.db.profiler import profiler
+from app.db.token_revocations import RevocationStore
+from jose import jwt
+
+settings = get_settings()
+
+PM_CREDENTIALS = {"email": "pm@example.com", "password": "PmPass123!"}
+
+
+def _login(client):
+    response = client.post("/api/auth/login", json=PM_CREDENTIALS)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _headers(tokens):
+    return {
+        "Authorization": f"Bearer {tokens['access_token']}",
+        "X-Tenant-Id": settings.DEFAULT_TENANT_ID,
+    }
+
+
+def test_access_token_authorises_from_claims(client, pm_headers):
+    # The fixture just wrote the PM's membership; forget that change so the
+    # fresh token is not treated as issued before it.
+    asyncio.run(revocation_list.clear())
+    tokens = _login(client)
+    assert tokens["refresh_token"]
+    assert tokens["expires_in"] == settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    payload = jwt.decode(
+        tokens["access_token"],
+        settings.AUTH_SECRET,
+        algorithms=[settings.AUTH_ALGORITHM],
+    )
+    assert payload["typ"] == "access"
+    assert settings.DEFAULT_TENANT_ID in payload["tenants"]
+
+    principal_cache.clear()
+    profiler.enabled = True
+    profiler.reset()
+    try:
+        response = client.get("/api/nekretnine/", headers=_headers(tokens))
+        assert response.status_code == 200, response.text
+        collections = {row["collection"] for row in profiler.top(limit=50)}
+    finally:
+        profiler.enabled = settings.QUERY_PROFILER_ENABLED
+        profiler.reset()
+    assert "users" not in collections
+    assert "tenant_memberships" not in collections
+
+
+def test_refresh_rotates_and_detects_reuse(client, pm_headers):
+    tokens = _login(client)
+
+    response = client.post(
+        "/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200, response.text
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    assert client.get("/api/nekretnine/", headers=_headers(rotated)).status_code == 200
+
+    # Replaying the consumed token revokes the whole family.
+    response = client.post(
+        "/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+    response = client.post(
+        "/api/auth/refresh", json={"refresh_token": rotated["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+
+def test_logout_revokes_access_and_refresh_tokens(client, pm_headers):
+    tokens = _login(client)
+    assert client.get("/api/nekretnine/", headers=_headers(tokens)).status_code == 200
+
+    response = client.post(
+        "/api/auth/logout",
+        json={"refresh_token": tokens["refresh_token"]},
+        headers=_headers(tokens),
+    )
+    assert response.status_code == 200
+
+    assert client.get("/api/nekretnine/", headers=_headers(tokens)).status_code == 401
+    response = client.post(
+        "/api/auth/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+
+def test_logout_on_another_worker_revokes_the_token(client, pm_headers):
+    tokens = _login(client)
+    assert client.get("/api/nekretnine/", headers=_headers(tokens)).status_code == 200
+    payload = jwt.decode(
+        tokens["access_token"],
+        settings.AUTH_SECRET,
+        algorithms=[settings.AUTH_ALGORITHM],
+    )
+
+    other_worker = TokenRevocationList(settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+    other_worker.attach(
+        RevocationStore(
+            session_factory, timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+    )
+    asyncio.run(other_worker.revoke(payload["jti"], payload["exp"]))
+    # This worker notices once its cached principal expires
+    principal_cache.clear()
+    assert client.get("/api/nekretnine/", headers=_headers(tokens)).status_code == 401
@@ -0,0 +1,146 @@
+import asyncio
+from datetime import date, timedelta
+
+from app.db.instance import db
+from app.services.contract_status_service import sync_contract_and_unit_statuses
+
+from .factories import create_contract, create_property, create_unit, create_zakupnik
+
+
+def test_expiry_job_expires_contracts_and_releases_units(client, admin_headers):
+    today = date.today()
+    past_start = (today - timedelta(days=400)).isoformat()
+    past_end = (today - timedelta(days=35)).isoformat()
+
+    prop = create_property(client, admin_headers)
+    tenant = create_zakupnik(client, admin_headers)
+    freed = create_unit(client, admin_headers, prop["id"], oznaka="A1")
+    renewed = create_unit(client, admin_headers, prop["id"], oznaka="A2")
+    current = create_unit(client, admin_headers, prop["id"], oznaka="A3")
+    common = {"nekretnina_id": prop["id"], "zakupnik_id": tenant["id"]}
+
+    ended = create_contract(
+        client,
+        admin_headers,
+        interna_oznaka="UG-OLD-1",
+        property_unit_id=freed["id"],
+        datum_pocetka=past_start,
+        datum_zavrsetka=past_end,
+        **common,
+    )
+    create_contract(
+        client,
+        admin_headers,
+        interna_oznaka="UG-OLD-2",
+        property_unit_id=renewed["id"],
+        datum_pocetka=past_start,
+        datum_zavrsetka=past_end,
+        **common,
+    )
+    # The renewal keeps its unit rented after the old contract expires
+    running = create_contract(
+        client,
+        admin_headers,
+        interna_oznaka="UG-NEW-2",
+        property_unit_id=renewed["id"],
+        **common,
+    )
+    create_contract(
+        client,
+        admin_headers,
+        interna_oznaka="UG-NEW-3",
+        property_unit_id=current["id"],
+        **common,
+    )
+
+    summary = asyncio.run(sync_contract_and_unit_statuses())
+    assert summary["istekli_ugovori"] == 2
+    assert summary["oslobodene_jedinice"] == 1
+    assert summary["trajanje_ms"] >= 0
+
+    response = client.get(f"/api/ugovori/{ended['id']}", headers=admin_headers)
+    assert response.json()["status"] == "istekao"
+    response = client.get(f"/api/ugovori/{running['id']}", headers=admin_headers)
+    assert response.json()["status"] == "aktivno"
+
+    async def unit_statuses():
+        return {
+            unit["id"]: (await db.property_units.find_one({"id": unit["id"]}))["status"]
+            for unit in (freed, renewed, current)
+        }
+
+    assert asyncio.run(unit_statuses()) == {
+        freed["id"]: "dostupno",
+        renewed["id"]: "iznajmljeno",
+        current["id"]: "iznajmljeno",
+    }
+
+    # Nothing left to do on a second run
+    summary = asyncio.run(sync_contract_and_unit_statuses())
+    assert (summary["istekli_ugovori"], summary["oslobodene_jedinice"]) == (0, 0)
+
+
+def test_orphaned_unit_repair_dry_run_and_apply(client, admin_headers, pm_headers):
+    prop = create_property(client, admin_headers)
+    tenant = create_zakupnik(client, admin_headers)
+    orphan = create_unit(
+        client, admin_headers, prop["id"], oznaka="B1", status="iznajmljeno"
+    )
+    leased = create_unit(client, admin_headers, prop["id"], oznaka="B2")
+    expiring = create_unit(client, admin_headers, prop["id"], oznaka="B3")
+    common = {"nekretnina_id": prop["id"], "zakupnik_id": tenant["id"]}
+    create_contract(
+        client,
+        admin_headers,
+        interna_oznaka="UG-B2",
+        property_unit_id=leased["id"],
+        **common,
+    )
+    create_contract(
+        client,
+        admin_headers,
+        interna_oznaka="UG-B3",
+        property_unit_id=expiring["id"],
+        **common,
+    )
+    # A terminated contract does not count as a lease
+    response = client.post(
+        "/api/ugovori",
+        json={
+            "interna_oznaka": "UG-B1-OLD",
+            "datum_pocetka": "2020-01-01",
+            "datum_zavrsetka": "2020-12-31",
+            "trajanje_mjeseci": 12,
+            "status": "raskinuto",
+            "property_unit_id": orphan["id"],
+            **common,
+        },
+        headers=admin_headers,
+    )
+    assert response.status_code == 201, response.text
+    # A contract about to expire still keeps its unit rented
+    asyncio.run(
+        db.ugovori.update_one(
+            {"property_unit_id": expiring["id"]}, {"$set": {"status": "na_isteku"}}
+        )
+    )
+
+    response = client.post("/api/debug/orphaned-units", headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "dry_run": True,
+        "jedinice": [orphan["id"]],
+        "popravljeno": 0,
+    }
+    unit = asyncio.run(db.property_units.find_one({"id": orphan["id"]}))
+    assert unit["status"] == "iznajmljeno"
+
+    response = client.post(
+        "/api/debug/orphaned-units?dry_run=false", headers=admin_headers
+    )
+    assert response.json()["popravljeno"] == 1
+    unit = asyncio.run(db.property_units.find_one({"id": orphan["id"]}))
+    assert unit["status"] == "dostupno"
+
+    response = client.post("/api/debug/orphaned-units", headers=pm_headers)
+    assert response.status_code == 403
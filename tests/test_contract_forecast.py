@@ -0,0 +1,119 @@
+import asyncio
+import calendar
+from datetime import date
+
+from app.core.config import get_settings
+from app.db.document_store import MariaDBDatabase
+from app.db.instance import session_factory
+
+from .factories import create_contract, create_property, create_unit, create_zakupnik
+
+settings = get_settings()
+
+
+def _month_end(offset):
+    today = date.today()
+    year, month = divmod(today.month - 1 + offset, 12)
+    year += today.year
+    return date(year, month + 1, calendar.monthrange(year, month + 1)[1])
+
+
+def test_contract_forecast(client, admin_headers):
+    prop = create_property(client, admin_headers)
+    tenant = create_zakupnik(client, admin_headers)
+    unit = create_unit(client, admin_headers, prop["id"])
+    first_day = date.today().replace(day=1).isoformat()
+    common = {"nekretnina_id": prop["id"], "zakupnik_id": tenant["id"]}
+    create_contract(
+        client,
+        admin_headers,
+        property_unit_id=unit["id"],
+        interna_oznaka="UG-KRATKI",
+        datum_pocetka=first_day,
+        datum_zavrsetka=_month_end(2).isoformat(),
+        trajanje_mjeseci=3,
+        osnovna_zakupnina=1000,
+        cam_troskovi=100,
+        opcija_produljenja=True,
+        **common,
+    )
+    create_contract(
+        client,
+        admin_headers,
+        interna_oznaka="UG-DUGI",
+        datum_pocetka=first_day,
+        datum_zavrsetka=_month_end(23).isoformat(),
+        trajanje_mjeseci=24,
+        osnovna_zakupnina=500,
+        cam_troskovi=0,
+        indeksacija=True,
+        **common,
+    )
+
+    response = client.get("/api/ugovori/forecast", headers=admin_headers)
+    assert response.status_code == 200, response.text
+    forecast = response.json()
+    assert len(forecast["mjeseci"]) == 12
+    assert forecast["ukupno"]["zakupnina"][:4] == [1500, 1500, 1500, 500]
+    assert forecast["ukupno"]["cam"][:4] == [100, 100, 100, 0]
+    assert forecast["istek_ugovora"][2]["broj_ugovora"] == 1
+    assert forecast["istek_ugovora"][2]["s_opcijom_produljenja"] == 1
+    assert forecast["po_nekretnini"][0]["id"] == prop["id"]
+    assert {row["id"] for row in forecast["po_jedinici"]} == {unit["id"], None}
+
+    renewed = client.get(
+        "/api/ugovori/forecast",
+        params={"produljenja": "true"},
+        headers=admin_headers,
+    ).json()
+    assert renewed["ukupno"]["zakupnina"][3:7] == [1500, 1500, 1500, 500]
+    assert renewed["ukupno"]["iz_produljenja"][3] == 1000
+
+    indexed = client.get(
+        "/api/ugovori/forecast",
+        params={"mjeseci": 24, "stopa_indeksacije": 10},
+        headers=admin_headers,
+    ).json()
+    assert indexed["ukupno"]["zakupnina"][11:13] == [500, 550]
+
+    # Cached until the tenant's contracts change
+    create_contract(client, admin_headers, osnovna_zakupnina=200, **common)
+    response = client.get("/api/ugovori/forecast", headers=admin_headers)
+    assert response.json()["ukupno"]["zakupnina"][0] == 1700
+
+    response = client.get(
+        "/api/ugovori/forecast", params={"mjeseci": 61}, headers=admin_headers
+    )
+    assert response.status_code == 422
+
+
+def test_forecast_sees_contracts_written_by_other_workers(client, admin_headers):
+    first_day = date.today().replace(day=1).isoformat()
+    response = client.get("/api/ugovori/forecast", headers=admin_headers)
+    assert response.json()["ukupno"]["zakupnina"][0] == 0
+    etag = response.headers["ETag"]
+
+    # A store without listeners stands in for another worker's process
+    other_worker = MariaDBDatabase(session_factory)
+    try:
+        asyncio.run(
+            other_worker.ugovori.insert_one(
+                {
+                    "id": "other-worker",
+                    "tenant_id": settings.DEFAULT_TENANT_ID,
+                    "status": "aktivno",
+                    "datum_pocetka": first_day,
+                    "datum_zavrsetka": _month_end(11).isoformat(),
+                    "osnovna_zakupnina": 800,
+                }
+            )
+        )
+        response = client.get(
+            "/api/ugovori/forecast",
+            headers={**admin_headers, "If-None-Match": etag},
+        )
+        assert response.status_code == 200
+        assert response.json()["ukupno"]["zakupnina"][0] == 800
+    finally:
+        # Remove it the same way, leaving this worker's counters untouched
+        asyncio.run(other_worker.ugovori.delete_one({"id": "other-worker"}))
@@ -0,0 +1,142 @@
+import asyncio
+from datetime import date, timedelta
+
+from app.db.instance import db
+from app.services import contract_import_service
+
+from .factories import create_contract, create_property, create_unit, create_zakupnik
+
+
+def _upload(client, headers, text, **params):
+    return client.post(
+        "/api/ugovori/import",
+        params=params,
+        files={"file": ("ugovori.csv", text.encode("utf-8"), "text/csv")},
+        headers=headers,
+    )
+
+
+def test_import_contracts_from_csv(client, admin_headers):
+    prop = create_property(client, admin_headers, naziv="Šestinski Dvor")
+    tenant = create_zakupnik(client, admin_headers, oib="11111111111")
+    first = create_unit(client, admin_headers, prop["id"], oznaka="P1")
+    second = create_unit(client, admin_headers, prop["id"], oznaka="P2")
+    taken = create_unit(client, admin_headers, prop["id"], oznaka="P3")
+    today = date.today()
+    start, end = today.isoformat(), (today + timedelta(days=365)).isoformat()
+    create_contract(
+        client,
+        admin_headers,
+        nekretnina_id=prop["id"],
+        zakupnik_id=tenant["id"],
+        property_unit_id=taken["id"],
+        interna_oznaka="UG-POSTOJECI",
+    )
+
+    header = (
+        "interna_oznaka;nekretnina;zakupnik;jedinica;datum_pocetka;"
+        "datum_zavrsetka;trajanje_mjeseci;zakupnina_po_m2"
+    )
+    rows = [
+        f"UG-1;sestinski dvor;11111111111;P1;{start};{end};12;10,5",
+        f"UG-2;Šestinski Dvor;Tenant d.o.o.;{second['id']};{start};{end};12;",
+        # Overlaps UG-1 from the same file
+        f"UG-3;Šestinski Dvor;11111111111;P1;{start};{end};12;",
+        # Overlaps a stored contract
+        f"UG-4;Šestinski Dvor;11111111111;P3;{start};{end};12;",
+        f"UG-5;Nepoznata zgrada;11111111111;P2;{start};{end};12;",
+        f"UG-6;Šestinski Dvor;11111111111;P2;{start};{end};nije_broj;",
+    ]
+    text = "\n".join([header, *rows]) + "\n"
+
+    preview = _upload(client, admin_headers, text, dry_run="true")
+    assert preview.status_code == 200, preview.text
+    assert preview.json()["uvezeno"] == 2
+    assert asyncio.run(db.ugovori.count_documents({})) == 1
+
+    response = _upload(client, admin_headers, text)
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert report["ukupno_redaka"] == 6
+    assert report["uvezeno"] == 2
+    assert [error["redak"] for error in report["greske"]] == [4, 5, 6, 7]
+    assert "UG-POSTOJECI" in report["greske"][1]["greske"][0]
+    assert "Nekretnina" in report["greske"][2]["greske"][0]
+    assert report["greske"][3]["greske"][0].startswith("trajanje_mjeseci")
+
+    imported = {
+        contract["interna_oznaka"]: contract
+        for contract in asyncio.run(
+            db.ugovori.find({"id": {"$in": report["ugovori"]}}).to_list(None)
+        )
+    }
+    assert imported["UG-1"]["property_unit_id"] == first["id"]
+    assert imported["UG-1"]["osnovna_zakupnina"] == 10.5 * 120.0
+    assert imported["UG-2"]["zakupnik_id"] == tenant["id"]
+    for unit in (first, second):
+        stored = asyncio.run(db.property_units.find_one({"id": unit["id"]}))
+        assert stored["status"] == "iznajmljeno"
+
+
+def test_import_rejects_unsupported_files(client, admin_headers):
+    response = client.post(
+        "/api/ugovori/import",
+        files={"file": ("ugovori.pdf", b"%PDF", "application/pdf")},
+        headers=admin_headers,
+    )
+    assert response.status_code == 400
+
+
+def test_import_windows_1250_csv(client, admin_headers):
+    prop = create_property(client, admin_headers, naziv="Žitnjak Čazma")
+    tenant = create_zakupnik(client, admin_headers, oib="22222222222")
+    text = (
+        "interna_oznaka;nekretnina;zakupnik;datum_pocetka;datum_zavrsetka;"
+        "trajanje_mjeseci\n"
+        "UG-ŠĐ;Žitnjak Čazma;22222222222;2025-01-01;2025-12-31;12\n"
+    )
+    response = client.post(
+        "/api/ugovori/import",
+        files={"file": ("ugovori.csv", text.encode("cp1250"), "text/csv")},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["uvezeno"] == 1
+    stored = asyncio.run(db.ugovori.find_one({"interna_oznaka": "UG-ŠĐ"}))
+    assert stored["nekretnina_id"] == prop["id"]
+    assert stored["zakupnik_id"] == tenant["id"]
+
+
+def test_failed_batch_does_not_block_later_rows(client, admin_headers, monkeypatch):
+    prop = create_property(client, admin_headers)
+    tenant = create_zakupnik(client, admin_headers, oib="33333333333")
+    unit = create_unit(client, admin_headers, prop["id"], oznaka="P1")
+    publish = contract_import_service.publish_contract_change
+    calls = []
+
+    async def fail_first(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("veza prekinuta")
+        await publish(*args, **kwargs)
+
+    monkeypatch.setattr(contract_import_service, "BATCH_SIZE", 1)
+    monkeypatch.setattr(contract_import_service, "publish_contract_change", fail_first)
+    rows = [
+        f"{label};{prop['id']};{tenant['id']};{unit['id']};2025-01-01;2025-12-31;12"
+        for label in ("UG-1", "UG-2")
+    ]
+    text = "\n".join(
+        [
+            "interna_oznaka;nekretnina;zakupnik;jedinica;datum_pocetka;"
+            "datum_zavrsetka;trajanje_mjeseci",
+            *rows,
+        ]
+    )
+    report = _upload(client, admin_headers, text).json()
+    assert [error["redak"] for error in report["greske"]] == [2]
+    assert report["uvezeno"] == 1
+    stored = asyncio.run(
+        db.ugovori.find({"property_unit_id": unit["id"]}).to_list(None)
+    )
+    assert [contract["interna_oznaka"] for contract in stored] == ["UG-2"]
@@ -0,0 +1,176 @@
+import asyncio
+
+from app.core.config import get_settings
+from app.db.document_store import MariaDBDatabase
+from app.db.instance import db, session_factory, store
+
+from .factories import create_contract, create_property, create_unit, create_zakupnik
+
+settings = get_settings()
+
+
+def test_overlap_check_and_portfolio_overlap_report(client, admin_headers):
+    prop = create_property(client, admin_headers)
+    unit = create_unit(client, admin_headers, prop["id"])
+    tenant = create_zakupnik(client, admin_headers)
+    common = {
+        "nekretnina_id": prop["id"],
+        "zakupnik_id": tenant["id"],
+        "property_unit_id": unit["id"],
+    }
+
+    first = create_contract(
+        client,
+        admin_headers,
+        interna_oznaka="UG-1",
+        datum_pocetka="2030-01-01",
+        datum_zavrsetka="2030-06-30",
+        **common,
+    )
+    # Adjacent period on the same unit is fine
+    create_contract(
+        client,
+        admin_headers,
+        interna_oznaka="UG-2",
+        datum_pocetka="2030-07-01",
+        datum_zavrsetka="2030-12-31",
+        **common,
+    )
+
+    response = client.post(
+        "/api/ugovori",
+        json={
+            "interna_oznaka": "UG-3",
+            "datum_pocetka": "2030-05-01",
+            "datum_zavrsetka": "2030-06-15",
+            "trajanje_mjeseci": 2,
+            **common,
+        },
+        headers=admin_headers,
+    )
+    assert response.status_code == 400
+    assert "UG-1" in response.json()["detail"]
+
+    # Moving a contract within its own period does not conflict with itself
+    response = client.put(
+        f"/api/ugovori/{first['id']}",
+        json={"datum_pocetka": "2030-02-01"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+
+    # Data written around the API check still shows up in the report
+    asyncio.run(
+        db.ugovori.insert_one(
+            {
+                "id": "legacy-overlap",
+                "tenant_id": settings.DEFAULT_TENANT_ID,
+                "interna_oznaka": "UG-LEGACY",
+                "property_unit_id": unit["id"],
+                "status": "aktivno",
+                "datum_pocetka": "2030-06-15",
+                "datum_zavrsetka": "2030-07-15",
+            }
+        )
+    )
+    response = client.get("/api/ugovori/overlaps", headers=admin_headers)
+    assert response.status_code == 200, response.text
+    report = response.json()
+    assert [
+        (row["od"], row["do"], [c["interna_oznaka"] for c in row["ugovori"]])
+        for row in report
+    ] == [
+        ("2030-06-15", "2030-06-30", ["UG-1", "UG-LEGACY"]),
+        ("2030-07-01", "2030-07-15", ["UG-LEGACY", "UG-2"]),
+    ]
+    assert all(row["property_unit_id"] == unit["id"] for row in report)
+
+
+def test_overlap_check_sees_contracts_written_by_other_workers(client, admin_headers):
+    prop = create_property(client, admin_headers)
+    unit = create_unit(client, admin_headers, prop["id"])
+    tenant = create_zakupnik(client, admin_headers)
+    common = {
+        "nekretnina_id": prop["id"],
+        "zakupnik_id": tenant["id"],
+        "property_unit_id": unit["id"],
+    }
+    # Build this worker's index before the other worker writes
+    assert client.get("/api/ugovori/overlaps", headers=admin_headers).json() == []
+
+    # A store without listeners stands in for another worker's process
+    other_worker = MariaDBDatabase(session_factory)
+    try:
+        asyncio.run(
+            other_worker.ugovori.insert_one(
+                {
+                    "id": "other-worker",
+                    "tenant_id": settings.DEFAULT_TENANT_ID,
+                    "interna_oznaka": "UG-DRUGI",
+                    "property_unit_id": unit["id"],
+                    "status": "aktivno",
+                    "datum_pocetka": "2031-01-01",
+                    "datum_zavrsetka": "2031-12-31",
+                }
+            )
+        )
+
+        response = client.post(
+            "/api/ugovori",
+            json={
+                "interna_oznaka": "UG-NOVI",
+                "datum_pocetka": "2031-06-01",
+                "datum_zavrsetka": "2032-05-31",
+                "trajanje_mjeseci": 12,
+                **common,
+            },
+            headers=admin_headers,
+        )
+        assert response.status_code == 400
+        assert "UG-DRUGI" in response.json()["detail"]
+
+        asyncio.run(
+            other_worker.ugovori.insert_one(
+                {
+                    "id": "other-worker-2",
+                    "tenant_id": settings.DEFAULT_TENANT_ID,
+                    "interna_oznaka": "UG-TRECI",
+                    "property_unit_id": unit["id"],
+                    "status": "aktivno",
+                    "datum_pocetka": "2031-12-01",
+                    "datum_zavrsetka": "2032-01-31",
+                }
+            )
+        )
+        report = client.get("/api/ugovori/overlaps", headers=admin_headers).json()
+        assert [[c["interna_oznaka"] for c in row["ugovori"]] for row in report] == [
+            ["UG-DRUGI", "UG-TRECI"]
+        ]
+    finally:
+        # Remove them the same way, leaving this worker's counters untouched
+        asyncio.run(
+            other_worker.ugovori.delete_many(
+                {"id": {"$in": ["other-worker", "other-worker-2"]}}
+            )
+        )
+
+
+def test_stored_version_changes_on_every_update(client, admin_headers):
+    prop = create_property(client, admin_headers)
+    tenant = create_zakupnik(client, admin_headers)
+    contract = create_contract(
+        client, admin_headers, nekretnina_id=prop["id"], zakupnik_id=tenant["id"]
+    )
+
+    async def versions_around_updates():
+        versions = [await store.collection_version("ugovori")]
+        for note in ("prva", "druga", "treca"):
+            await db.ugovori.update_one(
+                {"id": contract["id"]}, {"$set": {"napomena": note}}
+            )
+            versions.append(await store.collection_version("ugovori"))
+        return versions
+
+    # Back-to-back updates land within the same second
+    versions = asyncio.run(versions_around_updates())
+    assert len(set(versions)) == len(versions)
@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+from app.db.document_store import MariaDBDatabase
+from app.db.instance import db, session_factory
+
+from .factories import create_contract, create_property, create_unit, create_zakupnik
+
+
+def _unit_status(unit_id):
+    return asyncio.run(db.property_units.find_one({"id": unit_id}))["status"]
+
+
+def test_contract_events_keep_unit_status_in_sync(client, admin_headers):
+    prop = create_property(client, admin_headers)
+    tenant = create_zakupnik(client, admin_headers)
+    first = create_unit(client, admin_headers, prop["id"], oznaka="C1")
+    second = create_unit(client, admin_headers, prop["id"], oznaka="C2")
+    common = {"nekretnina_id": prop["id"], "zakupnik_id": tenant["id"]}
+
+    contract = create_contract(
+        client, admin_headers, property_unit_id=first["id"], **common
+    )
+    assert _unit_status(first["id"]) == "iznajmljeno"
+
+    # Moving the contract releases the old unit and rents the new one
+    response = client.put(
+        f"/api/ugovori/{contract['id']}",
+        json={"property_unit_id": second["id"]},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert (_unit_status(first["id"]), _unit_status(second["id"])) == (
+        "dostupno",
+        "iznajmljeno",
+    )
+
+    response = client.put(
+        f"/api/ugovori/{contract['id']}/status",
+        json={"novi_status": "raskinuto"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert _unit_status(second["id"]) == "dostupno"
+
+    response = client.put(
+        f"/api/ugovori/{contract['id']}",
+        json={"status": "aktivno"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert _unit_status(second["id"]) == "iznajmljeno"
+
+    response = client.delete(f"/api/ugovori/{contract['id']}", headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert _unit_status(second["id"]) == "dostupno"
+
+    # Nothing is left for the orphan repair
+    response = client.post("/api/debug/orphaned-units", headers=admin_headers)
+    assert response.json()["jedinice"] == []
+
+
+def test_ending_one_of_two_contracts_keeps_the_unit_rented(client, admin_headers):
+    prop = create_property(client, admin_headers)
+    tenant = create_zakupnik(client, admin_headers)
+    unit = create_unit(client, admin_headers, prop["id"])
+    common = {
+        "nekretnina_id": prop["id"],
+        "zakupnik_id": tenant["id"],
+        "property_unit_id": unit["id"],
+    }
+    current = create_contract(
+        client,
+        admin_headers,
+        interna_oznaka="UG-A",
+        datum_pocetka="2030-01-01",
+        datum_zavrsetka="2030-06-30",
+        **common,
+    )
+    create_contract(
+        client,
+        admin_headers,
+        interna_oznaka="UG-B",
+        datum_pocetka="2030-07-01",
+        datum_zavrsetka="2030-12-31",
+        **common,
+    )
+
+    response = client.put(
+        f"/api/ugovori/{current['id']}/status",
+        json={"novi_status": "arhivirano"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert _unit_status(unit["id"]) == "iznajmljeno"
+
+
+def test_unit_stays_rented_for_a_contract_written_by_another_worker(
+    client, admin_headers
+):
+    prop = create_property(client, admin_headers)
+    tenant = create_zakupnik(client, admin_headers)
+    unit = create_unit(client, admin_headers, prop["id"])
+    contract = create_contract(
+        client,
+        admin_headers,
+        nekretnina_id=prop["id"],
+        zakupnik_id=tenant["id"],
+        property_unit_id=unit["id"],
+        datum_pocetka="2030-01-01",
+        datum_zavrsetka="2030-06-30",
+    )
+
+    # A store without listeners stands in for another worker's process
+    other_worker = MariaDBDatabase(session_factory)
+    try:
+        asyncio.run(
+            other_worker.ugovori.insert_one(
+                {
+                    "id": "other-worker",
+                    "tenant_id": admin_headers["X-Tenant-Id"],
+                    "property_unit_id": unit["id"],
+                    "status": "aktivno",
+                    "datum_pocetka": "2030-07-01",
+                    "datum_zavrsetka": "2030-12-31",
+                }
+            )
+        )
+        response = client.delete(
+            f"/api/ugovori/{contract['id']}", headers=admin_headers
+        )
+        assert response.status_code == 200, response.text
+        assert _unit_status(unit["id"]) == "iznajmljeno"
+    finally:
+        asyncio.run(other_worker.ugovori.delete_one({"id": "other-worker"}))
+
+
+def test_transaction_rolls_back_every_write_on_error():
+    async def failing_write():
+        async with db.transaction():
+            await db.ugovori.insert_one({"id": "tx-contract", "status": "aktivno"})
+            await db.property_units.insert_one({"id": "tx-unit"})
+            assert await db.ugovori.find_one({"id": "tx-contract"}) is not None
+            raise RuntimeError("handler failed")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(failing_write())
+    assert asyncio.run(db.ugovori.find_one({"id": "tx-contract"})) is None
+    assert asyncio.run(db.property_units.find_one({"id": "tx-unit"})) is None
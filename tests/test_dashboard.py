@@ -1,6 +1,8 @@
 import pytest
 from httpx import AsyncClient
 
+from .factories import create_contract, create_property, create_zakupnik
+
 
 @pytest.mark.asyncio(loop_scope="session")
 async def test_dashboard_stats(async_client: AsyncClient, pm_headers: dict):
@@ -11,3 +13,35 @@ async def test_dashboard_stats(async_client: AsyncClient, pm_headers: dict):
     assert "odrzavanje_ceka_dobavljaca" in data
     assert "odrzavanje_u_tijeku" in data
     assert isinstance(data["odrzavanje_novo"], int)
+
+
+def test_dashboard_groups_counts_and_rent(client, admin_headers):
+    prop = create_property(client, admin_headers, trzisna_vrijednost=120000.0)
+    tenant = create_zakupnik(client, admin_headers)
+    create_contract(
+        client,
+        admin_headers,
+        nekretnina_id=prop["id"],
+        zakupnik_id=tenant["id"],
+        interna_oznaka="UG-1",
+        osnovna_zakupnina=500.0,
+    )
+    create_contract(
+        client,
+        admin_headers,
+        nekretnina_id=prop["id"],
+        zakupnik_id=tenant["id"],
+        interna_oznaka="UG-2",
+        osnovna_zakupnina=700.0,
+    )
+
+    response = client.get("/api/dashboard/", headers=admin_headers)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert data["ukupno_nekretnina"] == 1
+    assert data["ukupna_vrijednost_portfelja"] == 120000.0
+    assert data["aktivni_ugovori"] == 2
+    assert data["mjesecni_prihod"] == 1200.0
+    assert data["godisnji_prinos"] == 14400.0
+    assert data["prinos_postotak"] == 12.0
+    assert data["odrzavanje_novo"] == 0
@@ -0,0 +1,126 @@
+import asyncio
+from datetime import date
+
+from app.core.config import get_settings
+from app.db.document_store import MariaDBDatabase
+from app.db.instance import db, session_factory
+
+from .factories import create_contract, create_property, create_unit, create_zakupnik
+
+settings = get_settings()
+
+
+def _month(value: date) -> str:
+    return f"{value.year:04d}-{value.month:02d}"
+
+
+def _timeseries(client, headers):
+    response = client.get("/api/dashboard/timeseries", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_timeseries_rent_roll_occupancy_expiries_and_costs(client, admin_headers):
+    prop = create_property(client, admin_headers)
+    create_unit(client, admin_headers, prop["id"], oznaka="A1", status="iznajmljeno")
+    create_unit(client, admin_headers, prop["id"], oznaka="A2", status="dostupno")
+    tenant = create_zakupnik(client, admin_headers)
+    contract = create_contract(
+        client,
+        admin_headers,
+        nekretnina_id=prop["id"],
+        zakupnik_id=tenant["id"],
+        osnovna_zakupnina=900.0,
+    )
+    asyncio.run(
+        db.maintenance_tasks.insert_one(
+            {
+                "id": "task-1",
+                "tenant_id": settings.DEFAULT_TENANT_ID,
+                "naziv": "Servis klime",
+                "nekretnina_id": prop["id"],
+                "status": "novi",
+                "trosak_materijal": 120.0,
+                "trosak_rad": 80.0,
+            }
+        )
+    )
+
+    data = _timeseries(client, admin_headers)
+
+    this_month = _month(date.today())
+    roll = {row["mjesec"]: row for row in data["mjesecni_prihod"]}
+    assert len(roll) == 25
+    assert roll[this_month]["zakupnina"] == 900.0
+    assert roll[this_month]["aktivni_ugovori"] == 1
+
+    end_month = contract["datum_zavrsetka"][:7]
+    expiries = {row["mjesec"]: row["broj_ugovora"] for row in data["istek_ugovora"]}
+    assert len(expiries) == 24
+    assert expiries[end_month] == 1
+    assert sum(expiries.values()) == 1
+
+    occupancy = data["popunjenost"]
+    assert occupancy["ukupno_jedinica"] == 2
+    assert occupancy["po_statusu"] == {"dostupno": 1, "iznajmljeno": 1}
+    assert occupancy["popunjenost"] == 50.0
+
+    costs = data["troskovi_odrzavanja"]
+    assert costs == [
+        {
+            "nekretnina_id": prop["id"],
+            "broj_zadataka": 1,
+            "trosak_materijal": 120.0,
+            "trosak_rad": 80.0,
+            "ukupno": 200.0,
+        }
+    ]
+
+
+def _rent_this_month(client, headers):
+    data = _timeseries(client, headers)
+    rows = {row["mjesec"]: row for row in data["mjesecni_prihod"]}
+    return rows[_month(date.today())]["zakupnina"]
+
+
+def test_timeseries_cache_invalidated_by_writes(client, admin_headers):
+    prop = create_property(client, admin_headers)
+    tenant = create_zakupnik(client, admin_headers)
+
+    def rent_this_month():
+        return _rent_this_month(client, admin_headers)
+
+    assert rent_this_month() == 0.0
+    create_contract(
+        client,
+        admin_headers,
+        nekretnina_id=prop["id"],
+        zakupnik_id=tenant["id"],
+        osnovna_zakupnina=300.0,
+    )
+    assert rent_this_month() == 300.0
+
+
+def test_timeseries_cache_sees_writes_of_other_workers(client, admin_headers):
+    assert _rent_this_month(client, admin_headers) == 0.0
+
+    # A store without listeners stands in for another worker's process
+    other_worker = MariaDBDatabase(session_factory)
+    today = date.today()
+    try:
+        asyncio.run(
+            other_worker.ugovori.insert_one(
+                {
+                    "id": "other-worker",
+                    "tenant_id": settings.DEFAULT_TENANT_ID,
+                    "status": "aktivno",
+                    "datum_pocetka": today.replace(day=1).isoformat(),
+                    "datum_zavrsetka": date(today.year + 1, 12, 31).isoformat(),
+                    "osnovna_zakupnina": 800.0,
+                }
+            )
+        )
+        assert _rent_this_month(client, admin_headers) == 800.0
+    finally:
+        # Remove it the same way, leaving this worker's counters untouched
+        asyncio.run(other_worker.ugovori.delete_one({"id": "other-worker"}))
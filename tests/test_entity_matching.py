@@ -0,0 +1,68 @@
+import asyncio
+
+from app.core.config import get_settings
+from app.db.document_store import MariaDBDatabase
+from app.db.instance import session_factory
+from app.services.entity_matching_service import (
+    confident_match,
+    match_nekretnina,
+    match_zakupnik,
+)
+
+from .factories import create_property, create_zakupnik
+
+settings = get_settings()
+
+
+def test_matching_service_finds_legal_form_and_typo_variants(client, admin_headers):
+    tenant = create_zakupnik(
+        client, admin_headers, naziv_firme="Građevinar d.o.o.", oib="44455566677"
+    )
+    prop = create_property(
+        client,
+        admin_headers,
+        naziv="Tržni centar",
+        adresa="Ul. Ivana Gundulića 5, Split",
+    )
+
+    candidates = asyncio.run(match_zakupnik(naziv="GRADEVINAR DOO"))
+    assert confident_match(candidates) == tenant["id"]
+    assert candidates[0]["razlog"] == "naziv"
+
+    candidates = asyncio.run(match_zakupnik(naziv="Nepoznat", oib="44455566677"))
+    assert candidates[0] == {
+        "id": tenant["id"],
+        "score": 1.0,
+        "razlog": "oib",
+        "naziv": "Građevinar d.o.o.",
+    }
+
+    candidates = asyncio.run(match_nekretnina(adresa="Ivana Gundulica 5"))
+    assert confident_match(candidates) == prop["id"]
+
+    # Unrelated names are not linked
+    assert confident_match(asyncio.run(match_zakupnik(naziv="Ribarnica"))) is None
+
+
+def test_matching_sees_tenants_created_by_other_workers(client, admin_headers):
+    assert asyncio.run(match_zakupnik(oib="99988877766")) == []
+
+    # A store without listeners stands in for another worker's process
+    other_worker = MariaDBDatabase(session_factory)
+    try:
+        asyncio.run(
+            other_worker.zakupnici.insert_one(
+                {
+                    "id": "other-worker",
+                    "tenant_id": settings.DEFAULT_TENANT_ID,
+                    "naziv_firme": "Udaljena firma d.o.o.",
+                    "oib": "99988877766",
+                }
+            )
+        )
+        candidates = asyncio.run(match_zakupnik(oib="99988877766"))
+        assert confident_match(candidates) == "other-worker"
+    finally:
+        # Remove it the same way, leaving this worker's counters untouched
+        asyncio.run(other_worker.zakupnici.delete_one({"id": "other-worker"}))
+    assert asyncio.run(match_zakupnik(oib="99988877766")) == []
@@ -0,0 +1,101 @@
+import asyncio
+
+from app.core.config import get_settings
+from app.db.document_store import MariaDBDatabase
+from app.db.instance import session_factory
+from app.db.profiler import profiler
+
+from .factories import DEFAULT_PROPERTY_PAYLOAD, create_property
+
+settings = get_settings()
+
+
+def test_list_endpoint_returns_304_until_collection_changes(client, admin_headers):
+    create_property(client, admin_headers)
+
+    first = client.get("/api/nekretnine/", headers=admin_headers)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    conditional = {**admin_headers, "If-None-Match": etag}
+
+    profiler.enabled = True
+    profiler.reset()
+    try:
+        cached = client.get("/api/nekretnine/", headers=conditional)
+        queried = {row["collection"] for row in profiler.top(limit=50)}
+    finally:
+        profiler.enabled = settings.QUERY_PROFILER_ENABLED
+        profiler.reset()
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+    assert "nekretnine" not in queried
+
+    create_property(client, admin_headers, naziv="Druga zgrada")
+    refreshed = client.get("/api/nekretnine/", headers=conditional)
+    assert refreshed.status_code == 200
+    assert len(refreshed.json()) == 2
+    assert refreshed.headers["ETag"] != etag
+
+
+def test_etag_varies_by_query_and_user(client, admin_headers, pm_headers):
+    admin = client.get("/api/dashboard/", headers=admin_headers)
+    pm = client.get("/api/dashboard/", headers=pm_headers)
+    assert admin.status_code == pm.status_code == 200
+    assert admin.headers["ETag"] != pm.headers["ETag"]
+
+    limited = client.get("/api/nekretnine/?limit=1", headers=admin_headers)
+    unlimited = client.get("/api/nekretnine/", headers=admin_headers)
+    assert limited.headers["ETag"] != unlimited.headers["ETag"]
+
+    response = client.get(
+        "/api/dashboard/",
+        headers={**admin_headers, "If-None-Match": f'W/{admin.headers["ETag"]}'},
+    )
+    assert response.status_code == 304
+
+
+def test_etag_differs_between_tenants(client, admin_headers):
+    response = client.post(
+        "/api/tenants", json={"naziv": "Drugi profil"}, headers=admin_headers
+    )
+    assert response.status_code == 201, response.text
+    other_headers = {**admin_headers, "X-Tenant-Id": response.json()["id"]}
+
+    first = client.get("/api/nekretnine/", headers=admin_headers)
+    other = client.get("/api/nekretnine/", headers=other_headers)
+    assert first.status_code == other.status_code == 200
+    assert first.headers["ETag"] != other.headers["ETag"]
+    assert "X-Tenant-Id" in first.headers["Vary"]
+
+    # The first tenant's tag never revalidates the other tenant's list
+    response = client.get(
+        "/api/nekretnine/",
+        headers={**other_headers, "If-None-Match": first.headers["ETag"]},
+    )
+    assert response.status_code == 200
+
+
+def test_etag_changes_with_writes_of_other_workers(client, admin_headers):
+    first = client.get("/api/nekretnine/", headers=admin_headers)
+    conditional = {**admin_headers, "If-None-Match": first.headers["ETag"]}
+
+    # A store without listeners stands in for another worker's process
+    other_worker = MariaDBDatabase(session_factory)
+    try:
+        asyncio.run(
+            other_worker.nekretnine.insert_one(
+                {
+                    **DEFAULT_PROPERTY_PAYLOAD,
+                    "id": "other-worker",
+                    "tenant_id": settings.DEFAULT_TENANT_ID,
+                    "naziv": "Zgrada drugog procesa",
+                }
+            )
+        )
+        response = client.get("/api/nekretnine/", headers=conditional)
+        assert response.status_code == 200
+        assert [prop["naziv"] for prop in response.json()] == ["Zgrada drugog procesa"]
+    finally:
+        # Remove it the same way, leaving this worker's counters untouched
+        asyncio.run(other_worker.nekretnine.delete_one({"id": "other-worker"}))
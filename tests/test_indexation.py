@@ -0,0 +1,116 @@
+import asyncio
+import time
+
+from app.db.instance import db
+from app.services.indexation_service import IndexSeries, compute_indexation
+
+from .factories import create_contract, create_property, create_zakupnik
+
+CPI = [
+    {"razdoblje": "2024-01", "vrijednost": 100},
+    {"razdoblje": "2024-03", "vrijednost": 102},
+    {"razdoblje": "2025-03", "vrijednost": 105.06},
+    {"razdoblje": "2025-06", "vrijednost": 106},
+]
+
+
+def test_index_contract_rents(client, admin_headers):
+    prop = create_property(client, admin_headers)
+    tenant = create_zakupnik(client, admin_headers)
+
+    def contract(label, **overrides):
+        payload = {
+            "interna_oznaka": label,
+            "datum_pocetka": "2024-03-15",
+            "datum_zavrsetka": "2030-03-14",
+            "trajanje_mjeseci": 72,
+            "indeksacija": True,
+            "indeks": "CPI",
+            **overrides,
+        }
+        return create_contract(
+            client,
+            admin_headers,
+            nekretnina_id=prop["id"],
+            zakupnik_id=tenant["id"],
+            **payload,
+        )
+
+    plain = contract("UG-CPI", osnovna_zakupnina=1000)
+    half = contract(
+        "UG-POLA",
+        osnovna_zakupnina=2000,
+        formula_indeksacije="max(zakupnina, zakupnina * (1 + promjena * 0.5))",
+    )
+    contract("UG-HICP", indeks="HICP")
+    contract("UG-LOSA", formula_indeksacije="zakupnina * nepoznato")
+    contract("UG-NOVI", datum_pocetka="2025-01-10")
+    contract("UG-BEZ", indeksacija=False)
+
+    response = client.put(
+        "/api/indeksacija/indeksi/CPI", json={"vrijednosti": CPI}, headers=admin_headers
+    )
+    assert response.status_code == 200, response.text
+    series = client.get("/api/indeksacija/indeksi", headers=admin_headers).json()
+    assert series == [
+        {"naziv": "CPI", "broj_vrijednosti": 4, "od": "2024-01", "do": "2025-06"}
+    ]
+
+    response = client.post(
+        "/api/indeksacija/preview", json={"razdoblje": "2025-03"}, headers=admin_headers
+    )
+    assert response.status_code == 200, response.text
+    preview = response.json()
+    assert preview["ukupno_ugovora"] == 5
+    assert {c["interna_oznaka"]: c["nova_zakupnina"] for c in preview["promjene"]} == {
+        "UG-CPI": 1030.0,
+        "UG-POLA": 2030.0,
+    }
+    reasons = {s["interna_oznaka"]: s["razlog"] for s in preview["preskoceni"]}
+    assert reasons["UG-HICP"] == "Nepoznat indeks HICP"
+    assert "UG-LOSA" in reasons
+    assert reasons["UG-NOVI"] == "Indeksacija još nije dospjela"
+    stored = asyncio.run(db.ugovori.find_one({"id": plain["id"]}))
+    assert stored["osnovna_zakupnina"] == 1000
+
+    response = client.post(
+        "/api/indeksacija/apply", json={"razdoblje": "2025-03"}, headers=admin_headers
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["azurirano"] == 2
+    for contract_id, rent in ((plain["id"], 1030.0), (half["id"], 2030.0)):
+        stored = asyncio.run(db.ugovori.find_one({"id": contract_id}))
+        assert stored["osnovna_zakupnina"] == rent
+        assert stored["datum_zadnje_indeksacije"] == "2025-03-01"
+
+    # Indexed contracts are not due again until a year has passed
+    response = client.post(
+        "/api/indeksacija/preview", json={"razdoblje": "2025-06"}, headers=admin_headers
+    )
+    assert response.json()["promjene"] == []
+
+
+def test_put_index_series_requires_admin(client, pm_headers):
+    response = client.put(
+        "/api/indeksacija/indeksi/CPI", json={"vrijednosti": CPI}, headers=pm_headers
+    )
+    assert response.status_code == 403
+
+
+def test_compute_indexation_is_vectorised():
+    series = {"CPI": IndexSeries("CPI", CPI)}
+    contracts = [
+        {
+            "id": str(number),
+            "osnovna_zakupnina": 1000 + number,
+            "datum_pocetka": "2024-03-01",
+            "indeks": "CPI",
+            "formula_indeksacije": "zakupnina * indeks" if number % 2 else None,
+        }
+        for number in range(5000)
+    ]
+    started = time.perf_counter()
+    changes, skipped = compute_indexation(contracts, series)
+    assert time.perf_counter() - started < 1
+    assert len(changes) == 5000 and skipped == []
+    assert changes[0]["nova_zakupnina"] == round(1000 * 106 / 102, 2)
@@ -0,0 +1,68 @@
+import time
+from datetime import date, timedelta
+
+from app.main import app
+from fastapi.testclient import TestClient
+
+from .factories import create_contract, create_property, create_unit, create_zakupnik
+
+
+def _wait_for_run(client, headers, run_id):
+    for _ in range(100):
+        run = client.get(f"/api/jobs/runs/{run_id}", headers=headers).json()
+        if run["status"] != "running":
+            return run
+        time.sleep(0.05)
+    raise AssertionError("job run did not finish")
+
+
+def test_trigger_job_and_inspect_runs(client, admin_headers, pm_headers):
+    prop = create_property(client, admin_headers)
+    unit = create_unit(client, admin_headers, prop["id"])
+    tenant = create_zakupnik(client, admin_headers)
+    create_contract(
+        client,
+        admin_headers,
+        nekretnina_id=prop["id"],
+        zakupnik_id=tenant["id"],
+        property_unit_id=unit["id"],
+        datum_pocetka=(date.today() - timedelta(days=90)).isoformat(),
+        datum_zavrsetka=(date.today() - timedelta(days=1)).isoformat(),
+    )
+
+    response = client.get("/api/jobs", headers=admin_headers)
+    assert response.status_code == 200, response.text
+    assert {job["name"] for job in response.json()} == {
+        "contract_expiration_reminders",
+        "contract_status_sync",
+        "tenant_kpis_rebuild",
+    }
+
+    # The run outlives the request, so keep one event loop for the whole exchange
+    with TestClient(app) as live:
+        response = live.post(
+            "/api/jobs/contract_status_sync/run", headers=admin_headers
+        )
+        assert response.status_code == 202, response.text
+        run = _wait_for_run(live, admin_headers, response.json()["run_id"])
+    assert run["status"] == "ok", run
+    assert run["trigger"] == "manual"
+    assert run["rows_processed"] == 2
+    assert run["result"]["istekli_ugovori"] == 1
+    assert run["duration_ms"] is not None
+
+    response = client.get(
+        "/api/jobs/runs?job=contract_status_sync", headers=admin_headers
+    )
+    assert [r["id"] for r in response.json()][0] == run["id"]
+    jobs = {
+        job["name"]: job
+        for job in client.get("/api/jobs", headers=admin_headers).json()
+    }
+    assert jobs["contract_status_sync"]["last_status"] == "ok"
+    assert not jobs["contract_status_sync"]["running"]
+
+    response = client.post("/api/jobs/nepostojeci/run", headers=admin_headers)
+    assert response.status_code == 404
+    response = client.post("/api/jobs/contract_status_sync/run", headers=pm_headers)
+    assert response.status_code == 403
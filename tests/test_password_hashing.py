@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+from app.core.security import (
+    PasswordHashPool,
+    hash_password_async,
+    password_hash_pool,
+    verify_password_async,
+)
+
+
+def test_login_verifies_password_in_worker_pool(client, admin_headers):
+    before = password_hash_pool.stats()["completed"]
+
+    response = client.post(
+        "/api/auth/login",
+        json={"email": "pm@example.com", "password": "WrongPass123!"},
+    )
+    assert response.status_code == 401
+
+    response = client.get("/api/debug/password-hashing", headers=admin_headers)
+    assert response.status_code == 200, response.text
+    stats = response.json()
+    assert stats["completed"] == before + 1
+    assert stats["queued"] == 0
+    assert stats["running"] == 0
+
+
+def test_pool_queues_work_beyond_its_size():
+    pool = PasswordHashPool(max_workers=1)
+
+    async def run_batch():
+        password_hash = await hash_password_async("Lozinka123!")
+        results = await asyncio.gather(*[pool.run(time.sleep, 0.05) for _ in range(3)])
+        return password_hash, results, await verify_password_async("x", "")
+
+    try:
+        password_hash, results, empty_hash_valid = asyncio.run(run_batch())
+    finally:
+        pool.shutdown()
+
+    assert password_hash.startswith("$2")
+    assert results == [None, None, None]
+    assert empty_hash_valid is False
+    stats = pool.stats()
+    assert stats["completed"] == 3
+    assert stats["max_queued"] >= 2
@@ -0,0 +1,32 @@
+import asyncio
+
+from app.core.principal_cache import principal_cache
+from app.db.instance import db
+
+
+def _run(coro):
+    try:
+        asyncio.run(coro)
+    except RuntimeError:
+        loop = asyncio.get_event_loop()
+        loop.run_until_complete(coro)
+
+
+def test_principal_cache_hits_and_membership_invalidation(
+    client, pm_headers, pm_user_id
+):
+    principal_cache.clear()
+
+    response = client.get("/api/nekretnine/", headers=pm_headers)
+    assert response.status_code == 200, response.text
+    hits_before = principal_cache.hits
+
+    response = client.get("/api/nekretnine/", headers=pm_headers)
+    assert response.status_code == 200
+    assert principal_cache.hits > hits_before
+
+    # Revoking the membership must take effect on the very next request.
+    _run(db.tenant_memberships.delete_many({"user_id": pm_user_id}))
+
+    response = client.get("/api/nekretnine/", headers=pm_headers)
+    assert response.status_code == 403
@@ -0,0 +1,52 @@
+from app.db.profiler import profiler, query_shape
+
+from .factories import create_property
+
+
+def test_query_shape_strips_values():
+    shape = query_shape(
+        {
+            "$or": [{"tenant_id": "t-1"}, {"tenant_id": None}],
+            "status": {"$in": ["aktivno", "na_isteku"]},
+            "datum_zavrsetka": {"$lt": "2024-01-01"},
+        }
+    )
+    assert shape == {
+        "$or": [{"tenant_id": "?"}, {"tenant_id": "?"}],
+        "datum_zavrsetka": {"$lt": "?"},
+        "status": {"$in": ["?"]},
+    }
+
+
+def test_query_stats_endpoint_toggles_and_reports(client, admin_headers, pm_headers):
+    response = client.put(
+        "/api/debug/query-stats",
+        json={"enabled": True, "reset": True},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["enabled"] is True
+
+    try:
+        create_property(client, admin_headers, naziv="Profilirana zgrada")
+        client.get("/api/nekretnine", headers=admin_headers)
+
+        response = client.get(
+            "/api/debug/query-stats", params={"limit": 50}, headers=admin_headers
+        )
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["calls"] > 0
+        entries = body["top"]
+        assert any(
+            entry["collection"] == "nekretnine" and entry["operation"] == "find"
+            for entry in entries
+        )
+        assert all("Profilirana" not in entry["shape"] for entry in entries)
+        assert all(entry["rows_fetched"] >= entry["rows_matched"] for entry in entries)
+    finally:
+        profiler.enabled = False
+        profiler.reset()
+
+    response = client.get("/api/debug/query-stats", headers=pm_headers)
+    assert response.status_code == 403
@@ -0,0 +1,54 @@
+import asyncio
+from datetime import date, timedelta
+
+from app.db.instance import db
+from app.services.reminder_service import check_contract_expirations
+
+from .factories import create_contract, create_property, create_zakupnik
+
+
+def test_expiration_reminders_catch_up_after_missed_runs(client, admin_headers):
+    today = date.today()
+    prop = create_property(client, admin_headers)
+    tenant = create_zakupnik(client, admin_headers)
+    common = {"nekretnina_id": prop["id"], "zakupnik_id": tenant["id"]}
+    soon = create_contract(
+        client,
+        admin_headers,
+        interna_oznaka="UG-30",
+        datum_zavrsetka=(today + timedelta(days=30)).isoformat(),
+        **common,
+    )
+    later = create_contract(
+        client,
+        admin_headers,
+        interna_oznaka="UG-65",
+        datum_zavrsetka=(today + timedelta(days=65)).isoformat(),
+        **common,
+    )
+
+    summary = asyncio.run(check_contract_expirations(today))
+    assert summary["kreirano"] == 1
+    # Running twice on the same day creates nothing new
+    assert asyncio.run(check_contract_expirations(today))["kreirano"] == 0
+
+    # The job misses a week; UG-65 crossed 60 days in the meantime
+    summary = asyncio.run(check_contract_expirations(today + timedelta(days=7)))
+    assert summary == {
+        "kreirano": 1,
+        "od": today.isoformat(),
+        "do": (today + timedelta(days=7)).isoformat(),
+    }
+
+    reminders = asyncio.run(db.podsjetnici.find({"created_by": "system"}).to_list(None))
+    assert sorted((r["povezani_entitet_id"], r["kljuc"]) for r in reminders) == sorted(
+        [
+            (soon["id"], f"istek_ugovora:{soon['id']}:30"),
+            (later["id"], f"istek_ugovora:{later['id']}:60"),
+        ]
+    )
+    response = client.get("/api/podsjetnici/aktivni", headers=admin_headers)
+    assert {r["naslov"] for r in response.json()} >= {
+        "Istek ugovora: UG-30 (30 dana)",
+        "Istek ugovora: UG-65 (60 dana)",
+    }
@@ -0,0 +1,133 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import sqlalchemy as sa
+from app.db.instance import job_store, session_factory
+from app.db.scheduled_jobs import JobRunRecord, ScheduledJobRecord
+from app.services.scheduler import JobScheduler
+
+T0 = datetime(2030, 1, 1, 12, 0)
+
+
+def _schedulers(calls, count=2, fail=False):
+    async def job():
+        calls.append(1)
+        if fail:
+            raise RuntimeError("boom")
+
+    schedulers = []
+    for index in range(count):
+        scheduler = JobScheduler(
+            job_store, timedelta(minutes=10), poll_seconds=1, owner=f"worker-{index}"
+        )
+        scheduler.register("test_nightly", "0 3 * * *", job)
+        schedulers.append(scheduler)
+    return schedulers
+
+
+async def _job_row():
+    rows = await job_store.list()
+    return next(row for row in rows if row["name"] == "test_nightly")
+
+
+async def _cleanup():
+    async with session_factory() as session:
+        await session.execute(
+            sa.delete(ScheduledJobRecord).where(
+                ScheduledJobRecord.name == "test_nightly"
+            )
+        )
+        await session.execute(
+            sa.delete(JobRunRecord).where(JobRunRecord.job_name == "test_nightly")
+        )
+        await session.commit()
+
+
+def test_due_job_runs_once_across_workers_and_catches_up():
+    calls = []
+    first, second = _schedulers(calls)
+
+    async def scenario():
+        await first.sync_registry(T0)
+        await second.sync_registry(T0)
+        assert (await _job_row())["next_run_at"] == datetime(2030, 1, 2, 3, 0)
+        assert await first.run_due(T0) == []
+
+        # Both workers come back three days late; only one runs the job, once
+        late = T0 + timedelta(days=3)
+        ran = await asyncio.gather(first.run_due(late), second.run_due(late))
+        assert sorted(len(names) for names in ran) == [0, 1]
+        row = await _job_row()
+        assert row["last_status"] == "ok"
+        assert row["last_duration_ms"] is not None
+        assert row["next_run_at"] == datetime(2030, 1, 5, 3, 0)
+        assert not row["running"]
+        assert await first.run_due(late) == []
+
+        (run,) = await job_store.runs("test_nightly")
+        assert (run["trigger"], run["status"]) == ("schedule", "ok")
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        asyncio.run(_cleanup())
+    assert len(calls) == 1
+
+
+def test_leased_job_is_skipped_until_the_lease_expires_and_failures_are_recorded():
+    calls = []
+    (scheduler,) = _schedulers(calls, count=1, fail=True)
+
+    async def scenario():
+        await scheduler.sync_registry(T0)
+        due = datetime(2030, 1, 2, 3, 0)
+        # A worker that died while holding the lease
+        assert await job_store.claim("test_nightly", "dead", due, timedelta(minutes=10))
+        assert await scheduler.run_due(due + timedelta(minutes=5)) == []
+
+        assert await scheduler.run_due(due + timedelta(minutes=11)) == ["test_nightly"]
+        row = await _job_row()
+        assert row["last_status"] == "error"
+        assert row["last_error"] == "RuntimeError: boom"
+        assert row["next_run_at"] == datetime(2030, 1, 3, 3, 0)
+        (run,) = await job_store.runs("test_nightly")
+        assert (run["status"], run["error"]) == ("error", "RuntimeError: boom")
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        asyncio.run(_cleanup())
+    assert len(calls) == 1
+
+
+def test_run_now_is_skipped_while_another_worker_holds_the_lease():
+    calls = []
+    first, second = _schedulers(calls)
+
+    async def scenario():
+        await first.sync_registry(T0)
+        now = datetime.utcnow()
+        assert await job_store.claim(
+            "test_nightly", "other", now, timedelta(minutes=10), force=True
+        )
+        assert await second.run_now("test_nightly", trigger="startup") is None
+
+        async with session_factory() as session:
+            await session.execute(
+                sa.update(ScheduledJobRecord)
+                .where(ScheduledJobRecord.name == "test_nightly")
+                .values(lease_owner=None, lease_expires_at=None)
+            )
+            await session.commit()
+        run_id = await second.run_now("test_nightly", trigger="startup")
+        assert run_id is not None
+        (run,) = await job_store.runs("test_nightly")
+        assert (run["id"], run["trigger"], run["status"]) == (run_id, "startup", "ok")
+        # Running it out of schedule keeps the next scheduled run
+        assert (await _job_row())["next_run_at"] == datetime(2030, 1, 2, 3, 0)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        asyncio.run(_cleanup())
+    assert len(calls) == 1
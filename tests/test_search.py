@@ -0,0 +1,226 @@
+import asyncio
+
+from app.core.config import get_settings
+from app.db.document_store import MariaDBDatabase
+from app.db.instance import db, search_index, session_factory
+from app.db.search_index import normalize_text, tokenize
+
+from .factories import create_property, create_zakupnik
+
+settings = get_settings()
+
+
+def _search(client, headers, q):
+    response = client.get("/api/pretraga/", params={"q": q}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_normalize_text_folds_case_and_croatian_diacritics():
+    assert normalize_text("ČAĆIĆ Šižđ") == "cacic sizd"
+    assert tokenize("Ulica Đure Đakovića 12/a") == [
+        "ulica",
+        "dure",
+        "dakovica",
+        "12",
+        "a",
+    ]
+
+
+def test_search_matches_prefixes_without_diacritics(client, admin_headers):
+    prop = create_property(client, admin_headers, naziv="Poslovni centar Šibenik")
+    create_property(client, admin_headers, naziv="Skladište Rijeka", adresa="Lučka 3")
+    tenant = create_zakupnik(client, admin_headers, naziv_firme="Čistoća d.o.o.")
+
+    data = _search(client, admin_headers, "sibe")
+    assert [p["id"] for p in data["nekretnine"]] == [prop["id"]]
+
+    data = _search(client, admin_headers, "CISTO")
+    assert [t["id"] for t in data["zakupnici"]] == [tenant["id"]]
+    assert data["rezultati"][0] == {
+        "tip": "zakupnici",
+        "id": tenant["id"],
+        "naslov": "Čistoća d.o.o.",
+        "score": data["rezultati"][0]["score"],
+    }
+
+    # Every query token has to match
+    assert _search(client, admin_headers, "poslovni rijeka")["nekretnine"] == []
+
+
+def test_search_ranks_whole_words_and_follows_writes(client, admin_headers):
+    exact = create_property(client, admin_headers, naziv="Zagreb")
+    prefix = create_property(client, admin_headers, naziv="Zagrebačka vila")
+
+    data = _search(client, admin_headers, "zagreb")
+    ids = [p["id"] for p in data["nekretnine"]]
+    assert ids[:2] == [exact["id"], prefix["id"]]
+
+    response = client.put(
+        f"/api/nekretnine/{exact['id']}",
+        json={"naziv": "Osijek"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+    ids = [p["id"] for p in _search(client, admin_headers, "osijek")["nekretnine"]]
+    assert ids == [exact["id"]]
+
+    client.delete(f"/api/nekretnine/{prefix['id']}", headers=admin_headers)
+    ids = [p["id"] for p in _search(client, admin_headers, "zagrebacka")["nekretnine"]]
+    assert ids == []
+
+
+def test_search_respects_tenant_scope(client, admin_headers):
+    asyncio.run(
+        db.zakupnici.insert_one(
+            {"id": "foreign", "tenant_id": "other-tenant", "naziv_firme": "Tuđa firma"}
+        )
+    )
+    assert _search(client, admin_headers, "tuda")["zakupnici"] == []
+    hits = search_index.search("tuda", tenant_id="other-tenant")
+    assert [hit.document_id for hit in hits["zakupnici"]] == ["foreign"]
+
+
+def test_search_ranks_oib_over_names_over_notes(client, admin_headers):
+    by_oib = create_zakupnik(
+        client, admin_headers, naziv_firme="Alfa d.o.o.", oib="98765432109"
+    )
+    by_name = create_zakupnik(
+        client, admin_headers, naziv_firme="98765432109 Beta", oib="11111111111"
+    )
+    data = _search(client, admin_headers, "98765432109")
+    assert [t["id"] for t in data["zakupnici"]] == [by_oib["id"], by_name["id"]]
+
+    prop = create_property(client, admin_headers, naziv="Marina")
+    asyncio.run(
+        db.ugovori.insert_one(
+            {
+                "id": "contract-notes",
+                "interna_oznaka": "UG-1",
+                "napomena": "Najam veza u marini",
+            }
+        )
+    )
+    data = _search(client, admin_headers, "marin")
+    assert [hit["id"] for hit in data["rezultati"]] == [prop["id"], "contract-notes"]
+
+
+def test_search_falls_back_to_mid_word_matches(client, admin_headers):
+    tenant = create_zakupnik(client, admin_headers, oib="12345678901")
+    prop = create_property(client, admin_headers, naziv="Trgovački centar")
+
+    data = _search(client, admin_headers, "5678")
+    assert [t["id"] for t in data["zakupnici"]] == [tenant["id"]]
+    # Types with word-prefix hits do not fall back
+    data = _search(client, admin_headers, "centar")
+    assert [p["id"] for p in data["nekretnine"]] == [prop["id"]]
+    assert _search(client, admin_headers, "govacki")["nekretnine"][0]["id"] == (
+        prop["id"]
+    )
+
+
+def test_search_sees_writes_of_other_workers(client, admin_headers):
+    assert _search(client, admin_headers, "udaljena")["zakupnici"] == []
+
+    # A store without listeners stands in for another worker's process
+    other_worker = MariaDBDatabase(session_factory)
+    tenant = {
+        "id": "other-worker",
+        "tenant_id": settings.DEFAULT_TENANT_ID,
+        "naziv_firme": "Udaljena firma",
+    }
+    try:
+        asyncio.run(other_worker.zakupnici.insert_one(tenant))
+        data = _search(client, admin_headers, "udaljena")
+        assert [t["id"] for t in data["zakupnici"]] == ["other-worker"]
+    finally:
+        # Remove it the same way, leaving this worker's counters untouched
+        asyncio.run(other_worker.zakupnici.delete_one({"id": "other-worker"}))
+    assert _search(client, admin_headers, "udaljena")["zakupnici"] == []
+
+
+def test_search_types_and_limit(client, admin_headers):
+    for index in range(4):
+        create_property(client, admin_headers, naziv=f"Toranj {index}")
+    create_zakupnik(client, admin_headers, naziv_firme="Toranj servis")
+
+    response = client.get(
+        "/api/pretraga/",
+        params={"q": "toranj", "limit": 2, "types": "nekretnine"},
+        headers=admin_headers,
+    )
+    data = response.json()
+    assert set(data) == {"nekretnine", "rezultati"}
+    assert len(data["nekretnine"]) == 2
+    assert len(data["rezultati"]) == 2
+
+    response = client.get(
+        "/api/pretraga/",
+        params={"q": "toranj", "types": "nekretnine,racuni"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 400
+
+
+def test_suggest_completes_names_oibs_and_follows_writes(client, admin_headers):
+    tenant = create_zakupnik(
+        client, admin_headers, naziv_firme="Đurđevac trgovina d.o.o.", oib="55512345678"
+    )
+    prop = create_property(client, admin_headers, naziv="Poslovni centar Šibenik")
+
+    def suggest(q):
+        response = client.get(
+            "/api/pretraga/suggest", params={"q": q}, headers=admin_headers
+        )
+        assert response.status_code == 200, response.text
+        return [(s["tip"], s["id"], s["polje"]) for s in response.json()]
+
+    assert suggest("durde") == [("zakupnici", tenant["id"], "naziv_firme")]
+    assert suggest("trgov") == [("zakupnici", tenant["id"], "naziv_firme")]
+    assert suggest("555") == [("zakupnici", tenant["id"], "oib")]
+    assert suggest("sib") == [("nekretnine", prop["id"], "naziv")]
+
+    second = create_property(client, admin_headers, naziv="Šibenska riva")
+    # Shorter completions first: "sibenik" before "sibenska riva"
+    assert suggest("sibe") == [
+        ("nekretnine", prop["id"], "naziv"),
+        ("nekretnine", second["id"], "naziv"),
+    ]
+    client.delete(f"/api/nekretnine/{second['id']}", headers=admin_headers)
+    assert suggest("sibe") == [("nekretnine", prop["id"], "naziv")]
+
+
+def test_suggest_sees_writes_of_other_workers(client, admin_headers):
+    def suggest(q):
+        response = client.get(
+            "/api/pretraga/suggest", params={"q": q}, headers=admin_headers
+        )
+        assert response.status_code == 200, response.text
+        return [s["id"] for s in response.json()]
+
+    assert suggest("udalj") == []
+
+    # A store without listeners stands in for another worker's process
+    other_worker = MariaDBDatabase(session_factory)
+    try:
+        asyncio.run(
+            other_worker.zakupnici.insert_one(
+                {
+                    "id": "other-worker",
+                    "tenant_id": settings.DEFAULT_TENANT_ID,
+                    "naziv_firme": "Udaljena firma",
+                }
+            )
+        )
+        assert suggest("udalj") == ["other-worker"]
+        asyncio.run(
+            other_worker.zakupnici.update_one(
+                {"id": "other-worker"}, {"$set": {"naziv_firme": "Preimenovana"}}
+            )
+        )
+        assert suggest("udalj") == []
+        assert suggest("preimen") == ["other-worker"]
+    finally:
+        # Remove it the same way, leaving this worker's counters untouched
+        asyncio.run(other_worker.zakupnici.delete_one({"id": "other-worker"}))
+    assert suggest("preimen") == []
@@ -0,0 +1,76 @@
+import asyncio
+
+from app.core.config import get_settings
+from app.db.instance import rebuild_tenant_kpis, tenant_kpis
+
+from .factories import create_contract, create_property, create_zakupnik
+
+settings = get_settings()
+
+
+def _dashboard(client, headers):
+    response = client.get("/api/dashboard/", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_kpis_follow_contract_and_property_writes(client, admin_headers):
+    prop = create_property(client, admin_headers, trzisna_vrijednost=100000.0)
+    tenant = create_zakupnik(client, admin_headers)
+    contract = create_contract(
+        client,
+        admin_headers,
+        nekretnina_id=prop["id"],
+        zakupnik_id=tenant["id"],
+        osnovna_zakupnina=800.0,
+    )
+
+    data = _dashboard(client, admin_headers)
+    assert data["ukupno_nekretnina"] == 1
+    assert data["aktivni_ugovori"] == 1
+    assert data["mjesecni_prihod"] == 800.0
+
+    response = client.put(
+        f"/api/ugovori/{contract['id']}",
+        json={"osnovna_zakupnina": 1000.0},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+    assert _dashboard(client, admin_headers)["mjesecni_prihod"] == 1000.0
+
+    response = client.put(
+        f"/api/ugovori/{contract['id']}/status",
+        json={"novi_status": "raskinuto"},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+    data = _dashboard(client, admin_headers)
+    assert data["aktivni_ugovori"] == 0
+    assert data["mjesecni_prihod"] == 0.0
+
+    response = client.delete(f"/api/nekretnine/{prop['id']}", headers=admin_headers)
+    assert response.status_code in (200, 204), response.text
+    data = _dashboard(client, admin_headers)
+    assert data["ukupno_nekretnina"] == 0
+    assert data["ukupna_vrijednost_portfelja"] == 0.0
+
+
+def test_rebuild_matches_incremental_counters(client, admin_headers):
+    prop = create_property(client, admin_headers, trzisna_vrijednost=250000.0)
+    tenant = create_zakupnik(client, admin_headers)
+    for index, rent in enumerate((400.0, 650.0)):
+        create_contract(
+            client,
+            admin_headers,
+            nekretnina_id=prop["id"],
+            zakupnik_id=tenant["id"],
+            interna_oznaka=f"UG-{index}",
+            osnovna_zakupnina=rent,
+        )
+
+    incremental = asyncio.run(tenant_kpis.read(settings.DEFAULT_TENANT_ID))
+    asyncio.run(rebuild_tenant_kpis())
+    rebuilt = asyncio.run(tenant_kpis.read(settings.DEFAULT_TENANT_ID))
+
+    assert incremental == rebuilt
+    assert rebuilt["contracts"]["aktivno"] == {"count": 2, "rent": 1050.0}
@@ -0,0 +1,73 @@
+import json
+import threading
+
+from app.core.principal_cache import principal_cache
+from app.core.tracing import JsonFileExporter, Span, Trace, tracer
+
+
+def test_request_trace_records_nested_spans(client, admin_headers):
+    response = client.put(
+        "/api/debug/traces",
+        json={"enabled": True, "clear": True},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200, response.text
+
+    try:
+        # Force a full authentication so the JWT decode span is recorded.
+        principal_cache.clear()
+        response = client.get("/api/nekretnine/", headers=admin_headers)
+        assert response.status_code == 200
+        request_id = response.headers["X-Request-Id"]
+
+        response = client.get(f"/api/debug/traces/{request_id}", headers=admin_headers)
+        assert response.status_code == 200, response.text
+        trace = response.json()
+        spans = {span["name"]: span for span in trace["spans"]}
+
+        root = trace["spans"][0]
+        assert root["name"] == "GET /api/nekretnine/"
+        assert root["parent_id"] is None
+        auth = spans["auth.get_current_user"]
+        assert auth["parent_id"] == root["span_id"]
+        assert spans["auth.jwt_decode"]["parent_id"] == auth["span_id"]
+        assert "db.find" in spans
+
+        response = client.get(
+            f"/api/debug/traces/{request_id}",
+            params={"format": "otlp"},
+            headers=admin_headers,
+        )
+        otlp_spans = response.json()["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert {span["traceId"] for span in otlp_spans} == {request_id.replace("-", "")}
+    finally:
+        tracer.enabled = False
+        tracer.buffer.clear()
+
+
+def test_file_exporter_writes_off_the_calling_thread(tmp_path):
+    path = tmp_path / "traces" / "traces.jsonl"
+    exporter = JsonFileExporter(path)
+    writers = []
+    write = exporter._write
+
+    def record_thread(traces):
+        writers.append(threading.current_thread())
+        write(traces)
+
+    exporter._write = record_thread
+    try:
+        for number in range(3):
+            trace = Trace(trace_id=f"{number:032x}")
+            trace.spans.append(Span(trace.trace_id, "0" * 16, None, "GET /", 1, 2))
+            exporter.export(trace)
+        exporter.flush()
+    finally:
+        exporter.close()
+
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert [
+        json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["traceId"]
+        for line in lines
+    ] == [f"{number:032x}" for number in range(3)]
+    assert writers and threading.current_thread() not in writers
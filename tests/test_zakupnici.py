@@ -58,6 +58,24 @@ def test_search_zakupnici_matches_multiple_fields(client, admin_headers):
     assert results[0]["oib"] == "22222222222"
 
 
+def test_search_zakupnici_treats_input_as_literal_text(client, admin_headers):
+    _create_zakupnik(client, admin_headers, naziv_firme="A+B (Split) d.o.o.")
+    _create_zakupnik(client, admin_headers, naziv_firme="AAB d.o.o.", oib="33333333333")
+
+    response = client.get(
+        "/api/zakupnici", params={"search": "a+b (split"}, headers=admin_headers
+    )
+    assert response.status_code == 200
+    assert [t["naziv_firme"] for t in response.json()] == ["A+B (Split) d.o.o."]
+
+    # A ReDoS-shaped pattern is just text that matches nothing
+    response = client.get(
+        "/api/zakupnici", params={"search": "(a+)+$"}, headers=admin_headers
+    )
+    assert response.status_code == 200
+    assert response.json() == []
+
+
 def test_search_zakupnici_returns_all_without_query(client, admin_headers):
     created = [
         _create_zakupnik(